@@ -1,292 +1,894 @@
-from aiohttp import web
-from server import PromptServer
-import time
-from ..logger import get_logger
-from ..browser import get_browser_manager
-import os
-import glob
-import json
-
-# Configure logging
-logger = get_logger()
-# Get the PromptServer instance
-server = PromptServer.instance
-
-
-@server.routes.post("/cpe/workflow/convert")
-async def convert_json(request):
-    """Convert a workflow from UI format to API-executable format using headless browser."""
-    try:
-        data = await request.json()
-        if not data:
-            raise ValueError("Request body is required")
-
-        manager = get_browser_manager()
-        result = await manager.convert_workflow(data)
-
-        return web.json_response({
-            "status": "success",
-            "message": "Workflow converted successfully",
-            "data": {"workflow": result}
-        })
-
-    except ValueError as e:
-        logger.error("Validation error: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": str(e)
-        }, status=400)
-    except RuntimeError as e:
-        logger.error("Browser conversion error: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": "Workflow conversion failed",
-            "details": str(e)
-        }, status=503)
-    except Exception as e:
-        logger.error("Error processing request: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": "Internal server error",
-            "details": str(e)
-        }, status=500)
-
-
-@server.routes.get("/cpe/workflow/list")
-async def list_workflows(request):
-    """List all available workflows from the userdata/workflows directory"""
-    try:
-        # Get user directory path - go up one more level to reach ComfyUI root
-        user_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "user")
-        workflow_dir = os.path.join(user_dir, "default", "workflows")
-
-        # Create directory if not exists
-        os.makedirs(workflow_dir, exist_ok=True)
-
-        # Get all json files recursively
-        pattern = os.path.join(glob.escape(workflow_dir), '**', '*.json')
-        workflow_files = []
-
-        for file_path in glob.glob(pattern, recursive=True):
-            workflow_files.append({
-                "filename": os.path.relpath(file_path, workflow_dir).replace(os.sep, '/'),
-                "size": os.path.getsize(file_path),
-                "modified": os.path.getmtime(file_path)
-            })
-
-        return web.json_response({
-            "status": "success",
-            "workflows": workflow_files
-        })
-
-    except ValueError as e:
-        logger.error("Validation error: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": str(e)
-        }, status=400)
-    except Exception as e:
-        logger.error("Error listing workflows: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": "Internal server error",
-            "details": str(e)
-        }, status=500)
-
-
-@server.routes.post("/cpe/workflow/save")
-async def save_workflow(request):
-    """Save workflow to the userdata/workflows directory"""
-    try:
-        data = await request.json()
-        if not data or "workflow" not in data:
-            raise ValueError("workflow field is required")
-
-        workflow_str = data["workflow"]
-        # Validate JSON
-        try:
-            json.loads(workflow_str)
-        except json.JSONDecodeError:
-            raise ValueError("Invalid JSON in workflow field")
-
-        # Get workflow name from request or generate one
-        workflow_name = data.get("name", f"workflow_{int(time.time())}.json")
-        if not workflow_name.endswith('.json'):
-            workflow_name += '.json'
-
-        # Get user directory path
-        user_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "user")
-        workflow_dir = os.path.join(user_dir, "default", "workflows")
-
-        # Create directory if not exists
-        os.makedirs(workflow_dir, exist_ok=True)
-
-        # Save workflow file
-        file_path = os.path.join(workflow_dir, workflow_name)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(workflow_str)
-
-        return web.json_response({
-            "status": "success",
-            "message": "Workflow saved successfully",
-            "filename": workflow_name
-        })
-
-    except ValueError as e:
-        logger.error("Validation error: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": str(e)
-        }, status=400)
-    except Exception as e:
-        logger.error("Error saving workflow: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": "Internal server error",
-            "details": str(e)
-        }, status=500)
-
-
-@server.routes.get("/cpe/workflow/get")
-async def get_workflow(request):
-    """Get a specific workflow by filename from the userdata/workflows directory"""
-    try:
-        # Get filename from query parameters
-        filename = request.query.get("filename")
-        if not filename:
-            raise ValueError("filename query parameter is required")
-
-        # Get user directory path
-        user_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "user")
-        workflow_dir = os.path.join(user_dir, "default", "workflows")
-
-        # Ensure the path is secure and within the workflows directory
-        file_path = os.path.join(workflow_dir, filename.replace('/', os.sep))
-        if not os.path.normpath(file_path).startswith(os.path.normpath(workflow_dir)):
-            raise ValueError("Invalid filename path")
-
-        # Check if file exists
-        if not os.path.isfile(file_path):
-            return web.json_response({
-                "status": "error",
-                "message": f"Workflow file not found: {filename}"
-            }, status=404)
-
-        # Read workflow file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            workflow_content = f.read()
-
-        return web.json_response({
-            "status": "success",
-            "filename": filename,
-            "workflow": workflow_content
-        })
-
-    except ValueError as e:
-        logger.error("Validation error: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": str(e)
-        }, status=400)
-    except Exception as e:
-        logger.error("Error getting workflow: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": "Internal server error",
-            "details": str(e)
-        }, status=500)
-
-
-@server.routes.get("/cpe/workflow/get-and-convert")
-async def get_and_convert_workflow(request):
-    """Get a workflow by filename and convert it using the headless browser."""
-    try:
-        # Get filename from query parameters
-        filename = request.query.get("filename")
-        if not filename:
-            raise ValueError("filename query parameter is required")
-
-        # Get user directory path
-        user_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "user")
-        workflow_dir = os.path.join(user_dir, "default", "workflows")
-
-        # Ensure the path is secure and within the workflows directory
-        file_path = os.path.join(workflow_dir, filename.replace('/', os.sep))
-        if not os.path.normpath(file_path).startswith(os.path.normpath(workflow_dir)):
-            raise ValueError("Invalid filename path")
-
-        # Check if file exists
-        if not os.path.isfile(file_path):
-            return web.json_response({
-                "status": "error",
-                "message": f"Workflow file not found: {filename}"
-            }, status=404)
-
-        # Read workflow file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            workflow_content = f.read()
-
-        # Parse workflow JSON
-        try:
-            workflow_data = json.loads(workflow_content)
-        except json.JSONDecodeError:
-            raise ValueError("Invalid JSON in workflow file")
-
-        if not workflow_data:
-            raise ValueError("Workflow file contains no data or is an empty JSON object")
-
-        # Convert using headless browser
-        manager = get_browser_manager()
-        result = await manager.convert_workflow(workflow_data)
-
-        return web.json_response({
-            "status": "success",
-            "message": "Workflow converted successfully",
-            "filename": filename,
-            "data": {"workflow": result}
-        })
-
-    except ValueError as e:
-        logger.error("Validation error: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": str(e)
-        }, status=400)
-    except RuntimeError as e:
-        logger.error("Browser conversion error: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": "Workflow conversion failed",
-            "details": str(e)
-        }, status=503)
-    except Exception as e:
-        logger.error("Error processing workflow: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": "Internal server error",
-            "details": str(e)
-        }, status=500)
-
-
-@server.routes.get("/cpe/health")
-async def health_check(request):
-    """Health check endpoint returning headless browser status."""
-    try:
-        manager = get_browser_manager()
-        status_info = {
-            "status": manager.status.value,
-        }
-        if manager.error_message:
-            status_info["error"] = manager.error_message
-
-        return web.json_response({
-            "status": "success",
-            "browser": status_info
-        })
-    except Exception as e:
-        logger.error("Error in health check: %s", str(e))
-        return web.json_response({
-            "status": "error",
-            "message": "Internal server error",
-            "details": str(e)
-        }, status=500)
+from aiohttp import web
+from server import PromptServer
+import time
+from ..logger import get_logger
+from ..browser import BrowserStatus, get_browser_manager
+from ..cache import DiskConversionCache, FileHashCache
+from ..catalog import WorkflowCatalog
+from ..pool import PRIORITIES, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, OverloadedError
+from ..worker import WORKER_READY
+from .. import compression, config, fileio, jsonutil, metrics, tracing
+import asyncio
+import functools
+import os
+import hashlib
+import json
+
+# Configure logging
+logger = get_logger()
+# Get the PromptServer instance
+server = PromptServer.instance
+
+# Default size cap of the persistent conversion cache
+DEFAULT_DISK_CACHE_MAX_MB = 256
+# Default rescan interval of the workflow catalog when polling (seconds)
+DEFAULT_CATALOG_POLL_INTERVAL = 5.0
+# Number of workflow files whose content hash is remembered for ETags
+FILE_HASH_ENTRIES = 4096
+
+# Clients may keep responses but must revalidate them with If-None-Match
+CACHE_CONTROL = "no-cache"
+# Default smallest response body that is compressed
+DEFAULT_COMPRESS_MIN_BYTES = 1024
+# Default size cap of the compressed response cache
+DEFAULT_COMPRESS_CACHE_MB = 32
+
+# Requests taking at least this long are logged with their trace (0 disables)
+slow_request_ms = config.get_float("SLOW_REQUEST_MS", 0)
+
+
+def _get_user_dir():
+    """Get the ComfyUI user directory (ComfyUI/user)."""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "user")
+
+
+def _resolve_workflow_path(filename):
+    """Resolve a workflow filename to a path inside the workflows directory.
+
+    Raises:
+        ValueError: If the filename escapes the workflows directory.
+    """
+    workflow_dir = os.path.join(_get_user_dir(), "default", "workflows")
+    file_path = os.path.join(workflow_dir, filename.replace('/', os.sep))
+    if not os.path.normpath(file_path).startswith(os.path.normpath(workflow_dir)):
+        raise ValueError("Invalid filename path")
+    return file_path
+
+
+# Persistent cache of converted workflow files, kept across restarts
+disk_cache = DiskConversionCache(
+    config.get_str("DISK_CACHE_DIR", os.path.join(_get_user_dir(), "cpe-cache", "converted")),
+    config.get_int("DISK_CACHE_MAX_MB", DEFAULT_DISK_CACHE_MAX_MB) * 1024 * 1024,
+)
+
+# Index of the workflow files, kept current by a directory watcher
+catalog = WorkflowCatalog(
+    os.path.join(_get_user_dir(), "default", "workflows"),
+    watcher=config.get_str("CATALOG_WATCHER", "auto"),
+    poll_interval=config.get_float("CATALOG_POLL_INTERVAL", DEFAULT_CATALOG_POLL_INTERVAL),
+)
+
+# Content hashes of workflow files by path, mtime and size, so ETags can be
+# computed from a stat without reading the file
+file_hashes = FileHashCache(FILE_HASH_ENTRIES)
+
+
+# Compresses large responses for clients that accept it (None when disabled)
+compressor = None
+if config.get_bool("COMPRESSION", True):
+    compressor = compression.ResponseCompressor(
+        config.get_int("COMPRESS_MIN_BYTES", DEFAULT_COMPRESS_MIN_BYTES),
+        config.get_int("COMPRESS_CACHE_MB", DEFAULT_COMPRESS_CACHE_MB) * 1024 * 1024,
+    )
+
+
+def _instrumented(handler):
+    """Decorator: count the handler's responses by status and time them.
+
+    The request runs under a trace whose spans are returned in the
+    Server-Timing header, along with its request ID (the client's
+    X-Request-ID if valid) in X-Request-ID.
+    """
+    @functools.wraps(handler)
+    async def wrapper(request):
+        request_id = tracing.new_request_id(request.headers.get("X-Request-ID"))
+        with tracing.trace_request(f"{request.method} {request.path}", request_id) as trace:
+            status = "500"
+            try:
+                response = await handler(request)
+                status = str(response.status)
+                response.headers["X-Request-ID"] = request_id
+                response.headers["Server-Timing"] = trace.server_timing()
+                return response
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            finally:
+                metrics.HTTP_REQUESTS.inc(request.path, status)
+                metrics.HTTP_DURATION.observe(request.path, trace.elapsed())
+                tracing.log_if_slow(trace, slow_request_ms)
+    return wrapper
+
+
+def _compressible(handler):
+    """Decorator: compress the handler's response body when the client accepts it."""
+    @functools.wraps(handler)
+    async def wrapper(request):
+        response = await handler(request)
+        if compressor is None:
+            return response
+        response.headers["Vary"] = "Accept-Encoding"
+        body = response.body
+        if response.status != 200 or not isinstance(body, bytes) or len(body) < compressor.min_bytes:
+            return response
+        encoding = compression.negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        with tracing.span("compress"):
+            response.body = await compressor.compress(body, encoding)
+        response.headers["Content-Encoding"] = encoding
+        etag = response.headers.get("ETag")
+        if etag is not None and not etag.startswith("W/"):
+            # Encoded bytes differ from the identity body, so the validator is weak
+            response.headers["ETag"] = "W/" + etag
+        return response
+    return wrapper
+
+
+def _json_response(data, status=200, headers=None):
+    """Like web.json_response, but encoded with the fast JSON backend."""
+    with tracing.span("encode"):
+        body = jsonutil.dumps(data)
+    return web.Response(body=body, status=status,
+                        content_type="application/json", headers=headers)
+
+
+def _overloaded_response(e):
+    """429 when the conversion queue is full, 503 when a request waited too long for a page."""
+    logger.warning("Conversion rejected: %s", str(e))
+    return _json_response({
+        "status": "error",
+        "message": "Server is busy, retry later",
+        "details": str(e)
+    }, status=429 if e.reason == OverloadedError.QUEUE_FULL else 503,
+        headers={"Retry-After": str(e.retry_after)})
+
+
+async def _read_json(request):
+    """Parse a JSON request body with the fast JSON backend."""
+    return jsonutil.loads(await request.read())
+
+
+def _get_priority(request, default=PRIORITY_INTERACTIVE):
+    """Priority class of a conversion, from the priority param or the X-CPE-Priority header.
+
+    Raises:
+        ValueError: If the priority is not a known class.
+    """
+    priority = request.query.get("priority") or request.headers.get("X-CPE-Priority")
+    if not priority:
+        return default
+    priority = priority.strip().lower()
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+    return priority
+
+
+def _is_raw(request):
+    """Whether the client asked for raw mode (the workflow itself as the JSON body)."""
+    return request.query.get("raw", "").lower() in ("1", "true", "yes")
+
+
+def _make_etag(*parts):
+    """Build a strong ETag from the parts that determine a response body."""
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+    return '"' + digest[:32] + '"'
+
+
+def _etag_matches(request, etag):
+    """Whether the request's If-None-Match header matches etag."""
+    header = request.headers.get("If-None-Match")
+    if not header or etag is None:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+
+def _cache_headers(etag):
+    headers = {"Cache-Control": CACHE_CONTROL}
+    if etag is not None:
+        headers["ETag"] = etag
+    return headers
+
+
+def _not_modified(etag):
+    return web.Response(status=304, headers=_cache_headers(etag))
+
+
+async def _known_content_hash(filename, st):
+    """Content hash of a workflow file from a stat alone, or None if it was never read.
+
+    Falls back to the header of the file's disk cache entry.
+    """
+    content_hash = file_hashes.get(filename, st.st_mtime_ns, st.st_size)
+    if content_hash is None:
+        content_hash = await _traced_io(
+            "disk_cache", disk_cache.content_hash, filename, st.st_mtime_ns, st.st_size
+        )
+    return content_hash
+
+
+async def _traced_io(name, func, *args):
+    """Run a blocking helper on the I/O executor as a span of the request trace."""
+    with tracing.span(name):
+        return await fileio.run_io(func, *args)
+
+
+# Blocking helpers below run on the I/O executor via _traced_io, never
+# directly in a route handler, so slow disks do not stall PromptServer
+
+def _stat_workflow(file_path):
+    """Stat a workflow file, or return None if it does not exist."""
+    if not os.path.isfile(file_path):
+        return None
+    return os.stat(file_path)
+
+
+def _read_workflow_file(file_path):
+    """Read a workflow file.
+
+    Returns:
+        (bytes, SHA-256 hex digest, stat of the file as it was read).
+    """
+    with open(file_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        workflow_bytes = f.read()
+    return workflow_bytes, hashlib.sha256(workflow_bytes).hexdigest(), st
+
+
+def _parse_workflow(workflow_bytes):
+    """Parse the content of a workflow file.
+
+    Raises:
+        ValueError: If the content is not valid JSON or is empty.
+    """
+    try:
+        workflow_data = jsonutil.loads(workflow_bytes)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Invalid JSON in workflow file")
+    if not workflow_data:
+        raise ValueError("Workflow file contains no data or is an empty JSON object")
+    return workflow_data
+
+
+def _put_disk_cache(filename, fingerprint, st, content_hash, result):
+    """Store a conversion in the disk cache, logging instead of failing on I/O errors."""
+    try:
+        disk_cache.put(filename, fingerprint, st.st_mtime_ns, st.st_size, content_hash, result)
+    except OSError as e:
+        logger.warning("Could not write disk cache entry for %s: %s", filename, str(e))
+
+
+def _load_batch_file(filename, fingerprint):
+    """Load a batch item given by filename.
+
+    Returns:
+        (cached result, None) on a disk cache hit, otherwise
+        (None, (workflow data, (filename, stat, content hash))).
+
+    Raises:
+        ValueError: If the file is missing or not a valid workflow.
+    """
+    file_path = _resolve_workflow_path(filename)
+    st = _stat_workflow(file_path)
+    if st is None:
+        raise ValueError(f"Workflow file not found: {filename}")
+
+    cached = disk_cache.get(filename, fingerprint, st.st_mtime_ns, st.st_size)
+    if cached is not None:
+        return cached, None
+
+    workflow_bytes, content_hash, st = _read_workflow_file(file_path)
+    return None, (_parse_workflow(workflow_bytes), (filename, st, content_hash))
+
+
+def _write_workflow_file(file_path, relpath, workflow_bytes):
+    """Atomically write a workflow file and make it visible in the catalog.
+
+    Returns:
+        (stat of the written file, SHA-256 hex digest of its content).
+    """
+    fileio.write_atomic(file_path, workflow_bytes)
+    catalog.refresh_file(relpath)
+    return os.stat(file_path), hashlib.sha256(workflow_bytes).hexdigest()
+
+
+async def _start_browser_warmup(app):
+    """Warm up the headless browser in the background once the server starts."""
+    get_browser_manager().start_warmup()
+
+
+if config.get_bool("PREWARM", False):
+    server.app.on_startup.append(_start_browser_warmup)
+
+
+async def _close_catalog(app):
+    """Stop watching the workflows directory when the server shuts down."""
+    catalog.close()
+
+
+server.app.on_shutdown.append(_close_catalog)
+
+
+@server.routes.post("/cpe/workflow/convert")
+@_instrumented
+@_compressible
+async def convert_json(request):
+    """Convert a workflow from UI format to API-executable format using headless browser."""
+    try:
+        priority = _get_priority(request)
+        data = await _read_json(request)
+        if not data:
+            raise ValueError("Request body is required")
+
+        manager = get_browser_manager()
+        with tracing.span("convert"):
+            result = await manager.convert_workflow(data, priority)
+
+        return _json_response({
+            "status": "success",
+            "message": "Workflow converted successfully",
+            "data": {"workflow": result}
+        })
+
+    except ValueError as e:
+        logger.error("Validation error: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": str(e)
+        }, status=400)
+    except OverloadedError as e:
+        return _overloaded_response(e)
+    except RuntimeError as e:
+        logger.error("Browser conversion error: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Workflow conversion failed",
+            "details": str(e)
+        }, status=503)
+    except Exception as e:
+        logger.error("Error processing request: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Internal server error",
+            "details": str(e)
+        }, status=500)
+
+
+@server.routes.post("/cpe/workflow/convert-batch")
+@_instrumented
+@_compressible
+async def convert_batch(request):
+    """Convert many workflows, given inline or by filename, in one request."""
+    try:
+        # Batches are typically bulk syncs, so they yield to interactive conversions by default
+        priority = _get_priority(request, PRIORITY_BACKGROUND)
+        data = await _read_json(request)
+        if not isinstance(data, dict) or not isinstance(data.get("workflows"), list):
+            raise ValueError("workflows field must be a list")
+
+        items = data["workflows"]
+        manager = get_browser_manager()
+        if len(items) > manager.batch_max_items:
+            raise ValueError(f"Too many workflows in batch (max {manager.batch_max_items})")
+
+        fingerprint = await manager.get_node_fingerprint()
+        results = [None] * len(items)
+        # Workflows that need converting: (index, workflow data, disk cache info)
+        to_convert = []
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or ("workflow" in item) == ("filename" in item):
+                results[index] = {"index": index, "status": "error",
+                                  "message": "Each item needs exactly one of workflow or filename"}
+                continue
+
+            if "workflow" in item:
+                if not item["workflow"]:
+                    results[index] = {"index": index, "status": "error",
+                                      "message": "workflow is empty"}
+                    continue
+                to_convert.append((index, item["workflow"], None))
+                continue
+
+            filename = item["filename"]
+            try:
+                cached, loaded = await _traced_io("load", _load_batch_file, filename, fingerprint)
+                if cached is not None:
+                    results[index] = {"index": index, "status": "success",
+                                      "filename": filename, "workflow": cached}
+                    continue
+                _, st, content_hash = loaded[1]
+                file_hashes.put(filename, st.st_mtime_ns, st.st_size, content_hash)
+                to_convert.append((index, loaded[0], loaded[1]))
+            except ValueError as e:
+                results[index] = {"index": index, "status": "error",
+                                  "filename": filename, "message": str(e)}
+
+        if to_convert:
+            with tracing.span("convert"):
+                outcomes = await manager.convert_workflows([entry[1] for entry in to_convert], priority)
+            for (index, _, file_info), outcome in zip(to_convert, outcomes):
+                result = {"index": index}
+                if file_info is not None:
+                    result["filename"] = file_info[0]
+                if outcome.get("success"):
+                    result["status"] = "success"
+                    result["workflow"] = outcome["workflow"]
+                    if file_info is not None:
+                        filename, st, content_hash = file_info
+                        await _traced_io("disk_cache", _put_disk_cache, filename, fingerprint,
+                                            st, content_hash, outcome["workflow"])
+                else:
+                    result["status"] = "error"
+                    result["message"] = outcome.get("error", "Unknown error")
+                results[index] = result
+
+        return _json_response({
+            "status": "success",
+            "message": "Batch processed",
+            "data": {"results": results}
+        })
+
+    except ValueError as e:
+        logger.error("Validation error: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": str(e)
+        }, status=400)
+    except OverloadedError as e:
+        return _overloaded_response(e)
+    except RuntimeError as e:
+        logger.error("Browser conversion error: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Workflow conversion failed",
+            "details": str(e)
+        }, status=503)
+    except Exception as e:
+        logger.error("Error processing batch: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Internal server error",
+            "details": str(e)
+        }, status=500)
+
+
+@server.routes.get("/cpe/workflow/list")
+@_instrumented
+@_compressible
+async def list_workflows(request):
+    """List workflows from the userdata/workflows directory, served from the catalog index"""
+    try:
+        query = request.query
+        with tracing.span("catalog"):
+            await catalog.start()
+
+        # The listing only depends on the catalog state and the query
+        etag = _make_etag("list", catalog.token, request.query_string)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+
+        # Nothing changed since the client's last listing
+        token = query.get("token")
+        if token and token == catalog.token:
+            return _json_response({
+                "status": "success",
+                "unchanged": True,
+                "token": token
+            })
+
+        try:
+            offset = int(query.get("offset", 0))
+            limit = int(query["limit"]) if "limit" in query else None
+        except ValueError:
+            raise ValueError("offset and limit must be integers")
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset and limit must not be negative")
+        order = query.get("order", "asc")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be asc or desc")
+
+        with tracing.span("catalog"):
+            listing = catalog.query(
+                prefix=query.get("prefix"),
+                folder=query.get("folder"),
+                sort=query.get("sort", "filename"),
+                descending=order == "desc",
+                offset=offset,
+                limit=limit,
+            )
+
+        return _json_response({
+            "status": "success",
+            "workflows": listing["workflows"],
+            "total": listing["total"],
+            "offset": offset,
+            "limit": limit,
+            "token": listing["token"]
+        }, headers=_cache_headers(_make_etag("list", listing["token"], request.query_string)))
+
+    except ValueError as e:
+        logger.error("Validation error: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": str(e)
+        }, status=400)
+    except Exception as e:
+        logger.error("Error listing workflows: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Internal server error",
+            "details": str(e)
+        }, status=500)
+
+
+@server.routes.post("/cpe/workflow/save")
+@_instrumented
+async def save_workflow(request):
+    """Save workflow to the userdata/workflows directory"""
+    try:
+        if _is_raw(request):
+            # The body is the workflow itself and is written byte for byte
+            workflow_bytes = await request.read()
+            workflow_name = request.query.get("name")
+            try:
+                await _traced_io("parse", jsonutil.loads, workflow_bytes)
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                raise ValueError("Invalid JSON in request body")
+        else:
+            data = await _read_json(request)
+            if not data or "workflow" not in data:
+                raise ValueError("workflow field is required")
+
+            workflow = data["workflow"]
+            workflow_name = data.get("name")
+            if isinstance(workflow, str):
+                # Workflow sent as a JSON string: validate it, then write it as is
+                try:
+                    await _traced_io("parse", jsonutil.loads, workflow)
+                except json.JSONDecodeError:
+                    raise ValueError("Invalid JSON in workflow field")
+                workflow_bytes = workflow.encode('utf-8')
+            else:
+                # Workflow sent as a native JSON object
+                workflow_bytes = await _traced_io("encode", jsonutil.dumps, workflow)
+
+        # Use the requested workflow name or generate one
+        if not workflow_name:
+            workflow_name = f"workflow_{int(time.time())}.json"
+        if not workflow_name.endswith('.json'):
+            workflow_name += '.json'
+
+        # Save workflow file (creating the directory if needed)
+        file_path = _resolve_workflow_path(workflow_name)
+        st, content_hash = await _traced_io(
+            "write", _write_workflow_file, file_path, workflow_name, workflow_bytes
+        )
+        file_hashes.put(workflow_name, st.st_mtime_ns, st.st_size, content_hash)
+
+        return _json_response({
+            "status": "success",
+            "message": "Workflow saved successfully",
+            "filename": workflow_name
+        })
+
+    except ValueError as e:
+        logger.error("Validation error: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": str(e)
+        }, status=400)
+    except Exception as e:
+        logger.error("Error saving workflow: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Internal server error",
+            "details": str(e)
+        }, status=500)
+
+
+@server.routes.get("/cpe/workflow/get")
+@_instrumented
+@_compressible
+async def get_workflow(request):
+    """Get a specific workflow by filename from the userdata/workflows directory"""
+    try:
+        # Get filename from query parameters
+        filename = request.query.get("filename")
+        if not filename:
+            raise ValueError("filename query parameter is required")
+
+        # Ensure the path is secure and within the workflows directory
+        file_path = _resolve_workflow_path(filename)
+
+        # Check if file exists
+        st = await _traced_io("stat", _stat_workflow, file_path)
+        if st is None:
+            return _json_response({
+                "status": "error",
+                "message": f"Workflow file not found: {filename}"
+            }, status=404)
+
+        # Raw and wrapped responses are different representations
+        variant = "file-raw" if _is_raw(request) else "file"
+
+        # Answer a revalidation without reading the file if its hash is known
+        content_hash = await _known_content_hash(filename, st)
+        etag = _make_etag(variant, content_hash) if content_hash is not None else None
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+
+        # Read workflow file
+        workflow_bytes, content_hash, st = await _traced_io("read", _read_workflow_file, file_path)
+        file_hashes.put(filename, st.st_mtime_ns, st.st_size, content_hash)
+        etag = _make_etag(variant, content_hash)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+
+        if variant == "file-raw":
+            # Pass the file through untouched instead of nesting it as a string
+            return web.Response(body=workflow_bytes, content_type="application/json",
+                                headers=_cache_headers(etag))
+
+        return _json_response({
+            "status": "success",
+            "filename": filename,
+            "workflow": workflow_bytes.decode('utf-8')
+        }, headers=_cache_headers(etag))
+
+    except ValueError as e:
+        logger.error("Validation error: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": str(e)
+        }, status=400)
+    except Exception as e:
+        logger.error("Error getting workflow: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Internal server error",
+            "details": str(e)
+        }, status=500)
+
+
+@server.routes.get("/cpe/workflow/get-and-convert")
+@_instrumented
+@_compressible
+async def get_and_convert_workflow(request):
+    """Get a workflow by filename and convert it using the headless browser."""
+    try:
+        # Get filename from query parameters
+        filename = request.query.get("filename")
+        if not filename:
+            raise ValueError("filename query parameter is required")
+        priority = _get_priority(request)
+
+        # Ensure the path is secure and within the workflows directory
+        file_path = _resolve_workflow_path(filename)
+
+        # Check if file exists
+        st = await _traced_io("stat", _stat_workflow, file_path)
+        if st is None:
+            return _json_response({
+                "status": "error",
+                "message": f"Workflow file not found: {filename}"
+            }, status=404)
+
+        manager = get_browser_manager()
+        fingerprint = await manager.get_node_fingerprint()
+
+        # The converted output only depends on the file content and the
+        # node registry, so a revalidation needs neither a read nor a conversion
+        content_hash = await _known_content_hash(filename, st)
+        etag = _make_etag("api", content_hash, fingerprint) if content_hash is not None else None
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+
+        # Serve from the persistent cache if the file is unchanged on disk
+        result = await _traced_io("disk_cache", disk_cache.get, filename, fingerprint, st.st_mtime_ns, st.st_size)
+        if result is not None:
+            return _json_response({
+                "status": "success",
+                "message": "Workflow converted successfully",
+                "filename": filename,
+                "data": {"workflow": result}
+            }, headers=_cache_headers(etag))
+
+        # Read workflow file
+        workflow_bytes, content_hash, st = await _traced_io("read", _read_workflow_file, file_path)
+        file_hashes.put(filename, st.st_mtime_ns, st.st_size, content_hash)
+        etag = _make_etag("api", content_hash, fingerprint)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+
+        # File was touched but its content is unchanged
+        result = await _traced_io(
+            "disk_cache", disk_cache.get, filename, fingerprint, st.st_mtime_ns, st.st_size, content_hash
+        )
+
+        if result is None:
+            # Parse workflow JSON
+            workflow_data = await _traced_io("parse", _parse_workflow, workflow_bytes)
+
+            # Convert using headless browser
+            with tracing.span("convert"):
+                result = await manager.convert_workflow(workflow_data, priority)
+
+        await _traced_io("disk_cache", _put_disk_cache, filename, fingerprint, st, content_hash, result)
+
+        return _json_response({
+            "status": "success",
+            "message": "Workflow converted successfully",
+            "filename": filename,
+            "data": {"workflow": result}
+        }, headers=_cache_headers(etag))
+
+    except ValueError as e:
+        logger.error("Validation error: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": str(e)
+        }, status=400)
+    except OverloadedError as e:
+        return _overloaded_response(e)
+    except RuntimeError as e:
+        logger.error("Browser conversion error: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Workflow conversion failed",
+            "details": str(e)
+        }, status=503)
+    except Exception as e:
+        logger.error("Error processing workflow: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Internal server error",
+            "details": str(e)
+        }, status=500)
+
+
+@server.routes.get("/cpe/health")
+@_instrumented
+async def health_check(request):
+    """Health check endpoint returning headless browser status."""
+    try:
+        manager = get_browser_manager()
+        if request.query.get("check_registry", "").lower() in ("1", "true", "yes"):
+            await manager.check_node_registry()
+        status_info = {
+            "status": manager.status.value,
+        }
+        if manager.status == BrowserStatus.INITIALIZING:
+            status_info.update(manager.init_progress())
+        if manager.warmup_state:
+            status_info["warmup"] = manager.warmup_state
+        if manager.error_message:
+            status_info["error"] = manager.error_message
+
+        return _json_response({
+            "status": "success",
+            "browser": status_info,
+            "conversion": manager.conversion_stats(),
+            "pool": manager.pool_stats(),
+            "shards": manager.shard_stats(),
+            "workers": manager.worker_stats(),
+            "recycling": manager.recycling_stats(),
+            "cache": manager.cache_stats(),
+            "templates": manager.template_stats(),
+            "registry": manager.registry_stats(),
+            "asset_cache": manager.asset_cache_stats(),
+            "blocking": manager.blocking_stats(),
+            "disk_cache": disk_cache.stats(),
+            "catalog": catalog.stats(),
+            "compression": compressor.stats() if compressor is not None else None,
+            "json_backend": jsonutil.backend(),
+        })
+    except Exception as e:
+        logger.error("Error in health check: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Internal server error",
+            "details": str(e)
+        }, status=500)
+
+
+@server.routes.get("/cpe/metrics")
+@_instrumented
+async def metrics_endpoint(request):
+    """Conversion pipeline metrics in the Prometheus text exposition format."""
+    try:
+        manager = get_browser_manager()
+        out = metrics.Exposition()
+
+        metrics.CONVERSION_PHASES.write(out)
+        metrics.HTTP_REQUESTS.write(out)
+        metrics.HTTP_DURATION.write(out)
+
+        out.family("cpe_browser_ready", "gauge", "Whether the headless browser is ready")
+        out.sample("cpe_browser_ready", manager.status == BrowserStatus.READY)
+
+        pool = manager.pool_stats() or {}
+        out.family("cpe_pool_pages", "gauge", "Pages in the page pool by state")
+        for state in ("idle", "busy", "creating"):
+            out.sample("cpe_pool_pages", pool.get(state, 0), {"state": state})
+        out.family("cpe_pool_waiting", "gauge", "Requests waiting for a page")
+        out.sample("cpe_pool_waiting", pool.get("waiting", 0))
+        out.family("cpe_pool_max_pages", "gauge", "Upper bound of the page pool")
+        out.sample("cpe_pool_max_pages", pool.get("max", 0))
+        out.family("cpe_pool_rejected_total", "counter", "Requests rejected by admission control")
+        for reason, count in sorted((pool.get("rejected") or {}).items()):
+            out.sample("cpe_pool_rejected_total", count, {"reason": reason})
+
+        counters = manager.conversion_stats()
+        for key, name, help_text in (
+            ("conversions", "cpe_browser_conversions_total", "Workflows converted in the browser"),
+            ("native_conversions", "cpe_native_conversions_total", "Workflows converted without the browser"),
+            ("coalesced", "cpe_coalesced_requests_total", "Conversions that joined an identical running one"),
+            ("reloads", "cpe_page_reloads_total", "Page reloads"),
+            ("snapshot_restores", "cpe_snapshot_restores_total", "In-place page state restores"),
+            ("retries", "cpe_conversion_retries_total", "Conversions retried after a failure"),
+            ("page_replacements", "cpe_page_replacements_total", "Broken pages replaced"),
+            ("page_recycles", "cpe_page_recycles_total", "Pages recycled for their conversion count or JS heap size"),
+            ("shard_failures", "cpe_shard_failures_total", "Browser shards taken out of service after a failure"),
+        ):
+            out.family(name, "counter", help_text)
+            out.sample(name, counters.get(key, 0))
+        shards = manager.shard_stats()
+        out.family("cpe_browser_restarts_total", "counter", "Browser starts after the first of each shard")
+        out.sample("cpe_browser_restarts_total", max(0, counters.get("browser_starts", 0) - len(shards)))
+        out.family("cpe_shard_ready", "gauge", "Whether each browser shard is serving conversions")
+        for shard in shards:
+            labels = {"shard": str(shard["index"])}
+            if "worker" in shard:
+                labels["worker"] = str(shard["worker"])
+            out.sample("cpe_shard_ready", shard["status"] == BrowserStatus.READY.value, labels)
+        workers = manager.worker_stats()
+        if workers is not None:
+            out.family("cpe_worker_ready", "gauge", "Whether each conversion worker process is serving conversions")
+            for worker in workers:
+                out.sample("cpe_worker_ready", worker["status"] == WORKER_READY, {"worker": str(worker["index"])})
+            out.family("cpe_worker_failures_total", "counter", "Conversion worker processes that exited or hung")
+            out.sample("cpe_worker_failures_total", sum(worker["failures"] for worker in workers))
+        out.family("cpe_node_registry_changes_total", "counter", "Node registry changes that invalidated conversions")
+        out.sample("cpe_node_registry_changes_total", manager.registry_stats()["changes"])
+
+        caches = {
+            "memory": manager.cache_stats(),
+            "disk": disk_cache.stats(),
+            "asset": manager.asset_cache_stats(),
+            "template": manager.template_stats(),
+        }
+        if compressor is not None:
+            caches["compression"] = compressor.stats()
+        for kind in ("hits", "misses"):
+            name = f"cpe_cache_{kind}_total"
+            out.family(name, "counter", f"Cache {kind} by cache")
+            for cache_name, stats in caches.items():
+                out.sample(name, stats.get(kind, 0), {"cache": cache_name})
+
+        return web.Response(body=out.text().encode("utf-8"),
+                            headers={"Content-Type": metrics.CONTENT_TYPE})
+    except Exception as e:
+        logger.error("Error in metrics endpoint: %s", str(e))
+        return _json_response({
+            "status": "error",
+            "message": "Internal server error",
+            "details": str(e)
+        }, status=500)
@@ -0,0 +1,206 @@
+import mimetypes
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from . import fileio
+from .logger import get_logger
+
+logger = get_logger()
+
+# Content types set explicitly, since mimetypes depends on the host
+# system (e.g. the Windows registry) and may get JavaScript wrong
+CONTENT_TYPES = {
+    ".js": "application/javascript",
+    ".mjs": "application/javascript",
+    ".css": "text/css",
+    ".html": "text/html",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".wasm": "application/wasm",
+    ".woff": "font/woff",
+    ".woff2": "font/woff2",
+}
+
+# URL prefix under which ComfyUI serves custom node web directories
+EXTENSIONS_PREFIX = "/extensions/"
+
+
+def _content_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in CONTENT_TYPES:
+        return CONTENT_TYPES[ext]
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def _read_if_changed(path: str, known: Optional[Tuple[int, int]]) -> Tuple[Tuple[int, int], Optional[bytes]]:
+    """Stat a file and read it unless its (mtime_ns, size) stamp equals known.
+
+    Raises:
+        OSError: If the file does not exist or cannot be read.
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    if stamp == known:
+        return stamp, None
+    with open(path, "rb") as f:
+        return stamp, f.read()
+
+
+def _join_inside(root: str, relpath: str) -> Optional[str]:
+    """Join relpath onto root, or return None if the result escapes root."""
+    path = os.path.normpath(os.path.join(root, relpath.replace("/", os.sep)))
+    if path != os.path.normpath(root) and not path.startswith(os.path.join(os.path.normpath(root), "")):
+        return None
+    return path
+
+
+class FrontendAssetCache:
+    """In-memory cache of the ComfyUI frontend's static files.
+
+    Installed as a Playwright route handler on every conversion page, it
+    serves the frontend bundle and custom node JS straight from the files
+    PromptServer would serve, so loading and reloading pages does not go
+    through the server's HTTP stack. Requests that do not map to a static
+    file (API calls, the websocket, generated content) are passed on to
+    the server unchanged.
+
+    Entries are checked against the file's mtime and size on every hit
+    and re-read when the file changed. The cache is bounded by the total
+    size of the cached files, evicting least recently used files first.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._base_url: Optional[str] = None
+        self._web_root: Optional[str] = None
+        self._extension_dirs: Dict[str, str] = {}
+        # File path -> ((mtime_ns, size), body, content type)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._passthrough = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    def configure(self, base_url: str, web_root: Optional[str], extension_dirs: Dict[str, str]) -> None:
+        """Set where assets are served from (call before installing the handler).
+
+        Args:
+            base_url: Origin of the ComfyUI server the pages load.
+            web_root: Directory of the frontend bundle, as served at "/".
+            extension_dirs: Web directories of custom node packages by name,
+                as served under /extensions/<name>/.
+        """
+        self._base_url = base_url.rstrip("/")
+        self._web_root = web_root
+        self._extension_dirs = dict(extension_dirs)
+
+    def resolve(self, url: str) -> Optional[str]:
+        """Map a request URL to the static file PromptServer serves for it, if any."""
+        if self._base_url is None or not url.startswith(self._base_url + "/"):
+            return None
+        path = unquote(urlsplit(url).path)
+
+        if path.startswith(EXTENSIONS_PREFIX):
+            name, _, rest = path[len(EXTENSIONS_PREFIX):].partition("/")
+            ext_dir = self._extension_dirs.get(name)
+            if ext_dir is not None:
+                return _join_inside(ext_dir, rest) if rest else None
+
+        if self._web_root is None:
+            return None
+        if path == "/":
+            path = "/index.html"
+        return _join_inside(self._web_root, path.lstrip("/"))
+
+    async def handle_route(self, route) -> None:
+        """Playwright route handler: fulfill static assets from the cache."""
+        request = route.request
+        file_path = None
+        if self.enabled and request.method == "GET":
+            file_path = self.resolve(request.url)
+        if file_path is None:
+            self._passthrough += 1
+            await route.fallback()
+            return
+
+        entry = self._entries.get(file_path)
+        known = entry[0] if entry is not None else None
+        try:
+            stamp, body = await fileio.run_io(_read_if_changed, file_path, known)
+        except OSError:
+            # Not a file on disk (e.g. an API route): let the server answer
+            self._passthrough += 1
+            await route.fallback()
+            return
+
+        if body is None:
+            self._entries.move_to_end(file_path)
+            self._hits += 1
+            body, content_type = entry[1], entry[2]
+        else:
+            if entry is not None:
+                self._invalidations += 1
+            self._misses += 1
+            content_type = _content_type(file_path)
+            self._store(file_path, stamp, body, content_type)
+
+        await route.fulfill(
+            status=200,
+            headers={"Content-Type": content_type, "Cache-Control": "no-cache"},
+            body=body,
+        )
+
+    def _store(self, file_path: str, stamp: Tuple[int, int], body: bytes, content_type: str) -> None:
+        old = self._entries.pop(file_path, None)
+        if old is not None:
+            self._bytes -= len(old[1])
+        if len(body) > self._max_bytes:
+            return
+
+        self._entries[file_path] = (stamp, body, content_type)
+        self._bytes += len(body)
+        while self._bytes > self._max_bytes:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def clear(self) -> None:
+        """Drop all cached files (counters are kept)."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "invalidations": self._invalidations,
+            "passthrough": self._passthrough,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def get_frontend_dirs() -> Tuple[Optional[str], Dict[str, str]]:
+    """Return ComfyUI's frontend web root and custom node web directories."""
+    web_root = None
+    try:
+        from server import PromptServer
+        web_root = getattr(PromptServer.instance, "web_root", None)
+    except ImportError:
+        pass
+
+    try:
+        import nodes
+        extension_dirs = dict(getattr(nodes, "EXTENSION_WEB_DIRS", {}))
+    except ImportError:
+        extension_dirs = {}
+    return web_root, extension_dirs
@@ -0,0 +1,84 @@
+"""Shared helpers for the benchmark scripts."""
+import json
+import os
+import sys
+import types
+from typing import Optional
+
+# Name under which the extension is imported by the benchmarks
+PACKAGE_NAME = "cpe"
+
+EXTENSION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_extension() -> str:
+    """Make the extension's modules importable as the "cpe" package.
+
+    The extension's __init__.py installs Playwright and expects to run
+    inside ComfyUI, so the package is registered without executing it.
+    Individual modules are then imported normally, e.g. cpe.fileio.
+
+    Returns:
+        The package name.
+    """
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [EXTENSION_DIR]
+        sys.modules[PACKAGE_NAME] = package
+    return PACKAGE_NAME
+
+
+def percentile(values, pct: float) -> float:
+    """Return the pct-th percentile of values (nearest rank), or 0.0 if empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def process_tree_rss(pid: Optional[int] = None) -> Optional[int]:
+    """Resident memory in bytes of a process and all its descendants.
+
+    Counts e.g. the Playwright driver and Chromium processes started by
+    this process. Pages shared between processes are counted in each of
+    them. Reads /proc, so it returns None where that is not available.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    pid = os.getpid() if pid is None else pid
+
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the command name, which may contain spaces: state, ppid, ...
+        ppid = int(stat[stat.rindex(b")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except OSError:
+            pass
+        pending.extend(children.get(current, ()))
+    return total
+
+
+def emit(report: dict, output: str = None) -> None:
+    """Print a JSON report and optionally write it to a file."""
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
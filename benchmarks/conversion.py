@@ -0,0 +1,183 @@
+"""Measure conversion latency, throughput and memory per page pool size.
+
+Starts a stand-in PromptServer (stub_comfyui.py) that serves a stub
+frontend with the real js/ extension, so the whole browser path (page
+pool, route interception, graphToPrompt) runs without ComfyUI. For each
+pool size a fresh HeadlessBrowserManager converts synthetic workflows,
+either by calling it directly or through POST /cpe/workflow/convert.
+Every workflow is distinct, so no conversion is served from the cache.
+
+Requires Playwright with Chromium installed, like the extension itself.
+
+    python benchmarks/conversion.py --pool-sizes 1,2,4 --nodes 200 --requests 400 --concurrency 16
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import shutil
+import tempfile
+import time
+
+import aiohttp
+
+from common import emit, load_extension, percentile, process_tree_rss
+from stub_comfyui import PromptServer, make_node_classes, make_workflow
+
+RSS_SAMPLE_INTERVAL = 0.25
+
+
+def _mb(value):
+    return None if value is None else round(value / (1024 * 1024), 1)
+
+
+async def _sample_rss(samples: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        rss = process_tree_rss()
+        if rss is not None:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), RSS_SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _run_pool_size(pool_size: int, args, server, browser) -> dict:
+    manager = browser.HeadlessBrowserManager(
+        min_pages=pool_size, max_pages=pool_size, reset_mode=args.reset_mode
+    )
+    # The routes convert through the singleton
+    browser._browser_manager = manager
+
+    rss_before = process_tree_rss()
+    started = time.perf_counter()
+    await manager.initialize()
+    startup = time.perf_counter() - started
+    rss_started = process_tree_rss()
+
+    session = aiohttp.ClientSession() if args.target == "route" else None
+
+    async def convert(workflow):
+        if session is None:
+            await manager.convert_workflow(workflow)
+            return
+        async with session.post(server.url + "/cpe/workflow/convert", json=workflow) as response:
+            await response.read()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+
+    latencies = []
+    errors = 0
+    indexes = iter(range(args.requests))
+
+    async def worker():
+        nonlocal errors
+        for index in indexes:
+            workflow = make_workflow(args.nodes, index)
+            request_started = time.perf_counter()
+            try:
+                await convert(workflow)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - request_started)
+
+    rss_samples: list = []
+    stop = asyncio.Event()
+    sampler = None
+    try:
+        # One conversion per page first, so every page has run the code once
+        await asyncio.gather(*[convert(make_workflow(args.nodes, -1 - i)) for i in range(pool_size)])
+
+        sampler = asyncio.ensure_future(_sample_rss(rss_samples, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - started
+    finally:
+        stop.set()
+        if sampler is not None:
+            await sampler
+        if session is not None:
+            await session.close()
+        stats = manager.conversion_stats()
+        await manager.shutdown()
+
+    return {
+        "pool_size": pool_size,
+        "startup_s": round(startup, 3),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "errors": errors,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies, default=0.0) * 1000, 2),
+        },
+        "rss_mb": {
+            "before_start": _mb(rss_before),
+            "after_start": _mb(rss_started),
+            "peak": _mb(max(rss_samples, default=None)),
+        },
+        "conversion": stats,
+    }
+
+
+async def _run(args, server, browser) -> list:
+    await server.start()
+    try:
+        return [await _run_pool_size(size, args, server, browser) for size in args.pool_sizes]
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pool-sizes", default="1,2,4",
+                        type=lambda value: [int(size) for size in value.split(",")],
+                        help="comma-separated page pool sizes to measure")
+    parser.add_argument("--nodes", type=int, default=50, help="nodes per workflow")
+    parser.add_argument("--requests", type=int, default=200, help="conversions per pool size")
+    parser.add_argument("--concurrency", type=int, default=8, help="conversions in flight")
+    parser.add_argument("--target", choices=("manager", "route"), default="manager",
+                        help="call HeadlessBrowserManager directly or POST /cpe/workflow/convert")
+    parser.add_argument("--reset-mode", choices=("reload", "snapshot"), default="reload")
+    parser.add_argument("--registry-size", type=int, default=500,
+                        help="filler node types registered besides the benchmark ones")
+    parser.add_argument("--native", action="store_true",
+                        help="let the native converter handle workflows instead of the browser")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="cpe-bench-")
+    os.environ["CPE_NATIVE_CONVERT"] = "1" if args.native else "0"
+    os.environ["CPE_PREWARM"] = "0"
+    os.environ["CPE_DISK_CACHE_DIR"] = tmp_dir
+
+    server = PromptServer(make_node_classes(args.registry_size))
+    server.install()
+    package = load_extension()
+    browser = importlib.import_module(package + ".browser")
+    # Registers the /cpe routes on the stand-in server
+    importlib.import_module(package + ".api.workflow")
+
+    try:
+        results = asyncio.run(_run(args, server, browser))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    emit({
+        "benchmark": "conversion",
+        "target": args.target,
+        "nodes": args.nodes,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "reset_mode": args.reset_mode,
+        "registry_size": args.registry_size,
+        "native": args.native,
+        "results": results,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
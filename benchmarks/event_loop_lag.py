@@ -0,0 +1,108 @@
+"""Measure event-loop lag while handlers read large workflow files.
+
+Runs the same workload twice: once reading and hashing files directly in
+the coroutine (as the routes used to), once through fileio.run_io (as they
+do now). A ticker task measures how late the loop wakes it up, which is
+the delay every other PromptServer client (e.g. websocket progress
+updates) would see.
+
+    python benchmarks/event_loop_lag.py --size-mb 50 --concurrency 8
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib
+import os
+import shutil
+import tempfile
+import time
+
+from common import emit, load_extension, percentile
+
+TICK_INTERVAL = 0.005
+
+
+def _read_and_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+async def _ticker(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - start - TICK_INTERVAL))
+
+
+async def _run(mode: str, paths: list, rounds: int, run_io) -> dict:
+    lags: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.ensure_future(_ticker(lags, stop))
+    await asyncio.sleep(TICK_INTERVAL * 2)
+
+    async def handler(path):
+        if mode == "blocking":
+            # Yield once first, like a handler awaiting request parsing
+            await asyncio.sleep(0)
+            return _read_and_hash(path)
+        return await run_io(_read_and_hash, path)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*[handler(path) for path in paths])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    return {
+        "mode": mode,
+        "elapsed_s": round(elapsed, 4),
+        "lag_ms": {
+            "p50": round(percentile(lags, 50) * 1000, 3),
+            "p99": round(percentile(lags, 99) * 1000, 3),
+            "max": round(max(lags, default=0.0) * 1000, 3),
+        },
+        "ticks": len(lags),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=20.0, help="size of each workflow file")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent reads per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    fileio = importlib.import_module(load_extension() + ".fileio")
+
+    tmp_dir = tempfile.mkdtemp(prefix="cpe-bench-")
+    try:
+        paths = []
+        block = os.urandom(1024 * 1024)
+        for i in range(args.concurrency):
+            path = os.path.join(tmp_dir, f"workflow_{i}.json")
+            with open(path, "wb") as f:
+                for _ in range(max(1, int(args.size_mb))):
+                    f.write(block)
+            paths.append(path)
+
+        results = [
+            asyncio.run(_run(mode, paths, args.rounds, fileio.run_io))
+            for mode in ("blocking", "executor")
+        ]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    emit({
+        "benchmark": "event_loop_lag",
+        "size_mb": args.size_mb,
+        "concurrency": args.concurrency,
+        "rounds": args.rounds,
+        "io_workers": fileio.get_executor()._max_workers,
+        "results": results,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
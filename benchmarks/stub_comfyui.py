@@ -0,0 +1,209 @@
+"""Stand-in for the parts of ComfyUI the extension talks to.
+
+PromptServer is an aiohttp application that serves the stub frontend in
+stub_frontend/ (a minimal LiteGraph and app module), the extension's JS
+under /extensions/, and /api/object_info for a synthetic node registry.
+install() registers it and the registry as the "server" and "nodes"
+modules, so the extension's modules import them as they would in ComfyUI.
+"""
+import json
+import os
+import socket
+import sys
+import types
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from common import EXTENSION_DIR
+
+STUB_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_frontend")
+
+# Name under which ComfyUI would serve the extension's web directory
+EXTENSION_NAME = "comfy-portal-endpoint"
+
+SAMPLERS = ["euler", "euler_ancestral", "dpmpp_2m", "dpmpp_sde", "ddim"]
+
+
+def _node_class(name: str, required: dict, return_types: tuple, output_node: bool = False) -> type:
+    return type(name, (), {
+        "INPUT_TYPES": classmethod(lambda cls: {"required": required}),
+        "RETURN_TYPES": return_types,
+        "FUNCTION": "run",
+        "CATEGORY": "benchmark",
+        "OUTPUT_NODE": output_node,
+    })
+
+
+def make_node_classes(registry_size: int) -> Dict[str, type]:
+    """Node classes of the synthetic registry.
+
+    BenchSource, BenchStep and BenchSink make up the benchmark workflows.
+    registry_size filler types are added so that /api/object_info and
+    node registration cost about as much as in a real install.
+    """
+    classes = {
+        "BenchSource": _node_class("BenchSource", {
+            "seed": ("INT", {"default": 0, "min": 0, "max": 2 ** 64 - 1}),
+            "width": ("INT", {"default": 512, "min": 16, "max": 8192}),
+            "sampler": (SAMPLERS,),
+        }, ("BENCH",)),
+        "BenchStep": _node_class("BenchStep", {
+            "x": ("BENCH",),
+            "strength": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 10.0, "step": 0.01}),
+            "steps": ("INT", {"default": 20, "min": 1, "max": 1000}),
+            "label": ("STRING", {"default": "", "multiline": True}),
+            "sampler": (SAMPLERS,),
+        }, ("BENCH",)),
+        "BenchSink": _node_class("BenchSink", {
+            "x": ("BENCH",),
+            "prefix": ("STRING", {"default": "bench"}),
+        }, (), output_node=True),
+    }
+    for i in range(registry_size):
+        name = f"BenchFiller{i:04d}"
+        classes[name] = _node_class(name, {
+            "value": ("FLOAT", {"default": 0.0}),
+            "mode": (["a", "b", "c"],),
+            "x": ("BENCH",),
+        }, ("BENCH",))
+    return classes
+
+
+def make_workflow(node_count: int, variant: int) -> dict:
+    """A UI-format workflow: a BenchSource, a chain of BenchSteps and a BenchSink.
+
+    Workflows with different variants differ in the source's seed, so
+    they do not share a conversion cache entry.
+    """
+    node_count = max(2, node_count)
+    nodes = []
+    links = []
+    for node_id in range(1, node_count + 1):
+        node = {
+            "id": node_id, "pos": [node_id * 350, 0], "size": [315, 130],
+            "flags": {}, "order": node_id - 1, "mode": 0, "properties": {},
+            "inputs": [], "outputs": [],
+        }
+        if node_id > 1:
+            node["inputs"] = [{"name": "x", "type": "BENCH", "link": node_id - 1}]
+            links.append([node_id - 1, node_id - 1, 0, node_id, 0, "BENCH"])
+        if node_id < node_count:
+            node["outputs"] = [{"name": "BENCH", "type": "BENCH", "links": [node_id], "slot_index": 0}]
+
+        if node_id == 1:
+            node["type"] = "BenchSource"
+            node["widgets_values"] = [variant, "fixed", 512, SAMPLERS[0]]
+        elif node_id == node_count:
+            node["type"] = "BenchSink"
+            node["widgets_values"] = ["bench"]
+        else:
+            node["type"] = "BenchStep"
+            node["widgets_values"] = [
+                round(0.01 * (node_id % 100), 2), 20 + node_id % 10,
+                f"step {node_id}", SAMPLERS[node_id % len(SAMPLERS)],
+            ]
+        nodes.append(node)
+
+    return {
+        "last_node_id": node_count,
+        "last_link_id": node_count - 1,
+        "nodes": nodes,
+        "links": links,
+        "groups": [],
+        "config": {},
+        "extra": {},
+        "version": 0.4,
+    }
+
+
+def _object_info(name: str, node_class: type) -> dict:
+    return_types = list(node_class.RETURN_TYPES)
+    return {
+        "input": node_class.INPUT_TYPES(),
+        "output": return_types,
+        "output_is_list": [False] * len(return_types),
+        "output_name": return_types,
+        "name": name,
+        "display_name": name,
+        "description": "",
+        "category": node_class.CATEGORY,
+        "output_node": node_class.OUTPUT_NODE,
+    }
+
+
+class PromptServer:
+    """Stand-in for ComfyUI's server.PromptServer.
+
+    Routes registered on routes (e.g. by importing the extension's api
+    modules) are added to the application in start(), like ComfyUI does.
+    """
+
+    instance: Optional["PromptServer"] = None
+
+    def __init__(self, node_classes: Dict[str, type], address: str = "127.0.0.1"):
+        self.app = web.Application()
+        self.routes = web.RouteTableDef()
+        self.address = address
+        self.port: Optional[int] = None
+        self.web_root = STUB_FRONTEND_DIR
+        self.node_classes = node_classes
+        self.extension_dirs = {EXTENSION_NAME: os.path.join(EXTENSION_DIR, "js")}
+        self._object_info = json.dumps({
+            name: _object_info(name, node_class) for name, node_class in node_classes.items()
+        })
+        self._runner: Optional[web.AppRunner] = None
+        PromptServer.instance = self
+
+        self.app.router.add_get("/", self._index)
+        self.app.router.add_get("/api/object_info", self._get_object_info)
+        self.app.router.add_get("/api/extensions", self._get_extensions)
+
+    def install(self) -> None:
+        """Register this server and its node registry as the "server" and "nodes" modules."""
+        server_module = types.ModuleType("server")
+        server_module.PromptServer = PromptServer
+        sys.modules["server"] = server_module
+
+        nodes_module = types.ModuleType("nodes")
+        nodes_module.NODE_CLASS_MAPPINGS = dict(self.node_classes)
+        nodes_module.NODE_DISPLAY_NAME_MAPPINGS = {name: name for name in self.node_classes}
+        nodes_module.EXTENSION_WEB_DIRS = dict(self.extension_dirs)
+        sys.modules["nodes"] = nodes_module
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.address}:{self.port}"
+
+    async def start(self) -> None:
+        """Add the registered routes and static files, then listen on a free port."""
+        self.app.add_routes(self.routes)
+        for name, directory in self.extension_dirs.items():
+            self.app.router.add_static(f"/extensions/{name}", directory)
+        self.app.router.add_static("/", self.web_root)
+
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind((self.address, 0))
+        self.port = sock.getsockname()[1]
+        await web.SockSite(self._runner, sock).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _index(self, request):
+        return web.FileResponse(os.path.join(self.web_root, "index.html"))
+
+    async def _get_object_info(self, request):
+        return web.Response(text=self._object_info, content_type="application/json")
+
+    async def _get_extensions(self, request):
+        urls = []
+        for name, directory in self.extension_dirs.items():
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith(".js"):
+                    urls.append(f"/extensions/{name}/{filename}")
+        return web.json_response(urls)
@@ -0,0 +1,148 @@
+// Stand-in for LiteGraph, used by the benchmarks. It implements only what
+// graphToPrompt in js/utils.js and the page scripts in browser.py use:
+// configuring a graph from a workflow, execution order, input resolution
+// and serialization.
+(() => {
+  const LiteGraph = {
+    registered_node_types: {},
+
+    registerNodeType(type, ctor) {
+      ctor.type = type
+      this.registered_node_types[type] = ctor
+    },
+
+    createNode(type) {
+      const ctor = this.registered_node_types[type]
+      const node = ctor ? new ctor() : new LGraphNode(type)
+      node.type = type
+      if (!node.comfyClass) node.comfyClass = type
+      return node
+    }
+  }
+
+  class LGraphNode {
+    constructor(title) {
+      this.title = title
+      this.mode = 0
+      this.inputs = []
+      this.outputs = []
+      this.widgets = []
+    }
+
+    addInput(name, type) {
+      this.inputs.push({ name, type, link: null })
+    }
+
+    addOutput(name, type) {
+      this.outputs.push({ name, type, links: null })
+    }
+
+    addWidget(name, value, options = {}) {
+      const widget = { name, value, options }
+      this.widgets.push(widget)
+      return widget
+    }
+
+    configure(info) {
+      this.id = info.id
+      this.mode = info.mode ?? 0
+      if (info.title) this.title = info.title
+      if (info.inputs) this.inputs = info.inputs.map((slot) => ({ ...slot }))
+      if (info.outputs) this.outputs = info.outputs.map((slot) => ({ ...slot }))
+      if (Array.isArray(info.widgets_values)) {
+        info.widgets_values.forEach((value, i) => {
+          if (this.widgets[i]) this.widgets[i].value = value
+        })
+      }
+    }
+
+    resolveInput(slot) {
+      const linkId = this.inputs[slot]?.link
+      if (linkId == null) return null
+      const link = this.graph.links[linkId]
+      if (!link || !this.graph.getNodeById(link.origin_id)) return null
+      return { origin_id: link.origin_id, origin_slot: link.origin_slot }
+    }
+
+    serialize() {
+      return {
+        id: this.id,
+        type: this.type,
+        title: this.title,
+        mode: this.mode,
+        inputs: this.inputs.map((slot) => ({ ...slot })),
+        outputs: this.outputs.map((slot) => ({ ...slot })),
+        widgets_values: this.widgets.map((widget) => widget.value)
+      }
+    }
+  }
+
+  class LGraph {
+    constructor() {
+      this._nodes = []
+      this._nodes_by_id = {}
+      this.links = {}
+    }
+
+    configure(data) {
+      this._nodes = []
+      this._nodes_by_id = {}
+      this.links = {}
+      for (const link of data.links ?? []) {
+        const [id, origin_id, origin_slot, target_id, target_slot, type] = Array.isArray(link)
+          ? link
+          : [link.id, link.origin_id, link.origin_slot, link.target_id, link.target_slot, link.type]
+        this.links[id] = { id, origin_id, origin_slot, target_id, target_slot, type }
+      }
+      for (const info of data.nodes ?? []) {
+        const node = LiteGraph.createNode(info.type)
+        node.graph = this
+        node.configure(info)
+        this._nodes.push(node)
+        this._nodes_by_id[node.id] = node
+      }
+    }
+
+    getNodeById(id) {
+      return this._nodes_by_id[id] ?? null
+    }
+
+    computeExecutionOrder() {
+      // Kahn's algorithm over the links; nodes left in cycles go last
+      const indegree = new Map(this._nodes.map((node) => [node.id, 0]))
+      const outgoing = new Map()
+      for (const link of Object.values(this.links)) {
+        if (!indegree.has(link.origin_id) || !indegree.has(link.target_id)) continue
+        indegree.set(link.target_id, indegree.get(link.target_id) + 1)
+        if (!outgoing.has(link.origin_id)) outgoing.set(link.origin_id, [])
+        outgoing.get(link.origin_id).push(link.target_id)
+      }
+
+      const order = this._nodes.filter((node) => indegree.get(node.id) === 0)
+      for (let i = 0; i < order.length; i++) {
+        for (const id of outgoing.get(order[i].id) ?? []) {
+          indegree.set(id, indegree.get(id) - 1)
+          if (indegree.get(id) === 0) order.push(this._nodes_by_id[id])
+        }
+      }
+      const ordered = new Set(order)
+      for (const node of this._nodes) {
+        if (!ordered.has(node)) order.push(node)
+      }
+      return order
+    }
+
+    serialize() {
+      return {
+        nodes: this._nodes.map((node) => node.serialize()),
+        links: Object.values(this.links).map((link) => [
+          link.id, link.origin_id, link.origin_slot, link.target_id, link.target_slot, link.type
+        ])
+      }
+    }
+  }
+
+  window.LiteGraph = LiteGraph
+  window.LGraphNode = LGraphNode
+  window.LGraph = LGraph
+})()
@@ -0,0 +1,79 @@
+// Stand-in for the ComfyUI frontend's app module, used by the benchmarks.
+// It registers a LiteGraph node type per entry of /api/object_info, with
+// widgets laid out the way the real frontend creates them, and then
+// imports the extension scripts listed by /api/extensions.
+
+const WIDGET_TYPES = ["INT", "FLOAT", "STRING", "BOOLEAN"]
+const SEED_WIDGET_NAMES = ["seed", "noise_seed"]
+const CONTROL_VALUES = ["fixed", "increment", "decrement", "randomize"]
+
+function defaultValue(type) {
+  switch (type) {
+    case "INT":
+    case "FLOAT":
+      return 0
+    case "BOOLEAN":
+      return false
+    default:
+      return ""
+  }
+}
+
+function registerComfyNode(name, def) {
+  const specs = []
+  for (const section of ["required", "optional"]) {
+    for (const [inputName, spec] of Object.entries(def.input?.[section] ?? {})) {
+      specs.push([inputName, spec])
+    }
+  }
+
+  class ComfyNode extends LGraphNode {
+    constructor(title) {
+      super(title ?? def.display_name ?? name)
+      this.comfyClass = name
+      for (const [inputName, [type, options = {}]] of specs) {
+        if (Array.isArray(type)) {
+          this.addWidget(inputName, options.default ?? type[0], { values: type })
+        } else if (WIDGET_TYPES.includes(type) && !options.forceInput) {
+          this.addWidget(inputName, options.default ?? defaultValue(type), options)
+          if (
+            options.control_after_generate ||
+            (type === "INT" && SEED_WIDGET_NAMES.includes(inputName))
+          ) {
+            // Not part of the prompt, but stored in widgets_values
+            this.addWidget("control_after_generate", "fixed", {
+              values: CONTROL_VALUES,
+              serialize: false
+            })
+          }
+        } else {
+          this.addInput(inputName, type)
+        }
+      }
+      ;(def.output ?? []).forEach((type, i) => {
+        this.addOutput(def.output_name?.[i] ?? type, type)
+      })
+    }
+  }
+
+  LiteGraph.registerNodeType(name, ComfyNode)
+}
+
+export const app = {
+  extensions: [],
+
+  registerExtension(extension) {
+    this.extensions.push(extension)
+  },
+
+  async setup() {
+    const defs = await (await fetch("/api/object_info")).json()
+    for (const [name, def] of Object.entries(defs)) {
+      registerComfyNode(name, def)
+    }
+    const urls = await (await fetch("/api/extensions")).json()
+    for (const url of urls) {
+      await import(url)
+    }
+  }
+}
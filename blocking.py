@@ -0,0 +1,112 @@
+import re
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from .logger import get_logger
+
+logger = get_logger()
+
+# Categories of requests that graphToPrompt does not need. Each maps to
+# (resource types, same-origin URL path prefixes, response): a response of
+# None aborts the request, otherwise (status, JSON body) is returned.
+CATEGORIES = {
+    "images": (frozenset({"image", "media"}), ("/view", "/api/view"), None),
+    "fonts": (frozenset({"font"}), (), None),
+    "queue": (frozenset(), ("/queue", "/api/queue"), (200, '{"queue_running": [], "queue_pending": []}')),
+    "history": (frozenset(), ("/history", "/api/history"), (200, "{}")),
+    "settings": (frozenset(), ("/settings", "/api/settings"), (200, "{}")),
+    "templates": (frozenset(), ("/templates/", "/api/workflow_templates"), None),
+    "userdata": (frozenset(), ("/userdata", "/api/userdata"), (404, "{}")),
+}
+
+# Categories let through unless the allowlist is configured. The frontend
+# expects a list from /templates/index.json and an object from
+# /api/workflow_templates; neither shape has been checked to reach app
+# ready when aborted, so templates are only blocked on request.
+DEFAULT_ALLOW = ("templates",)
+
+# The /ws status websocket is kept open but never connected to the server
+WEBSOCKET = "websocket"
+_WEBSOCKET_URL = re.compile(r"/ws(\?.*)?$")
+
+
+class BlockingProfile:
+    """Aborts or stubs requests of conversion pages that conversion does not need.
+
+    Installed as a Playwright route handler on every page context. A
+    request matching a category that is not allowed is aborted, or
+    answered with a small stub response where the frontend expects one to
+    keep working. Everything else falls through to the next handler (the
+    frontend asset cache) or the server. Blocked requests are counted per
+    category.
+    """
+
+    def __init__(self, allow: Iterable[str] = ()):
+        allow = set(allow)
+        unknown = allow - set(CATEGORIES) - {WEBSOCKET}
+        if unknown:
+            logger.warning("Unknown request categories in allowlist: %s", ", ".join(sorted(unknown)))
+        self._blocked_categories = {
+            name: spec for name, spec in CATEGORIES.items() if name not in allow
+        }
+        self._block_websocket = WEBSOCKET not in allow
+        self._base_url: Optional[str] = None
+        self._blocked: Dict[str, int] = {name: 0 for name in list(CATEGORIES) + [WEBSOCKET]}
+        self._allowed = 0
+
+    def configure(self, base_url: str) -> None:
+        """Set the origin of the ComfyUI server the pages load."""
+        self._base_url = base_url.rstrip("/")
+
+    def classify(self, url: str, resource_type: str) -> Optional[str]:
+        """Return the blocked category a request falls into, or None."""
+        path = None
+        if self._base_url is not None and url.startswith(self._base_url + "/"):
+            path = urlsplit(url).path
+        for name, (resource_types, prefixes, _) in self._blocked_categories.items():
+            if resource_type in resource_types:
+                return name
+            if path is not None and path.startswith(prefixes):
+                return name
+        return None
+
+    async def install(self, context) -> None:
+        """Install the route handlers on a browser context."""
+        await context.route("**/*", self.handle_route)
+        if self._block_websocket:
+            if hasattr(context, "route_web_socket"):
+                await context.route_web_socket(_WEBSOCKET_URL, self._handle_websocket)
+            else:
+                logger.debug("Playwright cannot route websockets, /ws is not blocked")
+
+    async def handle_route(self, route) -> None:
+        """Playwright route handler: abort or stub requests of blocked categories."""
+        request = route.request
+        category = self.classify(request.url, request.resource_type)
+        if category is None:
+            self._allowed += 1
+            await route.fallback()
+            return
+
+        self._blocked[category] += 1
+        response = self._blocked_categories[category][2]
+        if response is None:
+            await route.abort("blockedbyclient")
+        else:
+            status, body = response
+            await route.fulfill(status=status, content_type="application/json", body=body)
+
+    async def _handle_websocket(self, ws) -> None:
+        # Not connecting to the server leaves the socket open but silent
+        self._blocked[WEBSOCKET] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "blocked": dict(self._blocked),
+            "blocked_total": sum(self._blocked.values()),
+            "allowed": self._allowed,
+            "allowlist": sorted(
+                set(CATEGORIES) - set(self._blocked_categories)
+                | (set() if self._block_websocket else {WEBSOCKET})
+            ),
+        }
@@ -3,14 +3,216 @@ import atexit
 import enum
 import os
 import signal
-from typing import Optional, Any, List
-
+import time
+from typing import Optional, Any, Dict, List, Set, Tuple
+from urllib.parse import urlsplit
+
+from . import config, fileio
+from .assets import FrontendAssetCache, get_frontend_dirs
+from .blocking import DEFAULT_ALLOW, BlockingProfile
+from .cache import ConversionCache, workflow_cache_key
+from .converter import NativeConverter, UnsupportedWorkflowError
 from .logger import get_logger
+from .metrics import CONVERSION_PHASES
+from .tracing import span, start_background
+from .pool import PRIORITY_INTERACTIVE, SCALING_HISTORY, OverloadedError, PagePool
+from .registry import node_registry_signature, read_node_registry
+from .templates import ConversionTemplates
+from .worker import WorkerPool
 
 logger = get_logger()
 
-# Default number of pages in the pool
-DEFAULT_POOL_SIZE = 2
+# Default bounds of the elastic page pool
+DEFAULT_POOL_MIN = 1
+DEFAULT_POOL_MAX = 4
+# Add a page when this many requests are waiting for one...
+DEFAULT_POOL_SCALE_UP_QUEUE = 2
+# ...or when a request has waited this long (seconds)
+DEFAULT_POOL_SCALE_UP_WAIT = 1.0
+# Close pages above the minimum after this long without use (seconds)
+DEFAULT_POOL_IDLE_TIMEOUT = 300.0
+# Admission control: requests allowed to wait for a page (0 unbounded)...
+DEFAULT_POOL_MAX_QUEUE = 64
+# ...and how long each may wait before it is rejected (seconds, 0 forever)
+DEFAULT_POOL_QUEUE_TIMEOUT = 30.0
+# Serve a lower priority request first once it has waited this long (seconds)
+DEFAULT_POOL_STARVATION_AFTER = 5.0
+
+# Independent browser instances, each with its own driver and page pool
+DEFAULT_BROWSER_SHARDS = 1
+# Worker processes that run the browsers outside ComfyUI (0 runs them in-process)
+DEFAULT_WORKERS = 0
+# Delay before restarting a failed shard, doubled after each failed attempt (seconds)
+SHARD_RESTART_DELAY = 1.0
+SHARD_RESTART_MAX_DELAY = 60.0
+
+# Chromium flags for a small memory footprint
+_BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--no-first-run",
+    "--mute-audio",
+]
+
+# How long the background warm-up waits for PromptServer to accept connections
+WARMUP_SERVER_TIMEOUT = 300.0
+
+# Small built-in workflow (core nodes only) converted once on every page
+# during warm-up, so the conversion code paths are JIT-compiled up front
+_WARMUP_WORKFLOW = {
+    "last_node_id": 2,
+    "last_link_id": 1,
+    "nodes": [
+        {
+            "id": 1, "type": "EmptyLatentImage", "pos": [0, 0], "size": [315, 106],
+            "flags": {}, "order": 0, "mode": 0, "inputs": [],
+            "outputs": [{"name": "LATENT", "type": "LATENT", "links": [1], "slot_index": 0}],
+            "properties": {}, "widgets_values": [512, 512, 1],
+        },
+        {
+            "id": 2, "type": "LatentUpscaleBy", "pos": [400, 0], "size": [315, 82],
+            "flags": {}, "order": 1, "mode": 0,
+            "inputs": [{"name": "samples", "type": "LATENT", "link": 1}],
+            "outputs": [{"name": "LATENT", "type": "LATENT", "links": None}],
+            "properties": {}, "widgets_values": ["nearest-exact", 1.5],
+        },
+    ],
+    "links": [[1, 1, 0, 2, 0, "LATENT"]],
+    "groups": [],
+    "config": {},
+    "extra": {},
+    "version": 0.4,
+}
+
+# Default maximum number of workflows accepted by convert_workflows()
+DEFAULT_BATCH_MAX_ITEMS = 100
+
+# Default bounds of the in-memory conversion cache
+DEFAULT_CACHE_ENTRIES = 256
+DEFAULT_CACHE_MAX_MB = 64
+
+# Seconds between checks of the node registry for changes (0 checks only on demand)
+DEFAULT_REGISTRY_CHECK_INTERVAL = 30.0
+
+# Topologies whose widget mapping is kept for the widget fast path
+DEFAULT_TEMPLATE_ENTRIES = 128
+
+# Default size cap of the in-memory frontend asset cache
+DEFAULT_ASSET_CACHE_MAX_MB = 64
+
+# How pages are reset between conversions:
+#   "reload"   - reload the whole frontend before every conversion (default)
+#   "snapshot" - restore a snapshot of the clean LiteGraph state, reloading
+#                only on detected contamination or after max reuses
+RESET_MODE_RELOAD = "reload"
+RESET_MODE_SNAPSHOT = "snapshot"
+DEFAULT_RESET_MODE = RESET_MODE_RELOAD
+DEFAULT_MAX_PAGE_REUSES = 50
+
+# Pages are recycled (replaced by a fresh one in the background) after this
+# many conversions or once their JS heap exceeds this size (0 disables each)
+DEFAULT_PAGE_MAX_CONVERSIONS = 500
+DEFAULT_PAGE_MAX_HEAP_MB = 512
+# Conversions between two JS heap measurements of a page
+HEAP_CHECK_EVERY = 10
+# Seconds before a failed recycle of a page is attempted again
+RECYCLE_RETRY_INTERVAL = 60.0
+
+# Records the clean frontend state of a freshly loaded page and installs
+# window.__cpe_restoreSnapshot(), which puts LiteGraph globals back to that
+# state. It returns true on success or a string describing contamination
+# that cannot be undone in place (the page must then be reloaded).
+_TAKE_SNAPSHOT_SCRIPT = """() => {
+    const saveProps = (obj) => {
+        const props = new Map();
+        if (!obj) return props;
+        for (const name of Object.getOwnPropertyNames(obj)) {
+            props.set(name, Object.getOwnPropertyDescriptor(obj, name));
+        }
+        return props;
+    };
+    const restoreProps = (obj, saved) => {
+        if (!obj) return;
+        for (const name of Object.getOwnPropertyNames(obj)) {
+            if (!saved.has(name)) delete obj[name];
+        }
+        for (const [name, desc] of saved) {
+            const current = Object.getOwnPropertyDescriptor(obj, name);
+            if (!current || current.value !== desc.value
+                    || current.get !== desc.get || current.set !== desc.set) {
+                Object.defineProperty(obj, name, desc);
+            }
+        }
+    };
+    const appNodeCount = () => window.app?.graph?._nodes?.length ?? null;
+
+    const snapshot = {
+        nodeTypes: Object.assign({}, LiteGraph.registered_node_types),
+        graphProto: saveProps(window.LGraph?.prototype),
+        nodeProto: saveProps(window.LGraphNode?.prototype),
+        appNodeCount: appNodeCount(),
+    };
+
+    window.__cpe_restoreSnapshot = () => {
+        const types = LiteGraph.registered_node_types;
+        for (const name in snapshot.nodeTypes) {
+            if (types[name] !== snapshot.nodeTypes[name]) {
+                return `node type ${name} was replaced`;
+            }
+        }
+        if (appNodeCount() !== snapshot.appNodeCount) {
+            return "app graph was modified";
+        }
+        for (const name of Object.keys(types)) {
+            if (!(name in snapshot.nodeTypes)) delete types[name];
+        }
+        restoreProps(window.LGraph?.prototype, snapshot.graphProto);
+        restoreProps(window.LGraphNode?.prototype, snapshot.nodeProto);
+        for (const key of Object.keys(window)) {
+            if (!snapshot.windowKeys.has(key) && !delete window[key]) {
+                return `global ${key} could not be removed`;
+            }
+        }
+        return true;
+    };
+
+    snapshot.windowKeys = new Set(Object.keys(window));
+    return true;
+}"""
+
+# Converts a list of workflows, each on its own isolated LGraph, in a single
+# round-trip. The snapshot is restored before every item except the first
+# one after a reload (and before that one too when restore=true). If a
+# restore fails, conversion stops and the results so far are returned with
+# contaminated=true so the caller can reload and convert the rest.
+_CONVERT_BATCH_SCRIPT = """async ({ workflows, restore }) => {
+    const results = [];
+    let restores = 0;
+    for (let i = 0; i < workflows.length; i++) {
+        if ((restore || i > 0) && window.__cpe_restoreSnapshot) {
+            const restored = window.__cpe_restoreSnapshot();
+            if (restored !== true) {
+                return { results, restores, contaminated: true, error: restored };
+            }
+            restores++;
+        }
+        try {
+            const graph = new window.LGraph();
+            graph.configure(workflows[i], false);
+            const parsed = await window.__cpe_graphToPrompt(graph);
+            results.push({ success: true, workflow: parsed.output });
+        } catch (e) {
+            results.push({ success: false, error: e.message || String(e) });
+        }
+    }
+    return { results, restores, contaminated: false };
+}"""
 
 
 class BrowserStatus(enum.Enum):
@@ -21,24 +223,221 @@ class BrowserStatus(enum.Enum):
     ERROR = "error"
 
 
+def _merge_pool_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the stats of several page pools into totals of the same shape."""
+    merged = dict(stats[0])
+    for key in ("size", "idle", "busy", "retiring", "creating", "waiting", "min", "max", "max_waiting"):
+        merged[key] = sum(pool[key] for pool in stats)
+
+    rejected: Dict[str, int] = {}
+    for pool in stats:
+        for reason, count in pool["rejected"].items():
+            rejected[reason] = rejected.get(reason, 0) + count
+    merged["rejected"] = rejected
+
+    service_times = [pool["service_time_s"] for pool in stats if pool["service_time_s"] is not None]
+    merged["service_time_s"] = (
+        round(sum(service_times) / len(service_times), 4) if service_times else None
+    )
+
+    classes = {}
+    for priority in stats[0]["classes"]:
+        per_pool = [pool["classes"][priority] for pool in stats]
+        served = sum(entry["served"] for entry in per_pool)
+        classes[priority] = {
+            "waiting": sum(entry["waiting"] for entry in per_pool),
+            "served": served,
+            "avg_wait_s": round(
+                sum(entry["avg_wait_s"] * entry["served"] for entry in per_pool) / served, 4
+            ) if served else 0.0,
+            "max_wait_s": max(entry["max_wait_s"] for entry in per_pool),
+            "starved": sum(entry["starved"] for entry in per_pool),
+        }
+    merged["classes"] = classes
+
+    events = sorted((event for pool in stats for event in pool["recent_scaling"]), key=lambda e: e["time"])
+    merged["recent_scaling"] = events[-SCALING_HISTORY:]
+    return merged
+
+
+class BrowserShard:
+    """One Chromium instance with its own Playwright driver and page pool.
+
+    The manager runs one or more shards and dispatches each conversion to
+    the least loaded one, so a single driver connection or browser process
+    does not bound throughput, and a crashed browser only takes its own
+    pages out of service.
+    """
+
+    def __init__(self, index: int):
+        self.index = index
+        self.status: BrowserStatus = BrowserStatus.NOT_INITIALIZED
+        self.error_message: Optional[str] = None
+        self.playwright = None
+        self.browser = None
+        self.driver_pid: Optional[int] = None
+        self.contexts: List = []
+        self.page_pool: Optional[PagePool] = None
+        self.starts = 0
+        self.failures = 0
+        self.restart_task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == BrowserStatus.READY and self.page_pool is not None
+
+    @property
+    def restarting(self) -> bool:
+        return self.restart_task is not None and not self.restart_task.done()
+
+    def load(self) -> float:
+        """Busy pages and waiting requests per page the pool may grow to."""
+        pool = self.page_pool
+        return (pool.busy + pool.waiting) / pool.max_size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "status": self.status.value,
+            "error": self.error_message,
+            "starts": self.starts,
+            "failures": self.failures,
+            "restarting": self.restarting,
+            "pool": self.page_pool.stats() if self.page_pool is not None else None,
+        }
+
+
 class HeadlessBrowserManager:
-    """Manages a headless Chromium browser with a page pool for workflow conversion.
+    """Manages headless Chromium browsers with page pools for workflow conversion.
 
     Uses Playwright to load the ComfyUI frontend in a headless browser,
     then calls the graphToPrompt JS function via page.evaluate().
     A pool of pages allows concurrent conversions without blocking.
+    With several shards, each runs its own browser and pool; a shard that
+    fails is restarted in the background while the others keep serving.
+    With workers, the shards run in separate processes (see worker.py)
+    and this manager only caches, converts natively and forwards.
     """
 
-    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+    def __init__(
+        self,
+        min_pages: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        cache_entries: Optional[int] = None,
+        cache_max_bytes: Optional[int] = None,
+        reset_mode: Optional[str] = None,
+        max_page_reuses: Optional[int] = None,
+        max_page_conversions: Optional[int] = None,
+        max_page_heap_bytes: Optional[int] = None,
+        shards: Optional[int] = None,
+        workers: Optional[int] = None,
+    ):
         self._status: BrowserStatus = BrowserStatus.NOT_INITIALIZED
         self._error_message: Optional[str] = None
-        self._playwright = None
-        self._browser = None
-        self._driver_pid: Optional[int] = None
-        self._contexts: List = []
-        self._page_pool: asyncio.Queue = None
-        self._pool_size = pool_size
+        if shards is None:
+            shards = config.get_int("BROWSER_SHARDS", DEFAULT_BROWSER_SHARDS)
+        self._shards = [BrowserShard(index) for index in range(max(1, shards))]
+        # Shard each open page belongs to
+        self._page_shards: Dict[Any, BrowserShard] = {}
+        if workers is None:
+            workers = config.get_int("WORKERS", DEFAULT_WORKERS)
+        self._workers: Optional[WorkerPool] = WorkerPool(workers) if workers > 0 else None
+        # ComfyUI to load pages from when not running inside it (URL, web root, extension dirs)
+        self._frontend: Optional[Tuple[str, Optional[str], Dict[str, str]]] = None
+        if min_pages is None:
+            min_pages = config.get_int("POOL_MIN", DEFAULT_POOL_MIN)
+        if max_pages is None:
+            max_pages = config.get_int("POOL_MAX", DEFAULT_POOL_MAX)
+        self._min_pages = max(1, min_pages)
+        self._max_pages = max(self._min_pages, max_pages)
         self._init_lock: Optional[asyncio.Lock] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._warmup_state: Optional[str] = None
+
+        # Content-addressed cache of converted workflows
+        if cache_entries is None:
+            cache_entries = config.get_int("CACHE_MAX_ENTRIES", DEFAULT_CACHE_ENTRIES)
+        if cache_max_bytes is None:
+            cache_max_bytes = config.get_int("CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB) * 1024 * 1024
+        self._cache = ConversionCache(cache_entries, cache_max_bytes)
+        self._node_fingerprint: Optional[str] = None
+        self._fingerprint_task: Optional[asyncio.Task] = None
+        # Node registry watch: signature the fingerprint was computed for,
+        # and how often it changed
+        self._registry_signature: Optional[Tuple] = None
+        self._registry_check_interval = config.get_float("REGISTRY_CHECK_INTERVAL", DEFAULT_REGISTRY_CHECK_INTERVAL)
+        self._registry_task: Optional[asyncio.Task] = None
+        self._registry_changes = 0
+        self._registry_changed_at: Optional[float] = None
+        # Browser conversions patched for workflows differing only in widget values
+        self._templates = ConversionTemplates(config.get_int("TEMPLATE_MAX_ENTRIES", DEFAULT_TEMPLATE_ENTRIES))
+
+        # Frontend files served to pages without going through PromptServer
+        self._asset_cache = FrontendAssetCache(
+            config.get_int("ASSET_CACHE_MAX_MB", DEFAULT_ASSET_CACHE_MAX_MB) * 1024 * 1024
+        )
+
+        # Requests of conversion pages that are aborted or stubbed
+        self._blocking: Optional[BlockingProfile] = None
+        if config.get_bool("BLOCKING", True):
+            allow_list = config.get_str("BLOCK_ALLOW", ",".join(DEFAULT_ALLOW))
+            allow = [name.strip() for name in allow_list.split(",") if name.strip()]
+            self._blocking = BlockingProfile(allow)
+
+        # In-process converter tried before the browser
+        self._native: Optional[NativeConverter] = (
+            NativeConverter() if config.get_bool("NATIVE_CONVERT", True) else None
+        )
+
+        self._batch_max_items = config.get_int("BATCH_MAX_ITEMS", DEFAULT_BATCH_MAX_ITEMS)
+
+        # Page reset strategy between conversions
+        if reset_mode is None:
+            reset_mode = config.get_str("RESET_MODE", DEFAULT_RESET_MODE)
+        if reset_mode not in (RESET_MODE_RELOAD, RESET_MODE_SNAPSHOT):
+            logger.warning("Unknown reset mode %r, using %r", reset_mode, DEFAULT_RESET_MODE)
+            reset_mode = DEFAULT_RESET_MODE
+        self._reset_mode = reset_mode
+        if max_page_reuses is None:
+            max_page_reuses = config.get_int("MAX_PAGE_REUSES", DEFAULT_MAX_PAGE_REUSES)
+        self._max_page_reuses = max_page_reuses
+        # Conversions served by each page since its last reload (snapshot mode)
+        self._page_reuses: Dict[Any, int] = {}
+
+        # Page recycling thresholds and per-page bookkeeping
+        if max_page_conversions is None:
+            max_page_conversions = config.get_int("PAGE_MAX_CONVERSIONS", DEFAULT_PAGE_MAX_CONVERSIONS)
+        self._max_page_conversions = max(0, max_page_conversions)
+        if max_page_heap_bytes is None:
+            max_page_heap_bytes = config.get_int("PAGE_MAX_HEAP_MB", DEFAULT_PAGE_MAX_HEAP_MB) * 1024 * 1024
+        self._max_page_heap_bytes = max(0, max_page_heap_bytes)
+        # Conversions served by each page since it was created
+        self._page_conversions: Dict[Any, int] = {}
+        # Last JS heap check of each page: (conversions at the time, bytes or None)
+        self._page_heap: Dict[Any, Tuple[int, Optional[int]]] = {}
+        self._cdp_sessions: Dict[Any, Any] = {}
+        self._recycling: Set[Any] = set()
+        # Pages whose last recycle failed, with the time it failed
+        self._recycle_failed: Dict[Any, float] = {}
+        self._counters: Dict[str, int] = {
+            "conversions": 0,
+            "reloads": 0,
+            "snapshot_restores": 0,
+            "contaminations": 0,
+            "coalesced": 0,
+            "native_conversions": 0,
+            "native_fallbacks": 0,
+            "retries": 0,
+            "page_replacements": 0,
+            "page_recycles": 0,
+            "recycle_failures": 0,
+            "browser_starts": 0,
+            "shard_failures": 0,
+            "shard_restarts": 0,
+        }
+        # Conversions currently running, keyed by cache key, so concurrent
+        # requests for identical workflows share one browser conversion
+        self._inflight: Dict[str, asyncio.Task] = {}
 
         # Register synchronous cleanup at process exit
         atexit.register(self._sync_cleanup)
@@ -51,14 +450,167 @@ class HeadlessBrowserManager:
 
     @property
     def status(self) -> BrowserStatus:
+        if self._status == BrowserStatus.READY and not self._serving():
+            # Every worker failed; they are being restarted
+            return BrowserStatus.ERROR
         return self._status
 
     @property
     def error_message(self) -> Optional[str]:
+        if self._status == BrowserStatus.READY and not self._serving():
+            return "No conversion worker is available"
         return self._error_message
 
+    @property
+    def node_fingerprint(self) -> Optional[str]:
+        """Fingerprint of the registered node types, or None until it was computed."""
+        return self._node_fingerprint
+
+    async def get_node_fingerprint(self) -> str:
+        """Fingerprint of the registered node types, computed on first use.
+
+        Node definitions may list model folders on disk, so the fingerprint
+        is computed on the I/O executor. Concurrent callers share one
+        computation.
+        """
+        if self._node_fingerprint is None:
+            if self._fingerprint_task is None or self._fingerprint_task.done():
+                self._fingerprint_task = asyncio.ensure_future(self._load_node_fingerprint())
+            await asyncio.shield(self._fingerprint_task)
+        return self._node_fingerprint
+
+    async def _load_node_fingerprint(self) -> None:
+        self._registry_signature, self._node_fingerprint = await fileio.run_io(read_node_registry)
+
+    def registry_stats(self) -> Dict[str, Any]:
+        """Return the node registry fingerprint and how often it changed."""
+        return {
+            "fingerprint": self._node_fingerprint,
+            "check_interval": self._registry_check_interval,
+            "changes": self._registry_changes,
+            "changed_at": self._registry_changed_at,
+        }
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and size of the conversion cache."""
+        return self._cache.stats()
+
+    def template_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and size of the widget fast path."""
+        return self._templates.stats()
+
+    def asset_cache_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and size of the frontend asset cache."""
+        return self._asset_cache.stats()
+
+    def blocking_stats(self) -> Optional[Dict[str, Any]]:
+        """Return per-category counts of requests blocked on conversion pages."""
+        if self._blocking is None:
+            return None
+        return self._blocking.stats()
+
+    def pool_stats(self) -> Optional[Dict[str, Any]]:
+        """Return size, usage and recent scaling decisions of the page pool.
+
+        With several shards or workers the figures are totals over their pools.
+        """
+        if self._workers is not None:
+            stats = [snapshot["pool"] for _, snapshot in self._workers.snapshots() if snapshot["pool"]]
+        else:
+            stats = [shard.page_pool.stats() for shard in self._shards if shard.page_pool is not None]
+        if not stats:
+            return None
+        return stats[0] if len(stats) == 1 else _merge_pool_stats(stats)
+
+    def shard_stats(self) -> List[Dict[str, Any]]:
+        """Return status, restart counters and page pool stats of every shard."""
+        if self._workers is not None:
+            return [
+                {"worker": index, **shard}
+                for index, snapshot in self._workers.snapshots()
+                for shard in snapshot["shards"]
+            ]
+        return [shard.stats() for shard in self._shards]
+
+    def worker_stats(self) -> Optional[List[Dict[str, Any]]]:
+        """Return status and restart counters of every worker process, or None without workers."""
+        if self._workers is None:
+            return None
+        return self._workers.stats()
+
+    @property
+    def batch_max_items(self) -> int:
+        return self._batch_max_items
+
+    @property
+    def warmup_state(self) -> Optional[str]:
+        """State of the background warm-up, or None if it was never started."""
+        return self._warmup_state
+
+    def init_progress(self) -> Dict[str, int]:
+        """Return how many of the initial pages have finished loading."""
+        if self._workers is not None:
+            return {
+                "pages_ready": sum(snapshot["init"]["pages_ready"] for _, snapshot in self._workers.snapshots()),
+                "pages_total": self._min_pages * len(self._shards) * self._workers.size,
+            }
+        return {
+            "pages_ready": sum(shard.page_pool.size for shard in self._shards if shard.page_pool is not None),
+            "pages_total": self._min_pages * len(self._shards),
+        }
+
+    def recycling_stats(self) -> Dict[str, Any]:
+        """Return page recycling thresholds and the usage of each pooled page."""
+        pages = []
+        if self._workers is not None:
+            for index, snapshot in self._workers.snapshots():
+                pages.extend({"worker": index, **page} for page in snapshot["recycling"]["pages"])
+        for shard in self._shards:
+            if shard.page_pool is None:
+                continue
+            for page in shard.page_pool.pages():
+                heap = self._page_heap.get(page)
+                pages.append({
+                    "shard": shard.index,
+                    "conversions": self._page_conversions.get(page, 0),
+                    "js_heap_mb": round(heap[1] / (1024 * 1024), 1) if heap and heap[1] is not None else None,
+                    "recycling": page in self._recycling,
+                })
+        return {
+            "max_conversions": self._max_page_conversions,
+            "max_heap_mb": self._max_page_heap_bytes // (1024 * 1024),
+            "pages": pages,
+        }
+
+    def conversion_stats(self) -> Dict[str, Any]:
+        """Return counters of browser conversions and page resets.
+
+        With workers, the counters of their browser managers are added in.
+        """
+        counters = dict(self._counters)
+        if self._workers is not None:
+            for _, snapshot in self._workers.snapshots():
+                for key, value in snapshot["conversion"].items():
+                    if key in counters:
+                        counters[key] += value
+        return {
+            "reset_mode": self._reset_mode,
+            "in_flight": len(self._inflight),
+            **counters,
+        }
+
+    def use_frontend(self, comfyui_url: str, web_root: Optional[str], extension_dirs: Dict[str, str]) -> None:
+        """Load pages from the given ComfyUI instead of the PromptServer of this process.
+
+        Used by conversion workers, which run outside ComfyUI.
+        """
+        self._frontend = (comfyui_url, web_root, dict(extension_dirs))
+
     def _get_comfyui_url(self) -> str:
         """Get the ComfyUI server URL from PromptServer instance."""
+        if self._frontend is not None:
+            return self._frontend[0]
+
         from server import PromptServer
 
         server_instance = PromptServer.instance
@@ -71,6 +623,73 @@ class HeadlessBrowserManager:
 
         return f"http://{address}:{port}"
 
+    def start_warmup(self) -> None:
+        """Start initializing the browser in the background.
+
+        Waits until PromptServer accepts connections, initializes the page
+        pool and runs a small conversion on every page. Conversions that
+        arrive meanwhile wait for the warm-up instead of starting their own
+        initialization. Calling this more than once has no effect.
+        """
+        if self._warmup_task is None:
+            self._warmup_task = start_background(self._warmup())
+
+    async def _warmup(self) -> None:
+        started = time.monotonic()
+        try:
+            self._warmup_state = "waiting_for_server"
+            await self._wait_for_server()
+            self._warmup_state = "starting_browser"
+            await self.initialize()
+            self._warmup_state = "warming_pages"
+            await self.warm_pages()
+            self._warmup_state = "done"
+            logger.info("Browser warm-up finished in %.1fs", time.monotonic() - started)
+        except Exception as e:
+            self._warmup_state = "failed"
+            logger.error("Browser warm-up failed: %s", str(e))
+
+    async def _wait_for_server(self) -> None:
+        """Wait until PromptServer accepts TCP connections."""
+        url = urlsplit(self._get_comfyui_url())
+        deadline = time.monotonic() + WARMUP_SERVER_TIMEOUT
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(url.hostname, url.port)
+                writer.close()
+                return
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("ComfyUI server did not start listening in time")
+                await asyncio.sleep(0.5)
+
+    async def warm_pages(self) -> None:
+        """Run the built-in warm-up conversion once on every pooled page."""
+        if self._workers is not None:
+            await self._workers.warm()
+            return
+        await asyncio.gather(*[self._warm_shard(shard) for shard in self._ready_shards()])
+
+    async def _warm_shard(self, shard: BrowserShard) -> None:
+        pool = shard.page_pool
+        pages = [await pool.acquire() for _ in range(pool.size)]
+        try:
+            for page in pages:
+                result = (await self._do_convert_batch(page, [_WARMUP_WORKFLOW]))[0]
+                if not result.get("success"):
+                    logger.warning("Warm-up conversion failed: %s", result.get("error"))
+        finally:
+            for page in pages:
+                pool.release(page)
+
+    async def _ensure_ready(self) -> None:
+        """Wait for a running warm-up, then make sure the browser is initialized."""
+        warmup = self._warmup_task
+        if warmup is not None and not warmup.done():
+            await asyncio.shield(warmup)
+        if self._status != BrowserStatus.READY:
+            await self.initialize()
+
     async def _wait_for_comfyui_ready(self, page) -> None:
         """Wait for ComfyUI frontend to be fully loaded on a page."""
         # Wait for LiteGraph to be loaded (window.LGraph)
@@ -95,40 +714,80 @@ class HeadlessBrowserManager:
             timeout=60000,
         )
 
-    async def _create_page(self, comfyui_url: str):
-        """Create a new browser context + page and wait for ComfyUI to load."""
-        context = await self._browser.new_context()
+    async def _create_page(self, shard: BrowserShard, comfyui_url: str):
+        """Create a new browser context + page in a shard and wait for ComfyUI to load."""
+        context = await shard.browser.new_context()
+        if self._asset_cache.enabled:
+            await context.route("**/*", self._asset_cache.handle_route)
+        # Registered last so it sees requests before the asset cache
+        if self._blocking is not None:
+            await self._blocking.install(context)
         page = await context.new_page()
 
         await page.goto(comfyui_url, timeout=60000, wait_until="domcontentloaded")
-        await self._wait_for_comfyui_ready(page)
-
-        self._contexts.append(context)
+        # Not a conversion phase: new pages are loaded outside conversions
+        with span("ready_wait"):
+            await self._wait_for_comfyui_ready(page)
+        if self._reset_mode == RESET_MODE_SNAPSHOT:
+            await page.evaluate(_TAKE_SNAPSHOT_SCRIPT)
+            self._page_reuses[page] = 0
+
+        shard.contexts.append(context)
+        self._page_shards[page] = shard
         return page
 
+    def _forget_page(self, page) -> Optional[BrowserShard]:
+        """Drop the bookkeeping kept for a page and return the shard it belonged to."""
+        self._page_reuses.pop(page, None)
+        self._page_conversions.pop(page, None)
+        self._page_heap.pop(page, None)
+        self._cdp_sessions.pop(page, None)
+        self._recycle_failed.pop(page, None)
+        return self._page_shards.pop(page, None)
+
+    async def _close_page(self, page) -> None:
+        """Close a page together with its browser context."""
+        shard = self._forget_page(page)
+        context = page.context
+        try:
+            await context.close()
+        finally:
+            if shard is not None and context in shard.contexts:
+                shard.contexts.remove(context)
+
+    def _ready_shards(self) -> List[BrowserShard]:
+        return [shard for shard in self._shards if shard.ready]
+
+    def _serving(self) -> bool:
+        """Whether a shard or worker is ready for conversions."""
+        if self._workers is not None:
+            return bool(self._workers.ready_workers())
+        return bool(self._ready_shards())
+
     async def initialize(self) -> None:
-        """Initialize the headless browser and create a pool of pages.
+        """Initialize the headless browser shards and create their page pools.
 
         This is idempotent - if already READY, it returns immediately.
-        Uses _init_lock to prevent concurrent initialization.
+        Uses _init_lock to prevent concurrent initialization. The manager
+        becomes READY once at least one shard (or worker) has started;
+        those that failed to start are restarted in the background.
         """
-        if self._status == BrowserStatus.READY and self._page_pool is not None:
+        if self._status == BrowserStatus.READY and self._serving():
             return
 
         init_lock = self._get_init_lock()
         async with init_lock:
             # Double-check after acquiring lock
-            if self._status == BrowserStatus.READY and self._page_pool is not None:
+            if self._status == BrowserStatus.READY and self._serving():
                 return
 
             # Clean up any leftover resources from a previous failed state
-            if self._browser is not None:
-                await self._cleanup()
+            await self._cleanup()
             self._status = BrowserStatus.INITIALIZING
             self._error_message = None
 
             try:
-                from playwright.async_api import async_playwright
+                from playwright.async_api import async_playwright  # noqa: F401
             except ImportError:
                 self._status = BrowserStatus.NOT_INSTALLED
                 self._error_message = "Playwright is not installed. Run: pip install playwright"
@@ -139,56 +798,35 @@ class HeadlessBrowserManager:
                 comfyui_url = self._get_comfyui_url()
                 logger.info("Initializing headless browser for ComfyUI at %s", comfyui_url)
 
-                # Start Playwright
-                self._playwright = await async_playwright().start()
-
-                # Launch Chromium with memory-optimized flags
-                self._browser = await self._playwright.chromium.launch(
-                    headless=True,
-                    args=[
-                        "--no-sandbox",
-                        "--disable-gpu",
-                        "--disable-dev-shm-usage",
-                        "--disable-extensions",
-                        "--disable-background-networking",
-                        "--disable-default-apps",
-                        "--disable-sync",
-                        "--disable-translate",
-                        "--no-first-run",
-                        "--mute-audio",
-                    ],
-                )
-
-                # Capture Playwright driver PID for reliable atexit cleanup.
-                # The driver subprocess manages Chromium — killing it cascades
-                # to the browser process as well.
-                try:
-                    transport = self._playwright._connection._transport
-                    self._driver_pid = transport._proc.pid
-                    logger.info("Playwright driver PID: %d", self._driver_pid)
-                except Exception:
-                    logger.warning("Could not capture Playwright driver PID")
-
-                # Create page pool
-                self._page_pool = asyncio.Queue()
-                self._contexts = []
-
-                logger.info("Creating %d browser pages...", self._pool_size)
-                for i in range(self._pool_size):
-                    logger.info("Loading ComfyUI page %d/%d...", i + 1, self._pool_size)
-                    page = await self._create_page(comfyui_url)
-                    await self._page_pool.put(page)
-
-                node_count = await (await self._peek_page()).evaluate(
-                    "() => Object.keys(LiteGraph.registered_node_types).length"
-                )
-                logger.info("ComfyUI node types registered: %d types loaded", node_count)
+                if self._frontend is not None:
+                    web_root, extension_dirs = self._frontend[1:]
+                else:
+                    web_root, extension_dirs = get_frontend_dirs()
+
+                if self._workers is not None:
+                    logger.info("Starting %d conversion worker(s)...", self._workers.size)
+                    await self._workers.start(comfyui_url, web_root, extension_dirs)
+                else:
+                    await self._start_shards(comfyui_url, web_root, extension_dirs)
+
+                # Outside ComfyUI (in a worker) there is no node registry
+                if self._frontend is None:
+                    self._registry_signature, self._node_fingerprint = await fileio.run_io(read_node_registry)
+                    logger.info("Node registry fingerprint: %s", self._node_fingerprint)
+                    if self._native is not None:
+                        self._native.reset()
+                    # Frontend extensions may have changed how widgets convert
+                    self._templates.clear()
+                    if self._registry_check_interval > 0 and (
+                        self._registry_task is None or self._registry_task.done()
+                    ):
+                        self._registry_task = start_background(self._watch_registry())
 
                 self._status = BrowserStatus.READY
-                logger.info(
-                    "Headless browser initialized with %d pages, ready for workflow conversion",
-                    self._pool_size,
-                )
+                if self._workers is None:
+                    for shard in self._shards:
+                        if not shard.ready:
+                            self._schedule_restart(shard)
 
             except Exception as e:
                 self._status = BrowserStatus.ERROR
@@ -198,174 +836,774 @@ class HeadlessBrowserManager:
                 await self._cleanup()
                 raise RuntimeError(self._error_message) from e
 
-    async def _peek_page(self):
-        """Get a page from the pool temporarily for inspection, then put it back."""
-        page = await self._page_pool.get()
-        await self._page_pool.put(page)
+    async def _start_shards(self, comfyui_url: str, web_root: Optional[str], extension_dirs: Dict[str, str]) -> None:
+        """Start the browser shards of this process.
+
+        Raises:
+            Exception: The first shard's startup error if none could be started.
+        """
+        self._asset_cache.configure(comfyui_url, web_root, extension_dirs)
+        if self._blocking is not None:
+            self._blocking.configure(comfyui_url)
+
+        logger.info(
+            "Creating %d browser pages per shard in %d shard(s) (each pool scales up to %d)...",
+            self._min_pages, len(self._shards), self._max_pages,
+        )
+        outcomes = await asyncio.gather(
+            *[self._start_shard(shard, comfyui_url) for shard in self._shards],
+            return_exceptions=True,
+        )
+        ready = self._ready_shards()
+        if not ready:
+            raise next(
+                (outcome for outcome in outcomes if isinstance(outcome, BaseException)),
+                RuntimeError("No browser shard is ready"),
+            )
+
+        node_count = await (await self._peek_page(ready[0])).evaluate(
+            "() => Object.keys(LiteGraph.registered_node_types).length"
+        )
+        logger.info("ComfyUI node types registered: %d types loaded", node_count)
+        logger.info(
+            "Headless browser initialized with %d pages in %d of %d shard(s), ready for workflow conversion",
+            sum(shard.page_pool.size for shard in ready), len(ready), len(self._shards),
+        )
+
+    async def _start_shard(self, shard: BrowserShard, comfyui_url: str) -> None:
+        """Start a shard's Playwright driver and browser and fill its page pool.
+
+        On failure the shard is cleaned up, marked ERROR and the error re-raised.
+        """
+        from playwright.async_api import async_playwright
+
+        shard.status = BrowserStatus.INITIALIZING
+        shard.error_message = None
+        try:
+            # Every shard has its own driver process and connection
+            shard.playwright = await async_playwright().start()
+
+            # Launch Chromium with memory-optimized flags
+            shard.browser = await shard.playwright.chromium.launch(headless=True, args=_BROWSER_ARGS)
+            browser = shard.browser
+            browser.on("disconnected", lambda _: self._on_browser_disconnected(shard, browser))
+
+            # Capture Playwright driver PID for reliable atexit cleanup.
+            # The driver subprocess manages Chromium — killing it cascades
+            # to the browser process as well.
+            try:
+                transport = shard.playwright._connection._transport
+                shard.driver_pid = transport._proc.pid
+                logger.info("Browser shard %d: Playwright driver PID %d", shard.index, shard.driver_pid)
+            except Exception:
+                logger.warning("Could not capture Playwright driver PID of browser shard %d", shard.index)
+
+            # Create page pool
+            shard.contexts = []
+            shard.page_pool = PagePool(
+                create_page=lambda: self._create_page(shard, comfyui_url),
+                close_page=self._close_page,
+                min_size=self._min_pages,
+                max_size=self._max_pages,
+                scale_up_queue=config.get_int("POOL_SCALE_UP_QUEUE", DEFAULT_POOL_SCALE_UP_QUEUE),
+                scale_up_wait=config.get_float("POOL_SCALE_UP_WAIT", DEFAULT_POOL_SCALE_UP_WAIT),
+                idle_timeout=config.get_float("POOL_IDLE_TIMEOUT", DEFAULT_POOL_IDLE_TIMEOUT),
+                max_waiters=config.get_int("POOL_MAX_QUEUE", DEFAULT_POOL_MAX_QUEUE),
+                wait_timeout=config.get_float("POOL_QUEUE_TIMEOUT", DEFAULT_POOL_QUEUE_TIMEOUT),
+                starvation_after=config.get_float("POOL_STARVATION_AFTER", DEFAULT_POOL_STARVATION_AFTER),
+            )
+            await shard.page_pool.start()
+        except Exception as e:
+            await self._cleanup_shard(shard)
+            shard.status = BrowserStatus.ERROR
+            shard.error_message = f"Failed to start browser: {str(e)}"
+            logger.error("Browser shard %d: %s", shard.index, shard.error_message)
+            raise
+
+        shard.status = BrowserStatus.READY
+        shard.starts += 1
+        self._counters["browser_starts"] += 1
+
+    def _on_browser_disconnected(self, shard: BrowserShard, browser) -> None:
+        # Also fired when a shard is cleaned up; by then it no longer holds the browser
+        if shard.browser is browser:
+            self._fail_shard(shard, "Browser disconnected")
+
+    def _fail_shard(self, shard: BrowserShard, reason: str) -> None:
+        """Take a failed shard out of service.
+
+        While another shard is ready, the failed one is restarted in the
+        background. Otherwise the manager is marked errored so the next
+        request triggers a full re-initialization instead of deadlocking.
+        """
+        if shard.status != BrowserStatus.READY:
+            return
+        shard.status = BrowserStatus.ERROR
+        shard.error_message = reason
+        shard.failures += 1
+        self._counters["shard_failures"] += 1
+        if self._status == BrowserStatus.INITIALIZING:
+            # initialize() restarts the shards that are not ready when it is done
+            return
+        if self._ready_shards():
+            logger.warning("Browser shard %d failed (%s), restarting it", shard.index, reason)
+            self._schedule_restart(shard)
+        else:
+            self._status = BrowserStatus.ERROR
+            self._error_message = f"{reason}, will re-initialize on next request"
+            logger.error(self._error_message)
+
+    def _schedule_restart(self, shard: BrowserShard) -> None:
+        if not shard.restarting:
+            shard.restart_task = start_background(self._restart_shard(shard))
+
+    async def _restart_shard(self, shard: BrowserShard) -> None:
+        """Restart a failed shard, backing off between attempts."""
+        delay = SHARD_RESTART_DELAY
+        while True:
+            await self._cleanup_shard(shard)
+            try:
+                await self._start_shard(shard, self._get_comfyui_url())
+            except Exception:
+                logger.info("Retrying browser shard %d in %.0fs", shard.index, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, SHARD_RESTART_MAX_DELAY)
+                continue
+            self._counters["shard_restarts"] += 1
+            logger.info("Browser shard %d restarted", shard.index)
+            return
+
+    def _pick_shard(self) -> BrowserShard:
+        """Return the least loaded ready shard.
+
+        Raises:
+            RuntimeError: If no shard is ready.
+        """
+        shards = self._ready_shards()
+        if not shards:
+            raise RuntimeError(self._error_message or "No browser shard is available")
+        return min(shards, key=lambda shard: shard.load())
+
+    def promote(self, key: str, priority: str) -> None:
+        """Raise the priority of a queued conversion in whichever shard or worker holds it."""
+        if self._workers is not None:
+            self._workers.promote(key, priority)
+            return
+        for shard in self._shards:
+            if shard.page_pool is not None:
+                shard.page_pool.promote(key, priority)
+
+    async def _peek_page(self, shard: BrowserShard):
+        """Get a page from a shard's pool temporarily for inspection, then put it back."""
+        page = await shard.page_pool.acquire()
+        shard.page_pool.release(page)
         return page
 
     async def _cleanup(self) -> None:
         """Clean up all browser resources."""
+        if self._workers is not None:
+            await self._workers.stop()
+        restarts = [shard.restart_task for shard in self._shards if shard.restarting]
+        for task in restarts:
+            task.cancel()
+        await asyncio.gather(*restarts, return_exceptions=True)
+        await asyncio.gather(*[self._cleanup_shard(shard) for shard in self._shards])
+        for shard in self._shards:
+            shard.status = BrowserStatus.NOT_INITIALIZED
+            shard.error_message = None
+
+    async def _cleanup_shard(self, shard: BrowserShard) -> None:
+        """Clean up the resources of one shard."""
         try:
-            # Drain and close all pages
-            if self._page_pool is not None:
-                while not self._page_pool.empty():
-                    try:
-                        page = self._page_pool.get_nowait()
-                        await page.close()
-                    except Exception:
-                        pass
-                self._page_pool = None
+            # Close all pages and fail requests still waiting for one
+            if shard.page_pool is not None:
+                pool, shard.page_pool = shard.page_pool, None
+                await pool.close()
+            for page in [page for page, owner in self._page_shards.items() if owner is shard]:
+                self._forget_page(page)
 
             # Close all contexts
-            for ctx in self._contexts:
+            for ctx in shard.contexts:
                 try:
                     await ctx.close()
                 except Exception:
                     pass
-            self._contexts = []
+            shard.contexts = []
 
-            if self._browser is not None:
+            if shard.browser is not None:
+                browser, shard.browser = shard.browser, None
                 try:
-                    await self._browser.close()
+                    await browser.close()
                 except Exception:
                     pass
-                self._browser = None
 
-            if self._playwright is not None:
+            if shard.playwright is not None:
                 try:
-                    await self._playwright.stop()
+                    await shard.playwright.stop()
                 except Exception:
                     pass
-                self._playwright = None
+                shard.playwright = None
 
-            self._driver_pid = None
+            shard.driver_pid = None
         except Exception as e:
             logger.error("Error during browser cleanup: %s", str(e))
 
     def _sync_cleanup(self) -> None:
-        """Synchronous cleanup for atexit — kills Playwright driver process by PID.
+        """Synchronous cleanup for atexit — kills Playwright driver processes by PID.
 
         The Playwright driver (a Node.js subprocess) manages the Chromium browser.
         Killing the driver cascades to the browser process automatically.
+        Worker processes are terminated, and their drivers exit with them.
         """
-        if self._driver_pid is not None:
+        if self._workers is not None:
+            self._workers.kill()
+        for shard in self._shards:
+            pid = shard.driver_pid
+            if pid is None:
+                continue
             try:
-                os.kill(self._driver_pid, signal.SIGTERM)
-                logger.info("Sent SIGTERM to Playwright driver (PID %d)", self._driver_pid)
+                os.kill(pid, signal.SIGTERM)
+                logger.info("Sent SIGTERM to Playwright driver (PID %d)", pid)
             except ProcessLookupError:
                 pass  # Already exited
             except Exception as e:
-                logger.error("Error killing Playwright driver (PID %d): %s", self._driver_pid, str(e))
+                logger.error("Error killing Playwright driver (PID %d): %s", pid, str(e))
+
+    async def _watch_registry(self) -> None:
+        """Check the node registry for changes every registry check interval."""
+        while True:
+            await asyncio.sleep(self._registry_check_interval)
+            try:
+                await self.check_node_registry()
+            except Exception as e:
+                logger.warning("Node registry check failed: %s", str(e))
+
+    async def check_node_registry(self) -> bool:
+        """Check whether the node registry changed since the fingerprint was computed.
+
+        Cheap unless node types were added, removed or reloaded, in which
+        case the fingerprint is recomputed on the I/O executor. If it differs, everything derived
+        from the old registry is dropped and pages are refreshed in the
+        background. Workers have no registry and never see a change.
+
+        Returns:
+            Whether the fingerprint changed.
+        """
+        if self._frontend is not None or self._node_fingerprint is None:
+            return False
+        signature = node_registry_signature()
+        if signature == self._registry_signature:
+            return False
+        self._registry_signature, fingerprint = await fileio.run_io(read_node_registry)
+        if fingerprint == self._node_fingerprint:
+            return False
+
+        logger.info("Node registry changed (fingerprint %s -> %s)", self._node_fingerprint, fingerprint)
+        self._node_fingerprint = fingerprint
+        self._registry_changes += 1
+        self._registry_changed_at = time.time()
+        # Cache keys and templates include the fingerprint; the old ones can no longer be hit
+        self._cache.clear()
+        self._templates.clear()
+        if self._native is not None:
+            self._native.reset()
+        # Files of removed or moved extension directories would otherwise stay cached
+        self._asset_cache.clear()
+        if self._status == BrowserStatus.READY:
+            start_background(self.refresh_pages("node registry change"))
+        return True
+
+    async def refresh_pages(self, reason: str) -> None:
+        """Replace every pooled page with a freshly loaded one, here or in the workers.
+
+        Pages keep serving conversions until their replacement is ready
+        (see _recycle_page), so stale node definitions are gone once this
+        returns without any conversion having to wait for a page to load.
+        """
+        if self._workers is not None:
+            await self._workers.refresh(reason)
+            return
+        recycles = []
+        for shard in self._ready_shards():
+            pool = shard.page_pool
+            for page in pool.pages():
+                # Retiring pages are closed once released and need no replacement
+                if page not in self._recycling and not pool.is_retiring(page):
+                    self._recycling.add(page)
+                    recycles.append(self._recycle_if_needed(page, reason))
+        logger.info("Refreshing %d page(s) after %s", len(recycles), reason)
+        await asyncio.gather(*recycles)
 
     async def shutdown(self) -> None:
         """Gracefully shut down the browser."""
         logger.info("Shutting down headless browser...")
+        if self._registry_task is not None:
+            self._registry_task.cancel()
+            self._registry_task = None
         await self._cleanup()
         self._status = BrowserStatus.NOT_INITIALIZED
         self._error_message = None
         logger.info("Headless browser shut down")
 
-    async def convert_workflow(self, workflow_data: dict) -> dict:
+    async def convert_workflow(self, workflow_data: dict, priority: str = PRIORITY_INTERACTIVE) -> dict:
         """Convert a workflow from UI format to API format.
 
-        Acquires a page from the pool, performs the conversion, and returns
-        the page to the pool. Multiple conversions can run concurrently
-        up to the pool size.
+        Results are cached by workflow content and node registry fingerprint,
+        so repeated conversions of the same workflow skip the browser entirely.
+        Workflows the native converter can handle are converted in-process,
+        as are workflows that differ from an earlier browser conversion only
+        in widget values (see templates.ConversionTemplates). Concurrent
+        requests for the same workflow are coalesced into a single
+        conversion whose result (or error) is shared by every caller.
+        Otherwise, acquires a page from the pool, performs the conversion,
+        and returns the page to the pool. Multiple conversions can run
+        concurrently up to the pool size.
 
         Args:
             workflow_data: The workflow JSON data in UI format.
+            priority: Priority class of the request when waiting for a page
+                (see pool.PRIORITIES). A coalesced request raises the
+                priority of the conversion it joins if that is still queued.
 
         Returns:
-            The converted workflow in API format.
+            The converted workflow in API format. The returned dict may be
+            shared with the cache and must not be modified.
 
         Raises:
+            OverloadedError: If no page could be had within the pool's
+                admission limits.
             RuntimeError: If browser is not available or conversion fails.
         """
-        # Ensure browser is initialized
-        if self._status != BrowserStatus.READY:
-            await self.initialize()
+        fingerprint = await self.get_node_fingerprint()
+        cache_key = workflow_cache_key(workflow_data, fingerprint)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if self._native is not None:
+            await self._native.load_definitions([workflow_data])
+        result = self._convert_in_process(workflow_data, fingerprint)
+        if result is not None:
+            self._cache.put(cache_key, result)
+            return result
 
-        # Acquire a page from the pool (blocks if all pages are busy)
-        page = await self._page_pool.get()
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            self._counters["coalesced"] += 1
+            self.promote(cache_key, priority)
+        else:
+            task = asyncio.ensure_future(self._convert_and_store(cache_key, fingerprint, workflow_data, priority))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda t: self._finish_inflight(cache_key, t))
+
+        # Shield the shared task so a disconnecting client does not cancel
+        # the conversion for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def _convert_in_process(self, workflow_data: dict, fingerprint: str) -> Optional[dict]:
+        """Convert natively or from a template; None means the browser is needed."""
+        with span("native"):
+            result = self._convert_native(workflow_data)
+        if result is None:
+            with span("patch"):
+                result = self._templates.patch(workflow_data, fingerprint)
+        return result
+
+    def _convert_native(self, workflow_data: dict) -> Optional[dict]:
+        """Try converting without the browser; None means the browser is needed."""
+        if self._native is None:
+            return None
         try:
-            result = await self._do_convert(page, workflow_data)
-            # Page is healthy — return it to the pool
-            await self._page_pool.put(page)
-            return result
-        except Exception as first_error:
-            logger.warning(
-                "Workflow conversion failed, attempting recovery: %s",
-                str(first_error),
-            )
-            # Recovery: _do_convert already reloads the page, so just retry
+            result = self._native.convert(workflow_data)
+        except UnsupportedWorkflowError as e:
+            self._counters["native_fallbacks"] += 1
+            logger.debug("Using browser conversion: %s", str(e))
+            return None
+        except Exception as e:
+            self._counters["native_fallbacks"] += 1
+            logger.warning("Native conversion failed, using browser: %s", str(e))
+            return None
+        self._counters["native_conversions"] += 1
+        return result
+
+    async def _convert_and_store(self, cache_key: str, fingerprint: str, workflow_data: dict, priority: str) -> dict:
+        result = await self._convert_uncached(workflow_data, priority, cache_key)
+        self._cache.put(cache_key, result)
+        self._templates.learn(workflow_data, result, fingerprint)
+        return result
+
+    def _finish_inflight(self, cache_key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def convert_workflows(self, workflows: List[dict], priority: str = PRIORITY_INTERACTIVE) -> List[dict]:
+        """Convert many workflows from UI format to API format.
+
+        Cached, duplicate, natively convertible and template-patched
+        workflows are resolved without the browser. The rest are split into
+        one chunk per pooled page, and each chunk is converted in a single
+        page.evaluate call. A failing workflow does not affect the others.
+
+        Args:
+            workflows: Workflow JSON data in UI format.
+            priority: Priority class of the chunks when waiting for pages.
+
+        Returns:
+            One result per input, in order: {"success": True, "workflow": ...}
+            or {"success": False, "error": "..."}.
+
+        Raises:
+            OverloadedError: If a chunk was not admitted to the page pool.
+                The other chunks' results are cached, so a retry only
+                converts the rest.
+            RuntimeError: If the browser is not available.
+        """
+        fingerprint = await self.get_node_fingerprint()
+        if self._native is not None:
+            await self._native.load_definitions(workflows)
+        results: List[Optional[dict]] = [None] * len(workflows)
+        # Indices of every uncached workflow, grouped by cache key
+        pending: Dict[str, List[int]] = {}
+
+        for i, workflow_data in enumerate(workflows):
+            cache_key = workflow_cache_key(workflow_data, fingerprint)
+            cached = self._cache.get(cache_key)
+            if cached is None and cache_key not in pending:
+                cached = self._convert_in_process(workflow_data, fingerprint)
+                if cached is not None:
+                    self._cache.put(cache_key, cached)
+            if cached is not None:
+                results[i] = {"success": True, "workflow": cached}
+            elif cache_key in pending:
+                pending[cache_key].append(i)
+                self._counters["coalesced"] += 1
+            else:
+                pending[cache_key] = [i]
+
+        # Join conversions of the same workflows that are already running
+        joined = {key: self._inflight[key] for key in pending if key in self._inflight}
+        to_convert = [key for key in pending if key not in joined]
+        self._counters["coalesced"] += len(joined)
+        for cache_key in joined:
+            self.promote(cache_key, priority)
+
+        if to_convert:
+            await self._ensure_ready()
+
+            # Queued chunks make the pools scale up towards their maximum
+            pools = self.pool_stats()
+            capacity = pools["max"] if pools is not None else self._max_pages
+            num_chunks = max(1, min(capacity, len(to_convert)))
+            chunks = [to_convert[i::num_chunks] for i in range(num_chunks)]
+            chunk_results = await asyncio.gather(*[
+                self._convert_chunk([workflows[pending[key][0]] for key in chunk], priority)
+                for chunk in chunks
+            ], return_exceptions=True)
+            overloaded = None
+            for chunk, outcomes in zip(chunks, chunk_results):
+                if isinstance(outcomes, OverloadedError):
+                    overloaded = overloaded or outcomes
+                    continue
+                if isinstance(outcomes, BaseException):
+                    raise outcomes
+                for cache_key, outcome in zip(chunk, outcomes):
+                    if outcome.get("success"):
+                        self._cache.put(cache_key, outcome["workflow"])
+                        self._templates.learn(workflows[pending[cache_key][0]], outcome["workflow"], fingerprint)
+                    for i in pending[cache_key]:
+                        results[i] = outcome
+            if overloaded is not None:
+                raise overloaded
+
+        for cache_key, task in joined.items():
             try:
-                result = await self._do_convert(page, workflow_data)
-                # Recovered — page is healthy again
-                await self._page_pool.put(page)
-                logger.info("Recovery successful, conversion completed on retry")
-                return result
-            except Exception as retry_error:
-                # Page is likely broken — discard it and create a replacement
-                logger.error("Recovery failed, replacing broken page")
-                await self._replace_page(page)
-                self._error_message = f"Conversion failed after retry: {str(retry_error)}"
-                logger.error(self._error_message)
-                raise RuntimeError(self._error_message) from retry_error
+                outcome = {"success": True, "workflow": await asyncio.shield(task)}
+            except Exception as e:
+                outcome = {"success": False, "error": str(e)}
+            for i in pending[cache_key]:
+                results[i] = outcome
 
-    async def _replace_page(self, broken_page) -> None:
-        """Discard a broken page and create a fresh replacement for the pool.
+        return results
+
+    async def _convert_chunk(self, workflows: List[dict], priority: str) -> List[dict]:
+        """Convert a chunk of workflows on one page, reporting page failures per item."""
+        try:
+            if self._workers is not None:
+                await self._ensure_ready()
+                with span("worker", CONVERSION_PHASES, label="total"):
+                    return await self._workers.call("convert_batch", workflows=workflows, priority=priority)
+            return await self.browser_convert_batch(workflows, priority)
+        except OverloadedError:
+            raise
+        except RuntimeError as e:
+            return [{"success": False, "error": str(e)} for _ in workflows]
+
+    async def _convert_uncached(self, workflow_data: dict, priority: str, cache_key: str) -> dict:
+        """Run a single conversion on a pooled page, here or in a worker."""
+        if self._workers is not None:
+            await self._ensure_ready()
+            with span("worker", CONVERSION_PHASES, label="total"):
+                return await self._workers.call("convert", workflow=workflow_data, priority=priority, key=cache_key)
+        return await self.browser_convert(workflow_data, priority, cache_key)
+
+    async def browser_convert(self, workflow_data: dict, priority: str = PRIORITY_INTERACTIVE,
+                              key: Optional[str] = None) -> dict:
+        """Convert a workflow on a page of this process, bypassing caches and the native converter.
 
-        If replacement fails, puts a sentinel None into the pool to prevent
-        deadlock, then triggers a full re-initialization on next request.
+        Raises:
+            OverloadedError: If no page could be had within the pool's admission limits.
+            RuntimeError: If browser is not available or conversion fails.
+        """
+        return await self._with_page(lambda page: self._do_convert(page, workflow_data), priority, key)
+
+    async def browser_convert_batch(self, workflows: List[dict], priority: str = PRIORITY_INTERACTIVE) -> List[dict]:
+        """Convert workflows on one page of this process, bypassing caches and the native converter.
+
+        Returns:
+            One result per input, as in convert_workflows.
+
+        Raises:
+            OverloadedError: If no page could be had within the pool's admission limits.
+            RuntimeError: If browser is not available or the page failed.
         """
+        return await self._with_page(lambda page: self._do_convert_batch(page, workflows), priority)
+
+    async def _with_page(self, operation, priority: str = PRIORITY_INTERACTIVE, key: Optional[str] = None):
+        """Run operation(page) on a pooled page, retrying once and replacing broken pages.
+
+        The page is requested with the given priority class and key (see PagePool.acquire).
+        """
+        # Ensure browser is initialized
+        await self._ensure_ready()
+        shard = self._pick_shard()
+        pool = shard.page_pool
+
+        with span("browser", CONVERSION_PHASES, label="total"):
+            # Acquire a page from the pool (blocks if all pages are busy)
+            with span("pool_wait", CONVERSION_PHASES):
+                page = await pool.acquire(priority, key)
+            try:
+                result = await operation(page)
+                # Page is healthy — return it to the pool
+                pool.release(page)
+                self._check_recycle(page)
+                return result
+            except Exception as first_error:
+                logger.warning(
+                    "Workflow conversion failed, attempting recovery: %s",
+                    str(first_error),
+                )
+                self._counters["retries"] += 1
+                # Recovery: force a full reload on retry so leftover state from
+                # the failed attempt cannot leak into it
+                self._page_reuses.pop(page, None)
+                try:
+                    result = await operation(page)
+                    # Recovered — page is healthy again
+                    pool.release(page)
+                    self._check_recycle(page)
+                    logger.info("Recovery successful, conversion completed on retry")
+                    return result
+                except Exception as retry_error:
+                    # Page is likely broken — discard it and create a replacement
+                    logger.error("Recovery failed, replacing broken page")
+                    await self._replace_page(shard, pool, page)
+                    self._error_message = f"Conversion failed after retry: {str(retry_error)}"
+                    logger.error(self._error_message)
+                    raise RuntimeError(self._error_message) from retry_error
+
+    async def _replace_page(self, shard: BrowserShard, pool: PagePool, broken_page) -> None:
+        """Discard a broken page and create a fresh replacement for its shard's pool.
+
+        If replacement fails, the shard is taken out of service and
+        restarted (see _fail_shard).
+        """
+        pool.remove(broken_page)
+        self._counters["page_replacements"] += 1
         try:
-            await broken_page.close()
+            await self._close_page(broken_page)
         except Exception:
             pass
+        if shard.page_pool is not pool:
+            # The shard was restarted meanwhile
+            return
 
         try:
             comfyui_url = self._get_comfyui_url()
-            new_page = await self._create_page(comfyui_url)
-            await self._page_pool.put(new_page)
-            logger.info("Replaced broken page with a fresh one")
+            new_page = await self._create_page(shard, comfyui_url)
         except Exception as e:
             logger.error("Failed to create replacement page: %s", str(e))
-            # Mark as needing re-initialization so the next request
-            # triggers a full browser restart instead of deadlocking.
-            self._status = BrowserStatus.ERROR
-            self._error_message = "Page pool degraded, will re-initialize on next request"
+            self._fail_shard(shard, "Page pool degraded")
+            return
+        if shard.page_pool is not pool:
+            await self._close_page(new_page)
+            return
+        pool.add(new_page)
+        logger.info("Replaced broken page with a fresh one")
 
-    async def _do_convert(self, page, workflow_data: dict) -> dict:
-        """Execute the actual conversion in a browser page.
+    def _check_recycle(self, page) -> None:
+        """Start recycling a page in the background if it crossed a threshold.
 
-        Reloads the page before each conversion to ensure a clean frontend state,
-        since ComfyUI extensions modify LiteGraph globals that persist across
-        graph instances.
+        Called after a page was returned to the pool; the page keeps serving
+        conversions until its replacement is ready.
         """
-        # Reload the page to reset frontend state before conversion
-        await page.reload(wait_until="domcontentloaded", timeout=30000)
-        await self._wait_for_comfyui_ready(page)
-
-        result = await page.evaluate(
-            """async (workflowData) => {
-                try {
-                    const graph = new window.LGraph();
-                    graph.configure(workflowData, false);
-                    const parsed = await window.__cpe_graphToPrompt(graph);
-                    return { success: true, workflow: parsed.output };
-                } catch (e) {
-                    return { success: false, error: e.message || String(e) };
-                }
-            }""",
-            workflow_data,
-        )
+        if page in self._recycling:
+            return
+        failed_at = self._recycle_failed.get(page)
+        if failed_at is not None and time.monotonic() - failed_at < RECYCLE_RETRY_INTERVAL:
+            return
+
+        conversions = self._page_conversions.get(page, 0)
+        reason = None
+        if self._max_page_conversions and conversions >= self._max_page_conversions:
+            reason = f"{conversions} conversions"
+        elif self._max_page_heap_bytes:
+            checked_at, heap = self._page_heap.get(page, (0, None))
+            if conversions - checked_at < HEAP_CHECK_EVERY:
+                return
+            self._page_heap[page] = (conversions, heap)
+        else:
+            return
+
+        self._recycling.add(page)
+        start_background(self._recycle_if_needed(page, reason))
 
+    async def _recycle_if_needed(self, page, reason: Optional[str]) -> None:
+        """Measure the page's JS heap unless a reason is given, and recycle it if needed."""
+        try:
+            if reason is None:
+                heap = await self._js_heap_used(page)
+                if heap is None or heap < self._max_page_heap_bytes:
+                    return
+                reason = f"JS heap of {heap / (1024 * 1024):.0f} MB"
+            await self._recycle_page(page, reason)
+        finally:
+            self._recycling.discard(page)
+
+    async def _js_heap_used(self, page) -> Optional[int]:
+        """Read a page's used JS heap size through CDP performance metrics, or None on failure."""
+        try:
+            session = self._cdp_sessions.get(page)
+            if session is None:
+                session = await page.context.new_cdp_session(page)
+                await session.send("Performance.enable")
+                self._cdp_sessions[page] = session
+            response = await session.send("Performance.getMetrics")
+        except Exception as e:
+            logger.debug("Could not read page performance metrics: %s", str(e))
+            self._cdp_sessions.pop(page, None)
+            return None
+
+        for metric in response.get("metrics", []):
+            if metric.get("name") == "JSHeapUsedSize":
+                heap = int(metric["value"])
+                self._page_heap[page] = (self._page_conversions.get(page, 0), heap)
+                return heap
+        return None
+
+    async def _recycle_page(self, old_page, reason: str) -> None:
+        """Replace a page that is still in service with a fresh one.
+
+        The new page joins the pool before the old one is retired, so the
+        pool never has fewer working pages. The old page is closed as soon
+        as the conversion using it (if any) returns it.
+        """
+        shard = self._page_shards.get(old_page)
+        if shard is None or shard.page_pool is None:
+            return
+        pool = shard.page_pool
+        try:
+            new_page = await self._create_page(shard, self._get_comfyui_url())
+        except Exception as e:
+            self._counters["recycle_failures"] += 1
+            self._recycle_failed[old_page] = time.monotonic()
+            logger.warning("Could not create a page to recycle one after %s: %s", reason, str(e))
+            return
+
+        if pool is not shard.page_pool or old_page not in pool.pages() or pool.is_retiring(old_page):
+            # The pool was restarted or the page discarded or retired meanwhile
+            await self._close_page(new_page)
+            return
+        pool.add(new_page)
+        pool.retire(old_page)
+        self._counters["page_recycles"] += 1
+        logger.info("Recycled page after %s", reason)
+
+    async def _reload_page(self, page) -> None:
+        """Reload a page to reset its frontend state and wait until it is usable."""
+        with span("reload", CONVERSION_PHASES):
+            await page.reload(wait_until="domcontentloaded", timeout=30000)
+        with span("ready_wait", CONVERSION_PHASES):
+            await self._wait_for_comfyui_ready(page)
+        self._counters["reloads"] += 1
+        if self._reset_mode == RESET_MODE_SNAPSHOT:
+            await page.evaluate(_TAKE_SNAPSHOT_SCRIPT)
+            self._page_reuses[page] = 0
+
+    def _can_reuse(self, page) -> bool:
+        """Whether a page may be reset by snapshot restore instead of a reload."""
+        if self._reset_mode != RESET_MODE_SNAPSHOT:
+            return False
+        uses = self._page_reuses.get(page)
+        return uses is not None and uses < self._max_page_reuses
+
+    async def _do_convert(self, page, workflow_data: dict) -> dict:
+        """Execute a single conversion in a browser page.
+
+        Raises:
+            RuntimeError: If the frontend fails to convert the workflow.
+        """
+        result = (await self._do_convert_batch(page, [workflow_data]))[0]
         if not result.get("success"):
             raise RuntimeError(f"JS conversion error: {result.get('error', 'Unknown error')}")
 
         return result["workflow"]
 
+    async def _do_convert_batch(self, page, workflows: List[dict]) -> List[dict]:
+        """Execute conversions in a browser page, in as few round-trips as possible.
+
+        Resets the page before conversion to ensure a clean frontend state,
+        since ComfyUI extensions modify LiteGraph globals that persist across
+        graph instances. In reload mode the page is reloaded first; in
+        snapshot mode the clean state is restored in place, falling back to a
+        reload when contamination is detected or the page hit its reuse limit.
+        In snapshot mode a batch is converted in one round-trip, restoring the
+        snapshot between workflows; in reload mode no snapshot is taken and
+        every workflow gets its own reload.
+        """
+        results: List[dict] = []
+        while len(results) < len(workflows):
+            restore = self._can_reuse(page)
+            if not restore:
+                await self._reload_page(page)
+
+            if self._reset_mode == RESET_MODE_SNAPSHOT:
+                pending = workflows[len(results):]
+            else:
+                pending = workflows[len(results):len(results) + 1]
+            with span("evaluate", CONVERSION_PHASES):
+                outcome = await page.evaluate(
+                    _CONVERT_BATCH_SCRIPT,
+                    {"workflows": pending, "restore": restore},
+                )
+            done = outcome["results"]
+            results.extend(done)
+            self._counters["conversions"] += len(done)
+            self._page_conversions[page] = self._page_conversions.get(page, 0) + len(done)
+            self._counters["snapshot_restores"] += outcome.get("restores", 0)
+            if page in self._page_reuses:
+                self._page_reuses[page] += len(done)
+
+            if outcome.get("contaminated"):
+                logger.info("Page state contaminated (%s), reloading", outcome.get("error"))
+                self._counters["contaminations"] += 1
+                self._page_reuses.pop(page, None)
+
+        return results
+
 
 # Singleton instance
 _browser_manager: Optional[HeadlessBrowserManager] = None
@@ -0,0 +1,338 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from . import jsonutil
+from .logger import get_logger
+
+logger = get_logger()
+
+
+def canonical_json(data: Any) -> bytes:
+    """Serialize data to a canonical JSON byte string (sorted keys, no whitespace)."""
+    return jsonutil.dumps(data, sort_keys=True)
+
+
+def workflow_cache_key(workflow_data: Any, fingerprint: str) -> str:
+    """Build a content-addressed cache key for a UI-format workflow.
+
+    Two workflows that differ only in key order or whitespace map to the
+    same key. The node registry fingerprint is mixed in so that installing
+    or removing node types never serves a stale conversion.
+    """
+    digest = hashlib.sha256()
+    digest.update(fingerprint.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(canonical_json(workflow_data))
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """In-memory LRU cache of converted workflows.
+
+    Bounded both by number of entries and by the approximate serialized
+    size of the cached results. Cached values are shared between callers
+    and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0 and self._max_bytes > 0
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached result for key, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry[0]
+
+    def put(self, key: str, result: dict) -> None:
+        """Store a conversion result, evicting least recently used entries as needed."""
+        if not self.enabled:
+            return
+
+        size = len(canonical_json(result))
+        if size > self._max_bytes:
+            logger.info(
+                "Conversion result of %d bytes exceeds cache budget, not caching", size
+            )
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+
+        self._entries[key] = (result, size)
+        self._bytes += size
+
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached entries (counters are kept)."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self._max_entries,
+            "max_bytes": self._max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class FileHashCache:
+    """Content hashes of files, valid while a file's mtime and size are unchanged.
+
+    Lets a caller derive a file's content hash from a stat alone, e.g. to
+    answer a conditional request without reading the file.
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, path: str, mtime_ns: int, size: int) -> Optional[str]:
+        """Return the recorded hash of a file if it still has this mtime and size."""
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != mtime_ns or entry[1] != size:
+            return None
+        self._entries.move_to_end(path)
+        return entry[2]
+
+    def put(self, path: str, mtime_ns: int, size: int, content_hash: str) -> None:
+        """Record the hash of a file's content at the given mtime and size."""
+        if self._max_entries <= 0:
+            return
+        self._entries.pop(path, None)
+        self._entries[path] = (mtime_ns, size, content_hash)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+class DiskConversionCache:
+    """Persistent cache of converted workflows, keyed by workflow file.
+
+    Each workflow file maps to one entry file holding a metadata header line
+    (relative path, mtime, size, content hash, node fingerprint) followed by
+    the converted API-format JSON. An entry is valid when the fingerprint
+    matches and either the file's mtime and size are unchanged, or its
+    content hash is unchanged (e.g. the file was touched or copied back).
+    Entries survive restarts; the directory is trimmed oldest-first when it
+    grows beyond max_bytes.
+
+    Thread-safe: the routes call it from the I/O executor.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        # Guards the counters, the size total and replacing or trimming entries
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    def _entry_path(self, relpath: str) -> str:
+        name = hashlib.sha256(relpath.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self._cache_dir, name + ".json")
+
+    def _read_header(self, entry_path: str) -> Optional[dict]:
+        try:
+            with open(entry_path, "rb") as f:
+                return jsonutil.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+
+    def content_hash(self, relpath: str, mtime_ns: int, size: int) -> Optional[str]:
+        """Return the content hash recorded for a workflow file, if it is unchanged on disk.
+
+        Only reads the entry's header line. The hash stays valid across node
+        registry changes, so the fingerprint is not checked.
+        """
+        if not self.enabled:
+            return None
+        header = self._read_header(self._entry_path(relpath))
+        if (
+            header is None
+            or header.get("path") != relpath
+            or header.get("mtime_ns") != mtime_ns
+            or header.get("size") != size
+        ):
+            return None
+        return header.get("sha256")
+
+    def get(
+        self,
+        relpath: str,
+        fingerprint: str,
+        mtime_ns: int,
+        size: int,
+        content_hash: Optional[str] = None,
+    ) -> Optional[dict]:
+        """Return the cached conversion for a workflow file, or None.
+
+        Pass content_hash to also accept entries whose file was modified
+        on disk without its content changing. A lookup without content_hash
+        is a stat-only pre-check, so only lookups with a hash count misses.
+        """
+        if not self.enabled:
+            return None
+
+        entry_path = self._entry_path(relpath)
+        header = self._read_header(entry_path)
+        valid = (
+            header is not None
+            and header.get("path") == relpath
+            and header.get("fingerprint") == fingerprint
+            and (
+                (header.get("mtime_ns") == mtime_ns and header.get("size") == size)
+                or (content_hash is not None and header.get("sha256") == content_hash)
+            )
+        )
+        if not valid:
+            if content_hash is not None:
+                with self._lock:
+                    self._misses += 1
+            return None
+
+        try:
+            with open(entry_path, "rb") as f:
+                f.readline()
+                result = jsonutil.loads(f.read())
+            # Bump the mtime so trimming evicts least recently used entries first
+            os.utime(entry_path)
+        except (OSError, ValueError) as e:
+            logger.warning("Discarding unreadable disk cache entry for %s: %s", relpath, str(e))
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+        return result
+
+    def put(
+        self,
+        relpath: str,
+        fingerprint: str,
+        mtime_ns: int,
+        size: int,
+        content_hash: str,
+        result: dict,
+    ) -> None:
+        """Store a conversion result for a workflow file, replacing any older entry."""
+        if not self.enabled:
+            return
+
+        header = {
+            "path": relpath,
+            "fingerprint": fingerprint,
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "sha256": content_hash,
+        }
+        data = jsonutil.dumps(header) + b"\n" + jsonutil.dumps(result)
+        if len(data) > self._max_bytes:
+            return
+
+        entry_path = self._entry_path(relpath)
+        os.makedirs(self._cache_dir, exist_ok=True)
+        # A temporary file of its own, so concurrent puts of one entry do not collide
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock:
+                self._ensure_total()
+                try:
+                    self._total_bytes -= os.path.getsize(entry_path)
+                except OSError:
+                    pass
+                os.replace(tmp_path, entry_path)
+                self._total_bytes += len(data)
+
+                if self._total_bytes > self._max_bytes:
+                    self._trim()
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _ensure_total(self) -> None:
+        if self._total_bytes is not None:
+            return
+        total = 0
+        try:
+            with os.scandir(self._cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(".json"):
+                        total += entry.stat().st_size
+        except OSError:
+            pass
+        self._total_bytes = total
+
+    def _trim(self) -> None:
+        """Delete least recently used entries until the cache fits its size cap.
+
+        Called with the lock held.
+        """
+        entries = []
+        with os.scandir(self._cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        # Read without the lock, so the event loop never waits for a trim
+        hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            "bytes": self._total_bytes,
+            "max_bytes": self._max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
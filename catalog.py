@@ -0,0 +1,319 @@
+import asyncio
+import os
+import posixpath
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import fileio
+from .logger import get_logger
+from .tracing import start_background
+
+logger = get_logger()
+
+# Sort keys accepted by WorkflowCatalog.query()
+SORT_KEYS = ("filename", "modified", "size")
+
+# How a catalog notices changes to the workflows directory:
+#   "auto" - filesystem events via watchdog when installed, else polling
+#   "poll" - rescan the directory tree periodically
+WATCHER_AUTO = "auto"
+WATCHER_POLL = "poll"
+
+# Polls only relist directories whose mtime changed, which misses files
+# modified in place; every this many polls the whole tree is relisted
+FULL_RESCAN_EVERY = 12
+
+
+def _scan_dir(root: str, rel_dir: str) -> Tuple[Dict[str, Tuple[int, float]], List[str]]:
+    """List one directory: its .json files as relpath -> (size, mtime), and its subdirectories.
+
+    Hidden entries are skipped like glob does. Paths are relative to root
+    and use "/" separators.
+
+    Raises:
+        OSError: If the directory cannot be listed.
+    """
+    files: Dict[str, Tuple[int, float]] = {}
+    subdirs: List[str] = []
+    with os.scandir(os.path.join(root, rel_dir.replace("/", os.sep))) as it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            relpath = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir():
+                    subdirs.append(relpath)
+                elif entry.name.endswith(".json") and entry.is_file():
+                    st = entry.stat()
+                    files[relpath] = (st.st_size, st.st_mtime)
+            except OSError:
+                continue
+    return files, subdirs
+
+
+class WorkflowCatalog:
+    """Index of the workflow files under a directory.
+
+    The tree is scanned once on the I/O executor, then kept current by a
+    watcher: filesystem events through the optional watchdog package where
+    available, otherwise polling. A poll stats every directory and relists
+    only those whose mtime changed. Queries are answered from
+    memory. Every change bumps a version, exposed as an opaque token that
+    lets clients detect changes without fetching the list.
+
+    The index is updated from watcher threads, so it is guarded by a lock.
+    """
+
+    def __init__(self, root: str, watcher: str = WATCHER_AUTO, poll_interval: float = 5.0):
+        self._root = root
+        self._watcher_mode = watcher
+        self._poll_interval = max(0.5, poll_interval)
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        # Directory relpath ("" for the root) -> (mtime_ns, subdirectories)
+        # as of the last scan; only used by scans, which _scan_lock serializes
+        self._dirs: Dict[str, Tuple[int, List[str]]] = {}
+        self._scan_lock = threading.Lock()
+        self._version = 0
+        # Token prefix unique to this process, so tokens never repeat across restarts
+        self._generation = uuid.uuid4().hex[:8]
+        # Sorted filename lists per sort key, valid for the current version
+        self._sorted: Dict[str, List[str]] = {}
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._started = False
+        self._observer = None
+        self._poller: Optional[asyncio.Task] = None
+        self._watcher: Optional[str] = None
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def token(self) -> str:
+        """Opaque token that changes whenever the set of files or their metadata changes."""
+        return f"{self._generation}-{self._version}"
+
+    async def start(self) -> None:
+        """Build the index and start watching (only the first call does anything)."""
+        if self._started:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            await fileio.run_io(self.rescan)
+            self._start_watcher()
+            self._started = True
+            logger.info(
+                "Workflow catalog indexed %d files, watching with %s",
+                len(self._entries), self._watcher,
+            )
+
+    def _start_watcher(self) -> None:
+        if self._watcher_mode == WATCHER_AUTO:
+            try:
+                from watchdog.observers import Observer
+                observer = Observer()
+                observer.schedule(_EventHandler(self), self._root, recursive=True)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+                self._watcher = "events"
+                return
+            except ImportError:
+                pass
+            except Exception as e:
+                logger.warning("Could not watch workflow directory, polling instead: %s", str(e))
+        self._poller = start_background(self._poll())
+        self._watcher = "poll"
+
+    async def _poll(self) -> None:
+        polls = 0
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            polls += 1
+            try:
+                if polls % FULL_RESCAN_EVERY == 0:
+                    await fileio.run_io(self.rescan)
+                else:
+                    await fileio.run_io(self.rescan_changed)
+            except Exception as e:
+                logger.warning("Workflow catalog rescan failed: %s", str(e))
+
+    def rescan(self) -> None:
+        """Relist the whole tree (blocking) and update the index if anything changed."""
+        self._scan(force=True)
+
+    def rescan_changed(self) -> None:
+        """Relist only directories whose mtime changed since the last scan (blocking).
+
+        Adding, removing or renaming a file changes its directory's mtime;
+        modifying a file in place does not and is only seen by rescan().
+        """
+        self._scan(force=False)
+
+    def _scan(self, force: bool) -> None:
+        with self._scan_lock:
+            os.makedirs(self._root, exist_ok=True)
+            dirs: Dict[str, Tuple[int, List[str]]] = {}
+            # Directories relisted in this scan, with their files
+            listed: Dict[str, Dict[str, Tuple[int, float]]] = {}
+            stack = [""]
+            while stack:
+                rel_dir = stack.pop()
+                try:
+                    # Taken before listing, so changes made meanwhile show up next time
+                    mtime = os.stat(os.path.join(self._root, rel_dir.replace("/", os.sep))).st_mtime_ns
+                except OSError:
+                    continue
+                known = None if force else self._dirs.get(rel_dir)
+                if known is not None and known[0] == mtime:
+                    subdirs = known[1]
+                else:
+                    try:
+                        listed[rel_dir], subdirs = _scan_dir(self._root, rel_dir)
+                    except OSError as e:
+                        logger.warning("Could not scan workflow directory %s: %s", rel_dir or self._root, str(e))
+                        listed[rel_dir] = {}
+                        continue
+                dirs[rel_dir] = (mtime, subdirs)
+                stack.extend(subdirs)
+
+            stale = listed.keys() | (self._dirs.keys() - dirs.keys())
+            self._dirs = dirs
+            if not stale:
+                return
+            with self._lock:
+                entries = {
+                    name: entry for name, entry in self._entries.items()
+                    if posixpath.dirname(name) not in stale
+                }
+                for files in listed.values():
+                    entries.update(files)
+                if entries != self._entries:
+                    self._entries = entries
+                    self._changed()
+
+    def refresh_file(self, relpath: str) -> None:
+        """Re-stat one file (blocking), adding, updating or removing its entry."""
+        relpath = relpath.replace(os.sep, "/")
+        if not relpath.endswith(".json") or any(part.startswith(".") for part in relpath.split("/")):
+            return
+        try:
+            st = os.stat(os.path.join(self._root, relpath.replace("/", os.sep)))
+            entry: Optional[Tuple[int, float]] = (st.st_size, st.st_mtime)
+        except OSError:
+            entry = None
+        with self._lock:
+            if entry is None:
+                if self._entries.pop(relpath, None) is not None:
+                    self._changed()
+            elif self._entries.get(relpath) != entry:
+                self._entries[relpath] = entry
+                self._changed()
+
+    def _changed(self) -> None:
+        # Called with the lock held
+        self._version += 1
+        self._sorted = {}
+
+    def query(
+        self,
+        prefix: Optional[str] = None,
+        folder: Optional[str] = None,
+        sort: str = "filename",
+        descending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Return one page of matching workflows with the total count and change token.
+
+        Args:
+            prefix: Only include filenames starting with this string.
+            folder: Only include files inside this folder (at any depth).
+            sort: One of SORT_KEYS.
+            descending: Reverse the sort order.
+            offset: Number of matching entries to skip.
+            limit: Maximum number of entries to return (None for all).
+
+        Raises:
+            ValueError: If sort is not one of SORT_KEYS.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        if folder:
+            folder_prefix = folder.strip("/") + "/"
+            prefix = folder_prefix + prefix if prefix else folder_prefix
+
+        with self._lock:
+            names = self._sorted.get(sort)
+            if names is None:
+                names = self._sort(sort)
+                self._sorted[sort] = names
+            entries = self._entries
+            token = self.token
+
+            if prefix:
+                names = [name for name in names if name.startswith(prefix)]
+            if descending:
+                names = names[::-1]
+            total = len(names)
+            end = None if limit is None else offset + limit
+            workflows = [
+                {"filename": name, "size": entries[name][0], "modified": entries[name][1]}
+                for name in names[offset:end]
+            ]
+
+        return {"workflows": workflows, "total": total, "token": token}
+
+    def _sort(self, sort: str) -> List[str]:
+        if sort == "filename":
+            return sorted(self._entries)
+        index = 1 if sort == "modified" else 0
+        return sorted(self._entries, key=lambda name: (self._entries[name][index], name))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "files": len(self._entries),
+            "token": self.token,
+            "watcher": self._watcher,
+        }
+
+    def close(self) -> None:
+        """Stop watching the directory."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        self._started = False
+
+
+class _EventHandler:
+    """watchdog event handler that keeps a WorkflowCatalog current.
+
+    Duck-typed rather than subclassing FileSystemEventHandler, so this
+    module imports without watchdog installed.
+    """
+
+    def __init__(self, catalog: WorkflowCatalog):
+        self._catalog = catalog
+
+    def dispatch(self, event) -> None:
+        try:
+            if event.is_directory:
+                # A folder was created, moved or deleted: files came or went in bulk
+                if event.event_type != "modified":
+                    self._catalog.rescan()
+                return
+            for path in (event.src_path, getattr(event, "dest_path", None)):
+                if path:
+                    relpath = os.path.relpath(os.fsdecode(path), self._catalog.root)
+                    if not relpath.startswith(".."):
+                        self._catalog.refresh_file(relpath)
+        except Exception as e:
+            logger.warning("Error handling workflow directory event: %s", str(e))
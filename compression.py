@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from . import fileio
+
+# Content codings by preference; brotli and zstd are optional packages
+_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+
+try:
+    import zstandard
+    # ZstdCompressor is not thread-safe, so compress through a fresh one per call
+    _COMPRESSORS["zstd"] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+except ImportError:
+    pass
+
+try:
+    import brotli
+    _COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=5)
+except ImportError:
+    pass
+
+_COMPRESSORS["gzip"] = lambda data: gzip.compress(data, compresslevel=6)
+
+
+def available_encodings() -> list:
+    """Content codings this process can produce, most preferred first."""
+    return list(_COMPRESSORS)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the content coding for a response from an Accept-Encoding header.
+
+    Chooses the supported coding with the highest q-value, preferring
+    zstd over br over gzip on ties. Returns None for no compression.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best = None
+    best_q = 0.0
+    for encoding in _COMPRESSORS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class ResponseCompressor:
+    """Compresses response bodies off the event loop, remembering the results.
+
+    Bodies smaller than min_bytes are sent as is. Compressed bodies are
+    kept in an LRU cache keyed by the body's hash and the coding, bounded
+    by max_bytes, so a repeated response (typically a cached conversion
+    result) is compressed only once.
+    """
+
+    def __init__(self, min_bytes: int, max_bytes: int):
+        self.min_bytes = min_bytes
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._bytes = 0
+        # The cache is used from I/O executor threads
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+
+    async def compress(self, body: bytes, encoding: str) -> bytes:
+        """Compress body with the given content coding on the I/O executor."""
+        return await fileio.run_io(self._compress, body, encoding)
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        key = (hashlib.sha256(body).digest(), encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                self._bytes_in += len(body)
+                self._bytes_out += len(compressed)
+                return compressed
+
+        compressed = _COMPRESSORS[encoding](body)
+
+        with self._lock:
+            self._misses += 1
+            self._bytes_in += len(body)
+            self._bytes_out += len(compressed)
+            if len(compressed) <= self._max_bytes and key not in self._entries:
+                self._entries[key] = compressed
+                self._bytes += len(compressed)
+                while self._bytes > self._max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return compressed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "encodings": available_encodings(),
+                "min_bytes": self.min_bytes,
+                "cached_variants": len(self._entries),
+                "cached_bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "ratio": round(self._bytes_out / self._bytes_in, 4) if self._bytes_in else None,
+            }
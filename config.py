@@ -0,0 +1,61 @@
+import os
+from typing import Optional
+
+from .logger import get_logger
+
+logger = get_logger()
+
+# All settings are read from environment variables with this prefix,
+# e.g. CPE_CACHE_MAX_ENTRIES=512
+ENV_PREFIX = "CPE_"
+
+
+def _raw(name: str) -> Optional[str]:
+    value = os.environ.get(ENV_PREFIX + name)
+    if value is None or value.strip() == "":
+        return None
+    return value.strip()
+
+
+def get_int(name: str, default: int) -> int:
+    """Read an integer setting, falling back to default on missing/invalid values."""
+    value = _raw(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("Invalid integer for %s%s: %r, using %d", ENV_PREFIX, name, value, default)
+        return default
+
+
+def get_float(name: str, default: float) -> float:
+    """Read a float setting, falling back to default on missing/invalid values."""
+    value = _raw(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning("Invalid number for %s%s: %r, using %s", ENV_PREFIX, name, value, default)
+        return default
+
+
+def get_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting (1/true/yes/on or 0/false/no/off)."""
+    value = _raw(name)
+    if value is None:
+        return default
+    lowered = value.lower()
+    if lowered in ("1", "true", "yes", "on"):
+        return True
+    if lowered in ("0", "false", "no", "off"):
+        return False
+    logger.warning("Invalid boolean for %s%s: %r, using %s", ENV_PREFIX, name, value, default)
+    return default
+
+
+def get_str(name: str, default: str) -> str:
+    """Read a string setting."""
+    value = _raw(name)
+    return default if value is None else value
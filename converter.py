@@ -0,0 +1,375 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from . import fileio, registry
+from .logger import get_logger
+
+logger = get_logger()
+
+# LiteGraph node modes skipped by graphToPrompt
+MODE_NEVER = 2
+MODE_BYPASS = 4
+
+# Frontend-only node types handled natively
+REROUTE_NODE = "Reroute"
+PRIMITIVE_NODE = "PrimitiveNode"
+NOTE_NODES = ("Note", "MarkdownNote")
+
+# Core nodes whose widgets serialize through frontend code
+BROWSER_ONLY_NODES = frozenset({"WebcamCapture"})
+
+# Widget value types created from a node's input spec
+WIDGET_TYPES = frozenset({"INT", "FLOAT", "STRING", "BOOLEAN", "COMBO"})
+
+# Values of the "control after generate" widget added after seed widgets
+CONTROL_VALUES = frozenset({"fixed", "increment", "decrement", "randomize"})
+SEED_WIDGET_NAMES = ("seed", "noise_seed")
+
+# Input options that add an upload button widget to the node
+UPLOAD_OPTIONS = ("image_upload", "video_upload", "audio_upload", "animated_image_upload")
+
+# Widget slot kinds in a node's widgets_values
+_SLOT_WIDGET = "widget"
+_SLOT_CONTROL = "control"
+_SLOT_UPLOAD = "upload"
+
+
+class UnsupportedWorkflowError(Exception):
+    """Raised when a workflow needs the browser frontend to be converted."""
+
+
+class NativeConverter:
+    """Converts UI-format workflows to API format without a browser.
+
+    Mirrors graphToPrompt in js/utils.js using ComfyUI's node definitions
+    to map widgets_values to input names. It handles reroutes, primitive
+    nodes, notes, muted and bypassed nodes and __value__ wrapping of array
+    widget values. Anything it cannot reproduce exactly (group nodes,
+    subgraphs, unknown node types, nodes from packages with frontend JS,
+    dynamic prompts, widget layouts that do not match the definition)
+    raises UnsupportedWorkflowError so the caller can use the browser.
+
+    Node definitions are read off the event loop by load_definitions(),
+    which must be awaited for a workflow before convert() is called on it.
+    """
+
+    def __init__(self):
+        # Parsed widget specs per node type: list of (name, type, options),
+        # or the reason the node type cannot be converted natively
+        self._widget_specs: Dict[str, Any] = {}
+        # Bumped by reset(), so definitions loaded meanwhile are dropped
+        self._generation = 0
+
+    def reset(self) -> None:
+        """Forget parsed node definitions (call when the node registry changes)."""
+        self._widget_specs.clear()
+        self._generation += 1
+
+    async def load_definitions(self, workflows: List[Any]) -> None:
+        """Parse the definitions of node types in workflows that were not seen yet.
+
+        Node definitions come from each class's INPUT_TYPES(), which custom
+        nodes may implement with file or network access, so they are read
+        on the I/O executor. convert() only uses definitions loaded here.
+        """
+        class_types = set()
+        for workflow in workflows:
+            nodes = workflow.get("nodes") if isinstance(workflow, dict) else None
+            for node in nodes if isinstance(nodes, list) else []:
+                class_type = node.get("type") if isinstance(node, dict) else None
+                if isinstance(class_type, str) and class_type not in self._widget_specs:
+                    class_types.add(class_type)
+        class_types -= {REROUTE_NODE, PRIMITIVE_NODE, *NOTE_NODES}
+        if not class_types:
+            return
+
+        generation = self._generation
+        specs = await fileio.run_io(_load_widget_specs, class_types)
+        if generation == self._generation:
+            self._widget_specs.update(specs)
+
+    def _get_widget_specs(self, class_type: str) -> List[Tuple[str, str, dict]]:
+        specs = self._widget_specs.get(class_type)
+        if specs is None:
+            raise UnsupportedWorkflowError(f"Definition of {class_type} is not loaded")
+        if isinstance(specs, str):
+            raise UnsupportedWorkflowError(specs)
+        return specs
+
+    def _widget_layouts(self, specs: List[Tuple[str, str, dict]]) -> List[List[tuple]]:
+        """Candidate layouts of widgets_values for a node's widget specs.
+
+        Seed widgets are followed by a control widget. An upload button
+        widget sits after its combo or at the end of the list, or may be
+        missing entirely in older workflows.
+        """
+        base = []
+        upload_after = None
+        for name, input_type, options in specs:
+            base.append((_SLOT_WIDGET, name, input_type, options))
+            if options.get("control_after_generate") or (
+                input_type == "INT" and name in SEED_WIDGET_NAMES
+            ):
+                base.append((_SLOT_CONTROL,))
+            if upload_after is None and any(options.get(o) for o in UPLOAD_OPTIONS):
+                upload_after = len(base)
+
+        layouts = [base]
+        if upload_after is not None:
+            layouts.append(base[:upload_after] + [(_SLOT_UPLOAD,)] + base[upload_after:])
+            layouts.append(base + [(_SLOT_UPLOAD,)])
+        return layouts
+
+    def _widget_inputs(self, node: dict) -> Dict[str, Any]:
+        """Map a node's widgets_values to API inputs, mirroring widget serialization."""
+        class_type = node["type"]
+        specs = self._get_widget_specs(class_type)
+        values = node.get("widgets_values")
+        if values is None:
+            values = []
+        if not isinstance(values, list):
+            raise UnsupportedWorkflowError(f"{class_type} stores widget values as an object")
+
+        for layout in self._widget_layouts(specs):
+            if len(layout) != len(values):
+                continue
+            inputs = {}
+            for slot, value in zip(layout, values):
+                kind = slot[0]
+                if kind == _SLOT_CONTROL:
+                    if value not in CONTROL_VALUES:
+                        break
+                elif kind == _SLOT_UPLOAD:
+                    if not isinstance(value, str):
+                        break
+                else:
+                    _, name, input_type, options = slot
+                    if (
+                        input_type == "STRING"
+                        and options.get("dynamicPrompts")
+                        and isinstance(value, str)
+                        and ("{" in value or "/*" in value or "//" in value)
+                    ):
+                        raise UnsupportedWorkflowError(
+                            f"{class_type}.{name} uses dynamic prompt syntax"
+                        )
+                    inputs[name] = wrap_value(value)
+            else:
+                return inputs
+
+        raise UnsupportedWorkflowError(
+            f"widgets_values of {class_type} do not match its definition"
+        )
+
+    def convert(self, workflow: dict) -> dict:
+        """Convert a UI-format workflow to API format.
+
+        Raises:
+            UnsupportedWorkflowError: If the workflow needs the browser.
+        """
+        if not isinstance(workflow, dict) or not isinstance(workflow.get("nodes"), list):
+            raise UnsupportedWorkflowError("Not a UI-format workflow")
+        if (workflow.get("extra") or {}).get("groupNodes"):
+            raise UnsupportedWorkflowError("Workflow uses group nodes")
+        if (workflow.get("definitions") or {}).get("subgraphs"):
+            raise UnsupportedWorkflowError("Workflow uses subgraphs")
+
+        nodes = {}
+        for node in workflow["nodes"]:
+            if not isinstance(node, dict) or "id" not in node or "type" not in node:
+                raise UnsupportedWorkflowError("Malformed node in workflow")
+            nodes[node["id"]] = node
+
+        links = {}
+        for link in workflow.get("links") or []:
+            try:
+                if isinstance(link, dict):
+                    links[link["id"]] = (
+                        link["origin_id"], link["origin_slot"], link["target_id"], link["target_slot"]
+                    )
+                else:
+                    links[link[0]] = (link[1], link[2], link[3], link[4])
+            except (KeyError, IndexError, TypeError):
+                raise UnsupportedWorkflowError("Malformed link in workflow")
+
+        output = {}
+        for node in _execution_order(nodes, links):
+            class_type = node["type"]
+            if class_type in (REROUTE_NODE, PRIMITIVE_NODE) or class_type in NOTE_NODES:
+                continue
+            if node.get("mode") in (MODE_NEVER, MODE_BYPASS):
+                continue
+
+            inputs = self._widget_inputs(node)
+            for slot in node.get("inputs") or []:
+                link_id = slot.get("link")
+                if link_id is None:
+                    continue
+                resolved = _resolve_link(nodes, links, link_id, slot.get("type"))
+                if resolved is None:
+                    continue
+                origin, origin_slot = resolved
+                if origin.get("type") == PRIMITIVE_NODE:
+                    # applyToGraph copies the primitive's value into the widget
+                    widget_name = (slot.get("widget") or {}).get("name")
+                    primitive_values = origin.get("widgets_values") or []
+                    if widget_name and primitive_values:
+                        inputs[widget_name] = wrap_value(primitive_values[0])
+                    continue
+                inputs[slot["name"]] = [str(origin["id"]), int(origin_slot)]
+
+            output[str(node["id"])] = {
+                "inputs": inputs,
+                "class_type": class_type,
+                "_meta": {
+                    "title": node.get("title") or registry.get_node_display_name(class_type),
+                },
+            }
+
+        # Remove inputs connected to nodes that are not part of the prompt
+        for node_data in output.values():
+            node_inputs = node_data["inputs"]
+            for name in list(node_inputs):
+                value = node_inputs[name]
+                if isinstance(value, list) and len(value) == 2 and value[0] not in output:
+                    del node_inputs[name]
+
+        return output
+
+
+def _load_widget_specs(class_types: Set[str]) -> Dict[str, Any]:
+    """Parse the widget specs of node types (blocking: calls INPUT_TYPES()).
+
+    Returns specs per node type, or the reason a node type cannot be
+    converted natively.
+    """
+    loaded: Dict[str, Any] = {}
+    for class_type in class_types:
+        try:
+            loaded[class_type] = _parse_widget_specs(class_type)
+        except UnsupportedWorkflowError as e:
+            loaded[class_type] = str(e)
+        except Exception as e:
+            loaded[class_type] = f"Unrecognized definition of {class_type}: {e}"
+    return loaded
+
+
+def _parse_widget_specs(class_type: str) -> List[Tuple[str, str, dict]]:
+    if class_type in BROWSER_ONLY_NODES:
+        raise UnsupportedWorkflowError(f"{class_type} is serialized by the frontend")
+    if registry.node_has_frontend_extension(class_type):
+        raise UnsupportedWorkflowError(f"{class_type} comes from a package with frontend JS")
+    try:
+        input_types = registry.get_node_input_types(class_type)
+    except Exception as e:
+        raise UnsupportedWorkflowError(f"Could not read inputs of {class_type}: {e}")
+    if input_types is None:
+        raise UnsupportedWorkflowError(f"Unknown node type {class_type}")
+
+    specs = []
+    for section in ("required", "optional"):
+        for name, spec in (input_types.get(section) or {}).items():
+            if not isinstance(spec, (list, tuple)) or not spec:
+                raise UnsupportedWorkflowError(f"Unrecognized input spec {class_type}.{name}")
+            input_type = spec[0]
+            options = spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else {}
+            if isinstance(input_type, (list, tuple)):
+                input_type = "COMBO"
+            if input_type not in WIDGET_TYPES or options.get("forceInput"):
+                continue
+            specs.append((name, input_type, options))
+    return specs
+
+
+def wrap_value(value: Any) -> Any:
+    """Wrap array widget values so the backend does not mistake them for links."""
+    return {"__value__": value} if isinstance(value, list) else value
+
+
+def _input_origin(nodes: dict, links: dict, node: dict, input_index) -> Tuple[Optional[int], Optional[dict]]:
+    """Return (link_id, origin node) feeding a node's input, or (None, None)."""
+    node_inputs = node.get("inputs") or []
+    try:
+        input_index = int(input_index)
+    except (TypeError, ValueError):
+        return None, None
+    if not 0 <= input_index < len(node_inputs):
+        return None, None
+    link_id = node_inputs[input_index].get("link")
+    link = links.get(link_id)
+    if link is None:
+        return None, None
+    return link_id, nodes.get(link[0])
+
+
+def _resolve_link(nodes: dict, links: dict, link_id, input_type) -> Optional[Tuple[dict, int]]:
+    """Follow a link through reroutes and bypassed nodes to its real origin.
+
+    Mirrors the link traversal of graphToPrompt. Returns (origin node,
+    origin slot), or None when the input ends up unconnected.
+    """
+    link = links.get(link_id)
+    if link is None:
+        return None
+    parent = nodes.get(link[0])
+    if parent is None:
+        return None
+
+    seen = set()
+    while parent.get("type") == REROUTE_NODE or parent.get("mode") == MODE_BYPASS:
+        if parent["id"] in seen:
+            raise UnsupportedWorkflowError("Cycle through reroute or bypassed nodes")
+        seen.add(parent["id"])
+
+        if parent.get("type") == REROUTE_NODE:
+            link_id, origin = _input_origin(nodes, links, parent, link[1])
+            if link_id is None or origin is None:
+                return None
+            link, parent = links[link_id], origin
+            continue
+
+        # Bypassed node: pass through the first input matching the type
+        parent_inputs = parent.get("inputs") or []
+        candidates = [link[1]] + list(range(len(parent_inputs)))
+        for candidate in candidates:
+            if 0 <= candidate < len(parent_inputs) and parent_inputs[candidate].get("type") == input_type:
+                link_id, origin = _input_origin(nodes, links, parent, candidate)
+                if link_id is None or origin is None:
+                    return None
+                link, parent = links[link_id], origin
+                break
+        else:
+            # No matching input: left pointing at the bypassed node and pruned later
+            break
+
+    if parent.get("type") == PRIMITIVE_NODE:
+        return parent, 0
+    return parent, link[1]
+
+
+def _execution_order(nodes: dict, links: dict) -> List[dict]:
+    """Topologically order nodes so every node follows the nodes it reads from."""
+    pending = {node_id: 0 for node_id in nodes}
+    dependents: Dict[Any, List[Any]] = {node_id: [] for node_id in nodes}
+    for origin_id, _, target_id, _ in set(links.values()):
+        if origin_id in nodes and target_id in nodes:
+            pending[target_id] += 1
+            dependents[origin_id].append(target_id)
+
+    def sort_key(node_id):
+        return (nodes[node_id].get("order", 0), str(node_id))
+
+    ready = sorted((node_id for node_id, count in pending.items() if count == 0), key=sort_key)
+    ordered = []
+    while ready:
+        node_id = ready.pop(0)
+        ordered.append(nodes[node_id])
+        newly_ready = []
+        for target_id in dependents[node_id]:
+            pending[target_id] -= 1
+            if pending[target_id] == 0:
+                newly_ready.append(target_id)
+        ready.extend(sorted(newly_ready, key=sort_key))
+
+    if len(ordered) != len(nodes):
+        raise UnsupportedWorkflowError("Workflow graph contains a cycle")
+    return ordered
@@ -0,0 +1,60 @@
+import asyncio
+import functools
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from . import config
+
+# Default number of threads doing blocking file I/O for the routes
+DEFAULT_IO_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the shared executor for blocking file I/O, creating it on first use.
+
+    The executor has a fixed number of threads, so a burst of slow disk
+    operations queues up here instead of occupying the default executor
+    or the PromptServer event loop.
+    """
+    global _executor
+    if _executor is None:
+        workers = max(1, config.get_int("IO_WORKERS", DEFAULT_IO_WORKERS))
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cpe-io")
+    return _executor
+
+
+async def run_io(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking function on the I/O executor and await its result."""
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Write a file so readers see either the old or the new content, never a partial one.
+
+    The data goes to a hidden temporary file in the same directory, which
+    is flushed to disk and then renamed over the target.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix="." + os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
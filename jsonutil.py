@@ -0,0 +1,43 @@
+import json
+from typing import Any, Union
+
+# orjson is several times faster than the standard library for large
+# workflows; it is optional and used only when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def backend() -> str:
+    """Name of the JSON library in use."""
+    return "orjson" if orjson is not None else "json"
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON from bytes or a string.
+
+    Raises:
+        json.JSONDecodeError: If the data is not valid JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than json (e.g. it rejects NaN and
+            # Infinity); only reject what the standard library rejects too
+            pass
+    return json.loads(data)
+
+
+def dumps(data: Any, sort_keys: bool = False) -> bytes:
+    """Serialize data to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except TypeError:
+            # Values orjson cannot serialize, e.g. integers beyond 64 bits
+            pass
+    return json.dumps(
+        data, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
@@ -1,17 +1,33 @@
-import logging
-
-def get_logger(name='comfy-portal'):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    logger.propagate = False
-
-    # Avoid adding handlers if they already exist
-    if not logger.handlers:
-        # Create console handler with formatting
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('[comfy-portal-endpoint] [%(levelname)s] [%(filename)s:%(lineno)d] %(message)s')
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-
+import contextvars
+import logging
+
+# ID of the HTTP request being handled, set by the tracing module and
+# prefixed to every log line written while handling it
+current_request_id: contextvars.ContextVar = contextvars.ContextVar("cpe_request_id", default=None)
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        request_id = current_request_id.get()
+        record.request_id = f"[{request_id}] " if request_id else ""
+        return True
+
+
+def get_logger(name='comfy-portal'):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    # Avoid adding handlers if they already exist
+    if not logger.handlers:
+        # Create console handler with formatting
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        formatter = logging.Formatter(
+            '[comfy-portal-endpoint] [%(levelname)s] [%(filename)s:%(lineno)d] %(request_id)s%(message)s'
+        )
+        console_handler.setFormatter(formatter)
+        console_handler.addFilter(_RequestIdFilter())
+        logger.addHandler(console_handler)
+
     return logger 
\ No newline at end of file
@@ -0,0 +1,122 @@
+import bisect
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Exposition:
+    """Builds a response in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        """Start a metric family (all its samples must follow)."""
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def text(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self._help = help_text
+        self._label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def write(self, out: Exposition) -> None:
+        out.family(self.name, "counter", self._help)
+        for label_values, value in sorted(self._values.items()):
+            out.sample(self.name, value, dict(zip(self._label_names, label_values)))
+
+
+class Histogram:
+    """Latency histogram partitioned by a single label.
+
+    observe() is a bisect and three additions, cheap enough for the
+    conversion hot path.
+    """
+
+    def __init__(self, name: str, help_text: str, label_name: str,
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self._help = help_text
+        self._label_name = label_name
+        self._buckets = tuple(sorted(buckets))
+        # label value -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[str, list] = {}
+
+    def observe(self, label_value: str, seconds: float) -> None:
+        series = self._series.get(label_value)
+        if series is None:
+            series = [[0] * (len(self._buckets) + 1), 0.0, 0]
+            self._series[label_value] = series
+        series[0][bisect.bisect_left(self._buckets, seconds)] += 1
+        series[1] += seconds
+        series[2] += 1
+
+    def write(self, out: Exposition) -> None:
+        out.family(self.name, "histogram", self._help)
+        for label_value, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self._buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                out.sample(self.name + "_bucket", cumulative,
+                           {self._label_name: label_value, "le": _format_value(bound)})
+            out.sample(self.name + "_sum", total, {self._label_name: label_value})
+            out.sample(self.name + "_count", count, {self._label_name: label_value})
+
+
+# Time spent in each phase of a browser conversion: waiting for a pooled
+# page, reloading it, waiting for the frontend to be ready, running
+# graphToPrompt, and the whole conversion
+CONVERSION_PHASES = Histogram(
+    "cpe_conversion_phase_seconds",
+    "Duration of browser conversion phases",
+    "phase",
+)
+
+HTTP_REQUESTS = Counter(
+    "cpe_http_requests_total",
+    "HTTP requests handled by /cpe routes",
+    ("route", "status"),
+)
+
+HTTP_DURATION = Histogram(
+    "cpe_http_request_duration_seconds",
+    "Duration of /cpe route handlers",
+    "route",
+)
@@ -0,0 +1,434 @@
+import asyncio
+import collections
+import math
+import time
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+from .logger import get_logger
+from .tracing import start_background
+
+logger = get_logger()
+
+# Number of scaling decisions kept for /cpe/health
+SCALING_HISTORY = 20
+
+# Weight of the latest page hold time in the service time estimate
+SERVICE_TIME_SMOOTHING = 0.2
+
+# Priority classes of page requests, highest first
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+PRIORITY_PREFETCH = "prefetch"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND, PRIORITY_PREFETCH)
+
+
+class OverloadedError(RuntimeError):
+    """Raised when a request is not admitted to the page pool.
+
+    Attributes:
+        reason: QUEUE_FULL if too many requests were already waiting, or
+            TIMEOUT if no page became free within the wait deadline.
+        retry_after: Whole seconds after which a retry is likely to be
+            admitted, estimated from the measured service rate.
+    """
+
+    QUEUE_FULL = "queue_full"
+    TIMEOUT = "timeout"
+
+    def __init__(self, reason: str, retry_after: int, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """A request queued for a page."""
+
+    __slots__ = ("future", "priority", "key", "since")
+
+    def __init__(self, future: asyncio.Future, priority: str, key: Optional[Hashable]):
+        self.future = future
+        self.priority = priority
+        self.key = key
+        self.since = time.monotonic()
+
+
+class PagePool:
+    """Elastic pool of browser pages.
+
+    Keeps between min_size and max_size pages. A page is added when
+    requests queue up (scale_up_queue waiters) or when a request has
+    waited longer than scale_up_wait seconds. Pages idle for longer than
+    idle_timeout seconds are closed again, down to min_size.
+
+    Admission is bounded: with max_waiters set, a request that would queue
+    behind that many others is rejected immediately, and with wait_timeout
+    set, a request that gets no page within that many seconds is rejected
+    too. Both raise OverloadedError.
+
+    Waiting requests are served by priority class (PRIORITIES, highest
+    first) and in arrival order within a class. A request that has waited
+    longer than starvation_after seconds is served before any other, so
+    low priority work still progresses while high priority work keeps
+    arriving.
+
+    Pages are created and closed through the given callbacks, so the pool
+    knows nothing about Playwright itself.
+    """
+
+    def __init__(
+        self,
+        create_page: Callable[[], Awaitable[Any]],
+        close_page: Callable[[Any], Awaitable[None]],
+        min_size: int,
+        max_size: int,
+        scale_up_queue: int,
+        scale_up_wait: float,
+        idle_timeout: float,
+        max_waiters: int = 0,
+        wait_timeout: float = 0.0,
+        starvation_after: float = 0.0,
+    ):
+        self._create_page = create_page
+        self._close_page = close_page
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self._scale_up_queue = max(1, scale_up_queue)
+        self._scale_up_wait = scale_up_wait
+        self._idle_timeout = idle_timeout
+        # 0 means unbounded
+        self._max_waiters = max(0, max_waiters)
+        self._wait_timeout = max(0.0, wait_timeout)
+        self._starvation_after = max(0.0, starvation_after)
+
+        # Idle pages with the time they were released, most recent last
+        self._idle: Deque[Tuple[Any, float]] = collections.deque()
+        # Busy pages with the time they were handed out
+        self._busy: Dict[Any, float] = {}
+        # Busy pages to close instead of reusing once released
+        self._retiring: Set[Any] = set()
+        self._waiters: Dict[str, Deque[_Waiter]] = {
+            priority: collections.deque() for priority in PRIORITIES
+        }
+        # Per priority class: [requests served, total wait, longest wait, served by starvation guard]
+        self._class_stats: Dict[str, list] = {priority: [0, 0.0, 0.0, 0] for priority in PRIORITIES}
+        self._creating = 0
+        self._closed = False
+        self._reaper: Optional[asyncio.Task] = None
+        self._events: Deque[Dict[str, Any]] = collections.deque(maxlen=SCALING_HISTORY)
+        # Smoothed time a page is held per acquire, None until measured
+        self._service_time: Optional[float] = None
+        self._rejected: Dict[str, int] = {OverloadedError.QUEUE_FULL: 0, OverloadedError.TIMEOUT: 0}
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._busy)
+
+    @property
+    def busy(self) -> int:
+        return len(self._busy)
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    def pages(self) -> List[Any]:
+        """All pages currently owned by the pool (idle and busy)."""
+        return [page for page, _ in self._idle] + list(self._busy)
+
+    async def start(self) -> None:
+        """Create the minimum number of pages and start the idle reaper."""
+        for i in range(self.min_size):
+            logger.info("Loading ComfyUI page %d/%d...", i + 1, self.min_size)
+            page = await self._create_page()
+            self._idle.append((page, time.monotonic()))
+        if self._idle_timeout > 0:
+            self._reaper = start_background(self._reap_idle())
+
+    async def acquire(self, priority: str = PRIORITY_INTERACTIVE, key: Optional[Hashable] = None) -> Any:
+        """Take a page from the pool, waiting (and scaling up) if none is idle.
+
+        Args:
+            priority: Priority class of the request, one of PRIORITIES.
+            key: Optional identity of the request, so that promote() can
+                raise its priority while it waits.
+
+        Raises:
+            OverloadedError: If the wait queue is full or no page became
+                free within the wait deadline.
+            ValueError: If the priority class is unknown.
+        """
+        if priority not in self._waiters:
+            raise ValueError(f"Unknown priority: {priority}")
+        if self._closed:
+            raise RuntimeError("Page pool is closed")
+
+        if self._idle:
+            page, _ = self._idle.pop()
+            self._busy[page] = time.monotonic()
+            self._count_served(priority, 0.0, False)
+            return page
+
+        waiting = self.waiting
+        if self._max_waiters and waiting >= self._max_waiters:
+            self._rejected[OverloadedError.QUEUE_FULL] += 1
+            raise OverloadedError(
+                OverloadedError.QUEUE_FULL,
+                self.retry_after(self._queued_ahead(priority)),
+                f"Conversion queue is full ({waiting} requests waiting)",
+            )
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop.create_future(), priority, key)
+        self._waiters[priority].append(waiter)
+        if waiting + 1 >= self._scale_up_queue:
+            self._scale_up(f"{waiting + 1} requests queued")
+        timers = []
+        if self._scale_up_wait > 0:
+            timers.append(loop.call_later(self._scale_up_wait, self._on_wait_timeout, waiter))
+        if self._wait_timeout > 0:
+            timers.append(loop.call_later(self._wait_timeout, self._on_deadline, waiter))
+
+        future = waiter.future
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # A page was handed over just as the caller went away
+                self.release(future.result())
+            else:
+                self._discard_waiter(waiter)
+            raise
+        finally:
+            for timer in timers:
+                timer.cancel()
+
+    def promote(self, key: Hashable, priority: str) -> None:
+        """Raise waiting requests with the given key to at least the given priority.
+
+        Used when a higher priority request joins a conversion that is
+        already queued, so it does not wait at the lower priority.
+        """
+        rank = PRIORITIES.index(priority)
+        for lower in PRIORITIES[rank + 1:]:
+            for waiter in [w for w in self._waiters[lower] if w.key == key]:
+                self._waiters[lower].remove(waiter)
+                waiter.priority = priority
+                # Keep arrival order within the class
+                queue = self._waiters[priority]
+                index = len(queue)
+                while index > 0 and queue[index - 1].since > waiter.since:
+                    index -= 1
+                queue.insert(index, waiter)
+
+    def release(self, page: Any) -> None:
+        """Return a healthy page to the pool."""
+        if self._closed:
+            asyncio.ensure_future(self._close_quietly(page))
+            return
+        self._finish_hold(page)
+        if page in self._retiring:
+            self._retiring.discard(page)
+            asyncio.ensure_future(self._close_quietly(page))
+            return
+        self._hand_over(page)
+
+    def add(self, page: Any) -> None:
+        """Add a newly created page to the pool."""
+        self._hand_over(page)
+
+    def remove(self, page: Any) -> None:
+        """Forget a busy page that is being discarded (the caller closes it)."""
+        self._retiring.discard(page)
+        self._finish_hold(page)
+
+    def retire(self, page: Any) -> None:
+        """Take a page out of service and close it, right away if idle or else once released."""
+        for index, (idle_page, _) in enumerate(self._idle):
+            if idle_page == page:
+                del self._idle[index]
+                asyncio.ensure_future(self._close_quietly(page))
+                return
+        if page in self._busy:
+            self._retiring.add(page)
+
+    def is_retiring(self, page: Any) -> bool:
+        """Whether a page was retired and will be closed once released."""
+        return page in self._retiring
+
+    def _queued_ahead(self, priority: str) -> int:
+        """Requests that would be served before a new request of the given priority."""
+        rank = PRIORITIES.index(priority)
+        return sum(len(self._waiters[p]) for p in PRIORITIES[:rank + 1])
+
+    def _count_served(self, priority: str, waited: float, starved: bool) -> None:
+        stats = self._class_stats[priority]
+        stats[0] += 1
+        stats[1] += waited
+        stats[2] = max(stats[2], waited)
+        if starved:
+            stats[3] += 1
+
+    def _discard_waiter(self, waiter: _Waiter) -> None:
+        try:
+            self._waiters[waiter.priority].remove(waiter)
+        except ValueError:
+            pass
+
+    def retry_after(self, queued: int) -> int:
+        """Estimate in whole seconds until a request queued behind `queued` others gets a page."""
+        if self._service_time is None:
+            return 1
+        per_page = (queued + 1) * self._service_time / max(1, self.size)
+        return max(1, math.ceil(per_page))
+
+    def _finish_hold(self, page: Any) -> None:
+        since = self._busy.pop(page, None)
+        if since is None:
+            return
+        held = time.monotonic() - since
+        if self._service_time is None:
+            self._service_time = held
+        else:
+            self._service_time += SERVICE_TIME_SMOOTHING * (held - self._service_time)
+
+    def _next_waiter(self, now: float) -> Tuple[Optional[_Waiter], bool]:
+        """Pick the request to serve next and whether it was picked for having starved."""
+        heads = [queue[0] for queue in self._waiters.values() if queue]
+        if not heads:
+            return None, False
+        if self._starvation_after > 0:
+            oldest = min(heads, key=lambda waiter: waiter.since)
+            if now - oldest.since >= self._starvation_after and oldest is not heads[0]:
+                return oldest, True
+        # Heads are in PRIORITIES order
+        return heads[0], False
+
+    def _hand_over(self, page: Any) -> None:
+        now = time.monotonic()
+        while True:
+            waiter, starved = self._next_waiter(now)
+            if waiter is None:
+                break
+            self._waiters[waiter.priority].popleft()
+            if not waiter.future.done():
+                self._busy[page] = now
+                self._count_served(waiter.priority, now - waiter.since, starved)
+                waiter.future.set_result(page)
+                return
+        self._idle.append((page, now))
+
+    def _on_wait_timeout(self, waiter: _Waiter) -> None:
+        if not waiter.future.done():
+            self._scale_up(f"request waited over {self._scale_up_wait:g}s")
+
+    def _on_deadline(self, waiter: _Waiter) -> None:
+        if waiter.future.done():
+            return
+        self._discard_waiter(waiter)
+        self._rejected[OverloadedError.TIMEOUT] += 1
+        waiter.future.set_exception(OverloadedError(
+            OverloadedError.TIMEOUT,
+            self.retry_after(self._queued_ahead(waiter.priority)),
+            f"No page became free within {self._wait_timeout:g}s",
+        ))
+
+    def _scale_up(self, reason: str) -> None:
+        if self._closed or self.size + self._creating >= self.max_size:
+            return
+        # Pages already being created will serve the first waiters
+        if self._creating >= self.waiting:
+            return
+        self._creating += 1
+        start_background(self._grow(reason))
+
+    async def _grow(self, reason: str) -> None:
+        try:
+            page = await self._create_page()
+        except Exception as e:
+            self._creating -= 1
+            self._record("scale_up_failed", f"{reason}: {e}")
+            logger.error("Failed to add page to pool: %s", str(e))
+            return
+        self._creating -= 1
+        if self._closed:
+            await self._close_quietly(page)
+            return
+        self.add(page)
+        self._record("scale_up", reason)
+
+    async def _reap_idle(self) -> None:
+        interval = max(1.0, min(self._idle_timeout / 2, 30.0))
+        while not self._closed:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            # Oldest idle pages are at the left of the deque
+            while (
+                self._idle
+                and self.size > self.min_size
+                and now - self._idle[0][1] > self._idle_timeout
+            ):
+                page, _ = self._idle.popleft()
+                await self._close_quietly(page)
+                self._record("scale_down", f"idle for over {self._idle_timeout:g}s")
+
+    async def _close_quietly(self, page: Any) -> None:
+        try:
+            await self._close_page(page)
+        except Exception as e:
+            logger.warning("Error closing page: %s", str(e))
+
+    def _record(self, action: str, reason: str) -> None:
+        logger.info("Page pool %s (%s), now %d pages", action.replace("_", " "), reason, self.size)
+        self._events.append({
+            "time": time.time(),
+            "action": action,
+            "reason": reason,
+            "size": self.size,
+        })
+
+    async def close(self) -> None:
+        """Close every page and fail all waiting requests."""
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for queue in self._waiters.values():
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.future.done():
+                    waiter.future.set_exception(RuntimeError("Page pool was shut down"))
+        pages = self.pages()
+        self._idle.clear()
+        self._busy.clear()
+        self._retiring.clear()
+        for page in pages:
+            await self._close_quietly(page)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "busy": self.busy,
+            "retiring": len(self._retiring),
+            "creating": self._creating,
+            "waiting": self.waiting,
+            "min": self.min_size,
+            "max": self.max_size,
+            "max_waiting": self._max_waiters,
+            "wait_timeout": self._wait_timeout,
+            "rejected": dict(self._rejected),
+            "service_time_s": round(self._service_time, 4) if self._service_time is not None else None,
+            "starvation_after": self._starvation_after,
+            "classes": {
+                priority: {
+                    "waiting": len(self._waiters[priority]),
+                    "served": served,
+                    "avg_wait_s": round(total_wait / served, 4) if served else 0.0,
+                    "max_wait_s": round(max_wait, 4),
+                    "starved": starved,
+                }
+                for priority, (served, total_wait, max_wait, starved) in self._class_stats.items()
+            },
+            "recent_scaling": list(self._events),
+        }
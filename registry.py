@@ -0,0 +1,156 @@
+import hashlib
+import json
+from typing import Any, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger()
+
+
+def _describe(value: Any) -> str:
+    """JSON stand-in for values in node definitions that are not JSON (e.g. classes)."""
+    return type(value).__name__
+
+
+def _definition_spec(value: Any) -> Any:
+    """An input spec with combo option lists left out.
+
+    Options of combos such as checkpoint names change with the files on
+    disk, which does not change how workflows convert.
+    """
+    if isinstance(value, dict):
+        return {key: _definition_spec(item) for key, item in value.items() if key != "options"}
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (list, tuple)):
+            return ["COMBO", *[_definition_spec(item) for item in value[1:]]]
+        return [_definition_spec(item) for item in value]
+    return value
+
+
+def _node_definition(name: str, node_class: Any, display_names: dict) -> bytes:
+    """Serialized parts of a node class that the frontend builds its node from."""
+    try:
+        input_types = _definition_spec(node_class.INPUT_TYPES())
+    except Exception as e:
+        input_types = f"error: {type(e).__name__}"
+    definition = {
+        "input": input_types,
+        "output": getattr(node_class, "RETURN_TYPES", None),
+        "output_name": getattr(node_class, "RETURN_NAMES", None),
+        "output_is_list": getattr(node_class, "OUTPUT_IS_LIST", None),
+        "output_node": getattr(node_class, "OUTPUT_NODE", False),
+        "display_name": display_names.get(name),
+        "module": getattr(node_class, "RELATIVE_PYTHON_MODULE", None),
+    }
+    try:
+        return json.dumps(definition, sort_keys=True, default=_describe).encode("utf-8")
+    except (TypeError, ValueError):
+        pass
+    # Keys of mixed types cannot be sorted; keys that are not strings or
+    # numbers cannot be serialized at all
+    try:
+        return json.dumps(definition, default=_describe).encode("utf-8")
+    except (TypeError, ValueError):
+        return b"?"
+
+
+def compute_node_fingerprint() -> str:
+    """Compute a short fingerprint of the node types registered in ComfyUI.
+
+    The fingerprint changes whenever node types are added or removed, or
+    their definitions (inputs, outputs, display name, module) or the
+    frontend extension directories change, so it can be mixed into cache
+    keys to keep cached conversions from outliving the node registry they
+    were produced against. It calls every node's INPUT_TYPES(), so check
+    node_registry_signature() first where this runs repeatedly.
+
+    Returns:
+        A hex digest, or "unknown" if the node registry is not importable.
+    """
+    try:
+        import nodes
+    except ImportError:
+        logger.warning("ComfyUI node registry not available, using placeholder fingerprint")
+        return "unknown"
+
+    display_names = getattr(nodes, "NODE_DISPLAY_NAME_MAPPINGS", {})
+    digest = hashlib.sha256()
+    for name, node_class in sorted(nodes.NODE_CLASS_MAPPINGS.items()):
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(_node_definition(name, node_class, display_names))
+        digest.update(b"\n")
+    for package, directory in sorted(getattr(nodes, "EXTENSION_WEB_DIRS", {}).items()):
+        digest.update(f"{package}={directory}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def node_registry_signature() -> Optional[Tuple]:
+    """Cheap summary of the node registry for detecting that it may have changed.
+
+    Made of the registered names, the identity of their classes and the
+    frontend extension directories, so reloading or installing custom
+    nodes changes it. Only meaningful within one process.
+
+    Returns:
+        A hashable value, or None if the node registry is not importable.
+    """
+    try:
+        import nodes
+    except ImportError:
+        return None
+
+    return (
+        frozenset((name, id(node_class)) for name, node_class in nodes.NODE_CLASS_MAPPINGS.items()),
+        frozenset(getattr(nodes, "NODE_DISPLAY_NAME_MAPPINGS", {}).items()),
+        frozenset(getattr(nodes, "EXTENSION_WEB_DIRS", {}).items()),
+    )
+
+
+def read_node_registry() -> Tuple[Optional[Tuple], str]:
+    """Signature and fingerprint of the node registry, read together.
+
+    Blocking (see compute_node_fingerprint); run it off the event loop.
+    """
+    return node_registry_signature(), compute_node_fingerprint()
+
+
+def get_node_input_types(class_type: str) -> Optional[dict]:
+    """Return INPUT_TYPES() of a registered node class, or None if unknown."""
+    try:
+        import nodes
+    except ImportError:
+        return None
+
+    node_class = nodes.NODE_CLASS_MAPPINGS.get(class_type)
+    if node_class is None:
+        return None
+    return node_class.INPUT_TYPES()
+
+
+def get_node_display_name(class_type: str) -> str:
+    """Return the display name the frontend uses as a node's default title."""
+    try:
+        import nodes
+    except ImportError:
+        return class_type
+    return nodes.NODE_DISPLAY_NAME_MAPPINGS.get(class_type, class_type)
+
+
+def node_has_frontend_extension(class_type: str) -> bool:
+    """Whether a node comes from a custom node package that ships frontend JS.
+
+    Such extensions can change how a node's widgets serialize, so their
+    nodes can only be converted faithfully by the real frontend.
+    """
+    try:
+        import nodes
+    except ImportError:
+        return True
+
+    node_class = nodes.NODE_CLASS_MAPPINGS.get(class_type)
+    module = getattr(node_class, "RELATIVE_PYTHON_MODULE", None)
+    if not module or not module.startswith("custom_nodes."):
+        return False
+    package = module.split(".", 1)[1]
+    return package in getattr(nodes, "EXTENSION_WEB_DIRS", {})
@@ -0,0 +1,234 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set
+
+from . import registry
+from .cache import canonical_json
+from .converter import BROWSER_ONLY_NODES, wrap_value
+from .logger import get_logger
+
+logger = get_logger()
+
+# Node fields that only affect how the graph is drawn
+_LAYOUT_KEYS = frozenset({"pos", "size", "flags", "color", "bgcolor"})
+
+# String values the frontend may rewrite while converting (dynamic prompts)
+_DYNAMIC_PROMPT_MARKERS = ("{", "/*", "//")
+
+
+def _same(a: Any, b: Any) -> bool:
+    """JSON equality: 1, 1.0 and True are different values."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, (list, dict)):
+        return canonical_json(a) == canonical_json(b)
+    return a == b
+
+
+def _slots(values: Any) -> Dict[Hashable, Any]:
+    """Widget slots of a node's widgets_values: list indices or object keys."""
+    if isinstance(values, list):
+        return dict(enumerate(values))
+    if isinstance(values, dict):
+        return values
+    return {}
+
+
+def _shape(values: Any) -> Any:
+    if isinstance(values, dict):
+        return sorted(values)
+    return len(values) if isinstance(values, list) else None
+
+
+def topology_key(workflow: dict, fingerprint: str) -> str:
+    """Hash of a workflow with its widget values and layout left out.
+
+    Workflows with the same key have the same nodes, links, modes, types
+    and widget counts, so they convert to the same API structure.
+    """
+    stripped = dict(workflow)
+    stripped.pop("groups", None)
+    extra = stripped.get("extra")
+    if isinstance(extra, dict) and "ds" in extra:
+        stripped["extra"] = {key: value for key, value in extra.items() if key != "ds"}
+    stripped["nodes"] = [
+        {
+            **{key: value for key, value in node.items() if key not in _LAYOUT_KEYS and key != "widgets_values"},
+            "widgets_values": _shape(node.get("widgets_values")),
+        } if isinstance(node, dict) else node
+        for node in workflow.get("nodes") or []
+    ]
+
+    digest = hashlib.sha256()
+    digest.update(fingerprint.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(canonical_json(stripped))
+    return digest.hexdigest()
+
+
+class _Template:
+    """A browser conversion of one topology and what is known of its widget mapping."""
+
+    def __init__(self):
+        # Node id -> widgets_values of the last workflow converted in the browser
+        self.values: Dict[Any, Any] = {}
+        # API output of that workflow
+        self.output: Dict[str, Any] = {}
+        # Node id -> widget slot -> API input names whose value matched the
+        # slot's value in every conversion so far
+        self.candidates: Dict[Any, Dict[Hashable, Set[str]]] = {}
+
+    def learn(self, workflow: dict, output: dict) -> None:
+        for node in workflow["nodes"]:
+            node_id = node["id"]
+            values = node.get("widgets_values")
+            self.values[node_id] = values
+            entry = output.get(str(node_id))
+            inputs = entry.get("inputs", {}) if isinstance(entry, dict) else {}
+            # Inputs fed by a link take their value from elsewhere (e.g. a
+            # primitive node) even when it equals the widget's
+            linked = {
+                slot.get("name") for slot in node.get("inputs") or []
+                if isinstance(slot, dict) and slot.get("link") is not None
+            }
+
+            known = self.candidates.setdefault(node_id, {})
+            for slot, value in _slots(values).items():
+                wrapped = wrap_value(value)
+                names = {
+                    name for name, input_value in inputs.items()
+                    if name not in linked and _same(input_value, wrapped)
+                }
+                known[slot] = known[slot] & names if slot in known else names
+        self.output = output
+
+    def input_for(self, node_id: Any, slot: Hashable) -> Optional[str]:
+        """The API input a widget slot maps to, or None if that is not certain.
+
+        A slot is mapped when exactly one input has always had its value
+        and no other slot of the node could be the source of that input.
+        """
+        known = self.candidates.get(node_id) or {}
+        names = known.get(slot)
+        if not names or len(names) != 1:
+            return None
+        (name,) = names
+        for other, other_names in known.items():
+            if other != slot and name in other_names:
+                return None
+        return name
+
+
+class ConversionTemplates:
+    """Converts workflows by patching an earlier browser conversion of the same topology.
+
+    Users mostly change widget values (prompts, seeds, sampler settings)
+    on otherwise unchanged workflows. For each topology (see
+    topology_key) the last browser conversion is kept, together with the
+    mapping from widget slots to API inputs. The mapping is learned from
+    the conversions themselves: a slot maps to the input that has always
+    held its value, so it works for nodes whose definitions the native
+    converter cannot interpret. A workflow that differs from its template
+    only in mapped widget values is converted by copying those values
+    into the template's output, wrapped in __value__ where graphToPrompt
+    would wrap them. Any other change, including widget changes on nodes
+    from packages with frontend JS, needs the browser.
+
+    LRU-bounded by the number of topologies. Results share unchanged
+    parts with the template and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._templates: "OrderedDict[str, _Template]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    def learn(self, workflow: dict, output: dict, fingerprint: str) -> None:
+        """Record a browser conversion of a workflow."""
+        if not self.enabled or not isinstance(workflow, dict) or not isinstance(workflow.get("nodes"), list):
+            return
+        if not all(isinstance(node, dict) and "id" in node for node in workflow["nodes"]):
+            return
+        try:
+            key = topology_key(workflow, fingerprint)
+            template = self._templates.get(key)
+            if template is None:
+                template = _Template()
+                self._templates[key] = template
+                while len(self._templates) > self._max_entries:
+                    self._templates.popitem(last=False)
+            else:
+                self._templates.move_to_end(key)
+            template.learn(workflow, output)
+        except (TypeError, AttributeError) as e:
+            logger.debug("Not keeping a template of the workflow: %s", str(e))
+
+    def patch(self, workflow: dict, fingerprint: str) -> Optional[dict]:
+        """Convert a workflow from the template of its topology, or return None."""
+        if not self.enabled or not isinstance(workflow, dict) or not isinstance(workflow.get("nodes"), list):
+            return None
+        try:
+            key = topology_key(workflow, fingerprint)
+        except (TypeError, AttributeError):
+            return None
+        template = self._templates.get(key)
+        if template is None:
+            self._misses += 1
+            return None
+
+        output = dict(template.output)
+        for node in workflow["nodes"]:
+            node_id = node["id"]
+            base = _slots(template.values.get(node_id))
+            changed = {
+                slot: value for slot, value in _slots(node.get("widgets_values")).items()
+                if not _same(value, base.get(slot))
+            }
+            if not changed:
+                continue
+
+            # Frontend code of these nodes may derive inputs from several widgets
+            class_type = node.get("type")
+            entry = output.get(str(node_id))
+            if (
+                entry is None
+                or class_type in BROWSER_ONLY_NODES
+                or registry.node_has_frontend_extension(class_type)
+            ):
+                self._fallbacks += 1
+                return None
+            inputs = dict(entry["inputs"])
+            for slot, value in changed.items():
+                name = template.input_for(node_id, slot)
+                if name is None or (
+                    isinstance(value, str) and any(marker in value for marker in _DYNAMIC_PROMPT_MARKERS)
+                ):
+                    self._fallbacks += 1
+                    return None
+                inputs[name] = wrap_value(value)
+            output[str(node_id)] = {**entry, "inputs": inputs}
+
+        self._templates.move_to_end(key)
+        self._hits += 1
+        return output
+
+    def clear(self) -> None:
+        """Drop all templates (counters are kept)."""
+        self._templates.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses + self._fallbacks
+        return {
+            "entries": len(self._templates),
+            "max_entries": self._max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "fallbacks": self._fallbacks,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+        }
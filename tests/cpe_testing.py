@@ -0,0 +1,29 @@
+"""Pytest plugin: import the extension's modules without running __init__.py.
+
+The package's __init__.py installs Playwright and registers routes on
+ComfyUI's server, so the repository is registered as the "cpe" package
+without executing it, and tests import individual modules, e.g. cpe.cache.
+Loaded with -p (see pyproject.toml) rather than as a conftest, since a
+conftest next to __init__.py would itself import the package.
+"""
+import os
+import sys
+import types
+
+import pytest
+
+PACKAGE_NAME = "cpe"
+
+EXTENSION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [EXTENSION_DIR]
+    sys.modules[PACKAGE_NAME] = package
+
+
+def pytest_collect_directory(path, parent):
+    # Collected as a package, the extension directory would be imported
+    if str(path) == EXTENSION_DIR:
+        return pytest.Dir.from_parent(parent, path=path)
+    return None
@@ -0,0 +1,102 @@
+from cpe.cache import ConversionCache, FileHashCache, canonical_json, workflow_cache_key
+
+
+def test_cache_key_ignores_key_order_and_whitespace():
+    a = {"nodes": [{"id": 1, "type": "KSampler"}], "links": []}
+    b = {"links": [], "nodes": [{"type": "KSampler", "id": 1}]}
+    assert workflow_cache_key(a, "fp") == workflow_cache_key(b, "fp")
+    assert canonical_json(a) == canonical_json(b)
+
+
+def test_cache_key_depends_on_content_and_fingerprint():
+    workflow = {"nodes": [{"id": 1}]}
+    key = workflow_cache_key(workflow, "fp")
+    assert workflow_cache_key(workflow, "other") != key
+    assert workflow_cache_key({"nodes": [{"id": 2}]}, "fp") != key
+
+
+def test_get_and_put_count_hits_and_misses():
+    cache = ConversionCache(max_entries=4, max_bytes=1 << 20)
+    assert cache.get("a") is None
+    cache.put("a", {"1": {"class_type": "KSampler"}})
+    assert cache.get("a") == {"1": {"class_type": "KSampler"}}
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["bytes"] == len(canonical_json({"1": {"class_type": "KSampler"}}))
+
+
+def test_evicts_least_recently_used_entry():
+    cache = ConversionCache(max_entries=2, max_bytes=1 << 20)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    cache.get("a")
+    cache.put("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.get("c") == {"v": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_and_skips_oversized_results():
+    result = {"v": "x" * 10}
+    size = len(canonical_json(result))
+    cache = ConversionCache(max_entries=10, max_bytes=2 * size)
+    cache.put("a", result)
+    cache.put("b", result)
+    cache.put("c", result)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] == 2 * size
+
+    cache.put("big", {"v": "x" * (3 * size)})
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 2 * size
+
+
+def test_replacing_an_entry_keeps_byte_total():
+    cache = ConversionCache(max_entries=10, max_bytes=1 << 20)
+    cache.put("a", {"v": "long value"})
+    cache.put("a", {"v": 1})
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == len(canonical_json({"v": 1}))
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ConversionCache(max_entries=0, max_bytes=1 << 20)
+    assert not cache.enabled
+    cache.put("a", {"v": 1})
+    assert cache.get("a") is None
+
+
+def test_clear_keeps_counters():
+    cache = ConversionCache(max_entries=4, max_bytes=1 << 20)
+    cache.put("a", {"v": 1})
+    cache.get("a")
+    cache.clear()
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["hits"]) == (0, 0, 1)
+
+
+def test_file_hash_valid_while_stat_is_unchanged():
+    hashes = FileHashCache(max_entries=2)
+    hashes.put("a.json", 100, 10, "hash-a")
+    assert hashes.get("a.json", 100, 10) == "hash-a"
+    assert hashes.get("a.json", 101, 10) is None
+    assert hashes.get("a.json", 100, 11) is None
+    assert hashes.get("b.json", 100, 10) is None
+
+
+def test_file_hash_cache_is_bounded():
+    hashes = FileHashCache(max_entries=2)
+    hashes.put("a.json", 1, 1, "a")
+    hashes.put("b.json", 1, 1, "b")
+    hashes.get("a.json", 1, 1)
+    hashes.put("c.json", 1, 1, "c")
+    assert hashes.get("b.json", 1, 1) is None
+    assert hashes.get("a.json", 1, 1) == "a"
+
+    disabled = FileHashCache(max_entries=0)
+    disabled.put("a.json", 1, 1, "a")
+    assert disabled.get("a.json", 1, 1) is None
@@ -0,0 +1,168 @@
+import asyncio
+import os
+import types
+
+import pytest
+
+from cpe.catalog import WATCHER_POLL, WorkflowCatalog, _EventHandler
+
+
+def write(root, relpath, content="{}"):
+    path = root / relpath
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+def bump_mtime(path):
+    """Move a directory's mtime forward, so scans see it changed even on coarse clocks."""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def names(catalog, **kwargs):
+    return [entry["filename"] for entry in catalog.query(**kwargs)["workflows"]]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    write(tmp_path, "b.json", "{" + " " * 20 + "}")
+    write(tmp_path, "a.json")
+    write(tmp_path, "notes.txt")
+    write(tmp_path, ".hidden.json")
+    write(tmp_path, ".git/config.json")
+    write(tmp_path, "sub/c.json")
+    write(tmp_path, "sub/deep/d.json")
+    os.utime(tmp_path / "a.json", (1000, 1000))
+    os.utime(tmp_path / "b.json", (3000, 3000))
+    os.utime(tmp_path / "sub/c.json", (2000, 2000))
+    os.utime(tmp_path / "sub/deep/d.json", (4000, 4000))
+    return tmp_path
+
+
+def test_indexes_json_files_and_skips_hidden_entries(tree):
+    catalog = WorkflowCatalog(str(tree))
+    catalog.rescan()
+    assert names(catalog) == ["a.json", "b.json", "sub/c.json", "sub/deep/d.json"]
+    assert catalog.stats()["files"] == 4
+
+
+def test_query_sorts_filters_and_pages(tree):
+    catalog = WorkflowCatalog(str(tree))
+    catalog.rescan()
+
+    assert names(catalog, sort="modified") == ["a.json", "sub/c.json", "b.json", "sub/deep/d.json"]
+    assert names(catalog, sort="size", descending=True)[0] == "b.json"
+    assert names(catalog, folder="sub") == ["sub/c.json", "sub/deep/d.json"]
+    assert names(catalog, folder="/sub/", prefix="c") == ["sub/c.json"]
+    assert names(catalog, prefix="sub/d") == ["sub/deep/d.json"]
+
+    page = catalog.query(offset=1, limit=2)
+    assert [entry["filename"] for entry in page["workflows"]] == ["b.json", "sub/c.json"]
+    assert page["total"] == 4
+    assert page["workflows"][0]["size"] == 22
+
+    with pytest.raises(ValueError):
+        catalog.query(sort="name")
+
+
+def test_token_changes_only_when_files_change(tree):
+    catalog = WorkflowCatalog(str(tree))
+    catalog.rescan()
+    token = catalog.token
+    catalog.rescan()
+    assert catalog.token == token
+
+    write(tree, "e.json")
+    catalog.rescan()
+    assert catalog.token != token
+    assert WorkflowCatalog(str(tree)).token.split("-")[0] != token.split("-")[0]
+
+
+def test_rescan_changed_relists_changed_directories(tree):
+    catalog = WorkflowCatalog(str(tree))
+    catalog.rescan()
+
+    write(tree, "sub/deep/e.json")
+    (tree / "sub/c.json").unlink()
+    bump_mtime(tree / "sub")
+    bump_mtime(tree / "sub/deep")
+    catalog.rescan_changed()
+    assert names(catalog) == ["a.json", "b.json", "sub/deep/d.json", "sub/deep/e.json"]
+
+
+def test_rescan_changed_drops_removed_directories(tree):
+    catalog = WorkflowCatalog(str(tree))
+    catalog.rescan()
+
+    (tree / "sub/deep/d.json").unlink()
+    (tree / "sub/deep").rmdir()
+    bump_mtime(tree / "sub")
+    catalog.rescan_changed()
+    assert names(catalog) == ["a.json", "b.json", "sub/c.json"]
+
+
+def test_in_place_modification_needs_a_full_rescan(tree):
+    catalog = WorkflowCatalog(str(tree))
+    catalog.rescan()
+
+    st = os.stat(tree)
+    write(tree, "a.json", '{"nodes": []}')
+    os.utime(tree, ns=(st.st_atime_ns, st.st_mtime_ns))
+    catalog.rescan_changed()
+    assert catalog.query(prefix="a.json")["workflows"][0]["size"] == 2
+
+    catalog.rescan()
+    assert catalog.query(prefix="a.json")["workflows"][0]["size"] == 13
+
+
+def test_refresh_file_adds_updates_and_removes_entries(tree):
+    catalog = WorkflowCatalog(str(tree))
+    catalog.rescan()
+
+    write(tree, "sub/e.json")
+    catalog.refresh_file(os.path.join("sub", "e.json"))
+    assert "sub/e.json" in names(catalog)
+
+    (tree / "a.json").unlink()
+    catalog.refresh_file("a.json")
+    assert "a.json" not in names(catalog)
+
+    token = catalog.token
+    write(tree, ".hidden/f.json")
+    catalog.refresh_file(".hidden/f.json")
+    catalog.refresh_file("notes.txt")
+    assert catalog.token == token
+
+
+def test_event_handler_refreshes_files_and_rescans_folders(tree):
+    catalog = WorkflowCatalog(str(tree))
+    catalog.rescan()
+    handler = _EventHandler(catalog)
+
+    write(tree, "moved.json")
+    (tree / "b.json").unlink()
+    handler.dispatch(types.SimpleNamespace(
+        is_directory=False, event_type="moved",
+        src_path=str(tree / "b.json"), dest_path=str(tree / "moved.json"),
+    ))
+    assert names(catalog) == ["a.json", "moved.json", "sub/c.json", "sub/deep/d.json"]
+
+    write(tree, "new/g.json")
+    handler.dispatch(types.SimpleNamespace(is_directory=True, event_type="created", src_path=str(tree / "new")))
+    assert "new/g.json" in names(catalog)
+
+
+def test_start_polls_for_changes(tree):
+    async def scenario():
+        catalog = WorkflowCatalog(str(tree), watcher=WATCHER_POLL, poll_interval=0.5)
+        await catalog.start()
+        assert catalog.stats()["watcher"] == "poll"
+
+        write(tree, "sub/e.json")
+        bump_mtime(tree / "sub")
+        await asyncio.sleep(0.8)
+        assert "sub/e.json" in names(catalog)
+        catalog.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,218 @@
+"""Parity of NativeConverter with graphToPrompt() in js/utils.js.
+
+Each fixture in fixtures/native holds a UI-format workflow and the API
+format the frontend produces for it. default_txt2img is the frontend's
+default graph with its Export (API) output; the others are variations of
+it whose expected output follows graphToPrompt() in js/utils.js, and
+should be captured again from a running frontend when its serialization
+changes. The node classes below copy the INPUT_TYPES() of the ComfyUI
+core nodes the fixtures use.
+"""
+import asyncio
+import copy
+import glob
+import json
+import os
+import sys
+import types
+
+import pytest
+
+from cpe.converter import NativeConverter, UnsupportedWorkflowError
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "native", "*.json")))
+
+SAMPLERS = ["euler", "euler_ancestral", "dpmpp_2m"]
+SCHEDULERS = ["normal", "karras", "simple"]
+SEED = ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff, "control_after_generate": True})
+
+
+def _node_class(name, required, optional=None, module="nodes"):
+    input_types = {"required": required}
+    if optional is not None:
+        input_types["optional"] = optional
+    return type(name, (), {
+        "INPUT_TYPES": classmethod(lambda cls: input_types),
+        "RELATIVE_PYTHON_MODULE": module,
+    })
+
+
+NODE_CLASSES = {
+    "CheckpointLoaderSimple": _node_class("CheckpointLoaderSimple", {
+        "ckpt_name": (["v1-5-pruned-emaonly.safetensors"],),
+    }),
+    "CLIPTextEncode": _node_class("CLIPTextEncode", {
+        "text": ("STRING", {"multiline": True, "dynamicPrompts": True}),
+        "clip": ("CLIP",),
+    }),
+    "KSampler": _node_class("KSampler", {
+        "model": ("MODEL",),
+        "seed": SEED,
+        "steps": ("INT", {"default": 20, "min": 1, "max": 10000}),
+        "cfg": ("FLOAT", {"default": 8.0, "min": 0.0, "max": 100.0, "step": 0.1, "round": 0.01}),
+        "sampler_name": (SAMPLERS,),
+        "scheduler": (SCHEDULERS,),
+        "positive": ("CONDITIONING",),
+        "negative": ("CONDITIONING",),
+        "latent_image": ("LATENT",),
+        "denoise": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 1.0, "step": 0.01}),
+    }),
+    "KSamplerAdvanced": _node_class("KSamplerAdvanced", {
+        "model": ("MODEL",),
+        "add_noise": (["enable", "disable"],),
+        "noise_seed": SEED,
+        "steps": ("INT", {"default": 20, "min": 1, "max": 10000}),
+        "cfg": ("FLOAT", {"default": 8.0, "min": 0.0, "max": 100.0, "step": 0.1, "round": 0.01}),
+        "sampler_name": (SAMPLERS,),
+        "scheduler": (SCHEDULERS,),
+        "positive": ("CONDITIONING",),
+        "negative": ("CONDITIONING",),
+        "latent_image": ("LATENT",),
+        "start_at_step": ("INT", {"default": 0, "min": 0, "max": 10000}),
+        "end_at_step": ("INT", {"default": 10000, "min": 0, "max": 10000}),
+        "return_with_leftover_noise": (["disable", "enable"],),
+    }),
+    "EmptyLatentImage": _node_class("EmptyLatentImage", {
+        "width": ("INT", {"default": 512, "min": 16, "max": 16384, "step": 8}),
+        "height": ("INT", {"default": 512, "min": 16, "max": 16384, "step": 8}),
+        "batch_size": ("INT", {"default": 1, "min": 1, "max": 4096}),
+    }),
+    "VAEDecode": _node_class("VAEDecode", {"samples": ("LATENT",), "vae": ("VAE",)}),
+    "VAEEncode": _node_class("VAEEncode", {"pixels": ("IMAGE",), "vae": ("VAE",)}),
+    "SaveImage": _node_class("SaveImage", {
+        "images": ("IMAGE",),
+        "filename_prefix": ("STRING", {"default": "ComfyUI"}),
+    }),
+    "PreviewImage": _node_class("PreviewImage", {"images": ("IMAGE",)}),
+    "LoadImage": _node_class("LoadImage", {"image": (["example.png"], {"image_upload": True})}),
+    "LoraLoader": _node_class("LoraLoader", {
+        "model": ("MODEL",),
+        "clip": ("CLIP",),
+        "lora_name": (["detail.safetensors"],),
+        "strength_model": ("FLOAT", {"default": 1.0, "min": -100.0, "max": 100.0, "step": 0.01}),
+        "strength_clip": ("FLOAT", {"default": 1.0, "min": -100.0, "max": 100.0, "step": 0.01}),
+    }),
+    "PrimitiveInt": _node_class("PrimitiveInt", {
+        "value": ("INT", {"min": -sys.maxsize, "max": sys.maxsize, "control_after_generate": True}),
+    }, module="comfy_extras.nodes_primitive"),
+    "StringListInput": _node_class("StringListInput", {
+        "strings": ("STRING", {}),
+        "count": ("INT", {"default": 1}),
+    }),
+    "FancyPrompt": _node_class("FancyPrompt", {"text": ("STRING", {})}, module="custom_nodes.fancy_nodes"),
+}
+
+DISPLAY_NAMES = {
+    "CheckpointLoaderSimple": "Load Checkpoint",
+    "CLIPTextEncode": "CLIP Text Encode (Prompt)",
+    "KSampler": "KSampler",
+    "KSamplerAdvanced": "KSampler (Advanced)",
+    "EmptyLatentImage": "Empty Latent Image",
+    "VAEDecode": "VAE Decode",
+    "VAEEncode": "VAE Encode",
+    "SaveImage": "Save Image",
+    "PreviewImage": "Preview Image",
+    "LoadImage": "Load Image",
+    "LoraLoader": "Load LoRA",
+    "PrimitiveInt": "Int",
+    "StringListInput": "String List Input",
+}
+
+
+@pytest.fixture(autouse=True)
+def comfy_nodes(monkeypatch):
+    module = types.ModuleType("nodes")
+    module.NODE_CLASS_MAPPINGS = NODE_CLASSES
+    module.NODE_DISPLAY_NAME_MAPPINGS = DISPLAY_NAMES
+    module.EXTENSION_WEB_DIRS = {"fancy_nodes": "/custom_nodes/fancy_nodes/js"}
+    monkeypatch.setitem(sys.modules, "nodes", module)
+
+
+def load_fixture(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def convert(workflow):
+    converter = NativeConverter()
+    asyncio.run(converter.load_definitions([workflow]))
+    return converter.convert(workflow)
+
+
+def default_workflow():
+    path = next(path for path in FIXTURES if path.endswith("default_txt2img.json"))
+    return load_fixture(path)["ui"]
+
+
+def node(workflow, node_id):
+    return next(node for node in workflow["nodes"] if node["id"] == node_id)
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda path: os.path.basename(path)[:-5])
+def test_matches_frontend_output(path):
+    fixture = load_fixture(path)
+    assert convert(fixture["ui"]) == fixture["api"]
+
+
+def test_definitions_must_be_loaded_first():
+    with pytest.raises(UnsupportedWorkflowError, match="not loaded"):
+        NativeConverter().convert(default_workflow())
+
+
+def test_reset_drops_loaded_definitions():
+    converter = NativeConverter()
+    asyncio.run(converter.load_definitions([default_workflow()]))
+    converter.reset()
+    with pytest.raises(UnsupportedWorkflowError, match="not loaded"):
+        converter.convert(default_workflow())
+
+
+def _dynamic_prompt(workflow):
+    node(workflow, 6)["widgets_values"] = ["a {red|blue} bottle"]
+
+
+def _group_node(workflow):
+    workflow["extra"]["groupNodes"] = {"Sampler": {"nodes": []}}
+
+
+def _subgraph(workflow):
+    workflow["definitions"] = {"subgraphs": [{"id": "1"}]}
+
+
+def _unknown_type(workflow):
+    node(workflow, 9)["type"] = "NotInstalled"
+
+
+def _frontend_extension(workflow):
+    node(workflow, 6)["type"] = "FancyPrompt"
+
+
+def _widget_count(workflow):
+    node(workflow, 3)["widgets_values"].pop()
+
+
+def _control_value(workflow):
+    node(workflow, 3)["widgets_values"][1] = "sometimes"
+
+
+def _object_widgets(workflow):
+    node(workflow, 5)["widgets_values"] = {"width": 512, "height": 512, "batch_size": 1}
+
+
+def _reroute_cycle(workflow):
+    workflow["nodes"].append({
+        "id": 10, "type": "Reroute", "mode": 0, "inputs": [{"name": "", "type": "*", "link": 10}],
+    })
+    workflow["links"].append([10, 10, 0, 10, 0, "IMAGE"])
+    node(workflow, 9)["inputs"][0]["link"] = 10
+
+
+@pytest.mark.parametrize("change", [
+    _dynamic_prompt, _group_node, _subgraph, _unknown_type, _frontend_extension,
+    _widget_count, _control_value, _object_widgets, _reroute_cycle,
+])
+def test_workflows_it_cannot_reproduce_need_the_browser(change):
+    workflow = copy.deepcopy(default_workflow())
+    change(workflow)
+    with pytest.raises(UnsupportedWorkflowError):
+        convert(workflow)
@@ -0,0 +1,108 @@
+import os
+import threading
+
+from cpe.cache import DiskConversionCache
+
+RESULT = {"3": {"class_type": "KSampler", "inputs": {"seed": 1}}}
+
+
+def test_entry_valid_while_file_is_unchanged(tmp_path):
+    cache = DiskConversionCache(str(tmp_path), 1 << 20)
+    cache.put("a.json", "fp", 100, 10, "hash", RESULT)
+
+    assert cache.get("a.json", "fp", 100, 10) == RESULT
+    assert cache.content_hash("a.json", 100, 10) == "hash"
+    assert cache.stats()["hits"] == 1
+
+
+def test_entry_survives_a_new_instance(tmp_path):
+    DiskConversionCache(str(tmp_path), 1 << 20).put("a.json", "fp", 100, 10, "hash", RESULT)
+    cache = DiskConversionCache(str(tmp_path), 1 << 20)
+    assert cache.get("a.json", "fp", 100, 10) == RESULT
+
+
+def test_modified_file_needs_matching_content_hash(tmp_path):
+    cache = DiskConversionCache(str(tmp_path), 1 << 20)
+    cache.put("a.json", "fp", 100, 10, "hash", RESULT)
+
+    # A stat-only pre-check does not count as a miss
+    assert cache.get("a.json", "fp", 200, 10) is None
+    assert cache.stats()["misses"] == 0
+    assert cache.content_hash("a.json", 200, 10) is None
+
+    assert cache.get("a.json", "fp", 200, 10, content_hash="hash") == RESULT
+    assert cache.get("a.json", "fp", 200, 10, content_hash="other") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_fingerprint_change_invalidates_entry(tmp_path):
+    cache = DiskConversionCache(str(tmp_path), 1 << 20)
+    cache.put("a.json", "fp", 100, 10, "hash", RESULT)
+    assert cache.get("a.json", "new", 100, 10, content_hash="hash") is None
+    # The content hash does not depend on the node registry
+    assert cache.content_hash("a.json", 100, 10) == "hash"
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = DiskConversionCache(str(tmp_path), 1 << 20)
+    cache.put("a.json", "fp", 100, 10, "hash", RESULT)
+    (entry,) = [p for p in tmp_path.iterdir() if p.suffix == ".json"]
+    with open(entry, "ab") as f:
+        f.write(b"garbage")
+
+    assert cache.get("a.json", "fp", 100, 10) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_trims_least_recently_used_entries(tmp_path):
+    cache = DiskConversionCache(str(tmp_path), 1 << 20)
+    cache.put("probe.json", "fp", 1, 1, "h", RESULT)
+    (probe,) = list(tmp_path.iterdir())
+    entry_size = probe.stat().st_size
+    probe.unlink()
+
+    cache = DiskConversionCache(str(tmp_path), 2 * entry_size + entry_size // 2)
+    cache.put("a.json", "fp", 1, 1, "h", RESULT)
+    cache.put("b.json", "fp", 1, 1, "h", RESULT)
+    # Make "a" the most recently used entry
+    for name, mtime in (("a.json", 2000), ("b.json", 1000)):
+        os.utime(cache._entry_path(name), (mtime, mtime))
+    cache.put("c.json", "fp", 1, 1, "h", RESULT)
+
+    assert cache.get("b.json", "fp", 1, 1) is None
+    assert cache.get("a.json", "fp", 1, 1) == RESULT
+    assert cache.get("c.json", "fp", 1, 1) == RESULT
+    assert cache.stats()["bytes"] == sum(p.stat().st_size for p in tmp_path.iterdir())
+
+
+def test_disabled_cache_writes_nothing(tmp_path):
+    cache = DiskConversionCache(str(tmp_path / "cache"), 0)
+    cache.put("a.json", "fp", 100, 10, "hash", RESULT)
+    assert not (tmp_path / "cache").exists()
+    assert cache.get("a.json", "fp", 100, 10) is None
+
+
+def test_concurrent_puts_and_gets(tmp_path):
+    cache = DiskConversionCache(str(tmp_path), 4096)
+    errors = []
+
+    def work(worker):
+        try:
+            for i in range(50):
+                name = f"{(worker + i) % 8}.json"
+                cache.put(name, "fp", i, 10, "hash", {"worker": worker, "i": i, "pad": "x" * 200})
+                cache.get(name, "fp", i, 10, content_hash="hash")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    files = list(tmp_path.iterdir())
+    assert not [p for p in files if p.suffix == ".tmp"]
+    assert cache.stats()["bytes"] == sum(p.stat().st_size for p in files)
+    assert cache.stats()["bytes"] <= 4096
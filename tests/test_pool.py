@@ -0,0 +1,318 @@
+import asyncio
+import functools
+
+import pytest
+
+from cpe.pool import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_PREFETCH,
+    OverloadedError,
+    PagePool,
+)
+
+
+class FakePages:
+    """Page factory for the pool: pages are plain strings."""
+
+    def __init__(self):
+        self.created = 0
+        self.closed = []
+
+    async def create(self):
+        self.created += 1
+        return f"page-{self.created}"
+
+    async def close(self, page):
+        self.closed.append(page)
+
+
+def make_pool(pages, **kwargs):
+    options = dict(min_size=1, max_size=1, scale_up_queue=1, scale_up_wait=0.0, idle_timeout=0.0)
+    options.update(kwargs)
+    return PagePool(pages.create, pages.close, **options)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+
+def test_start_creates_min_pages_and_reuses_them():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages, min_size=2, max_size=2)
+        await pool.start()
+        assert pool.size == 2
+
+        page = await pool.acquire()
+        assert pool.busy == 1
+        pool.release(page)
+        assert await pool.acquire() == page
+        assert pages.created == 2
+
+    run(scenario())
+
+
+def test_scales_up_when_requests_queue():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages, max_size=2)
+        await pool.start()
+
+        first = await pool.acquire()
+        second = await pool.acquire()
+        assert {first, second} == {"page-1", "page-2"}
+        assert pool.size == 2
+        assert [event["action"] for event in pool.stats()["recent_scaling"]] == ["scale_up"]
+
+    run(scenario())
+
+
+def test_waits_for_a_release_at_max_size():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages)
+        await pool.start()
+
+        page = await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        assert pool.waiting == 1
+
+        pool.release(page)
+        assert await waiter == page
+        assert pages.created == 1
+
+    run(scenario())
+
+
+def test_scales_up_after_scale_up_wait():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages, max_size=2, scale_up_queue=5, scale_up_wait=0.05)
+        await pool.start()
+
+        await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0.01)
+        assert pages.created == 1
+        assert await waiter == "page-2"
+
+    run(scenario())
+
+
+def test_closes_idle_pages_down_to_min_size():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages, max_size=2, idle_timeout=0.1)
+        await pool.start()
+
+        first = await pool.acquire()
+        second = await pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        await asyncio.sleep(1.3)
+        assert pool.size == 1
+        assert len(pages.closed) == 1
+        await pool.close()
+
+    run(scenario())
+
+
+def test_close_fails_waiting_requests():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages)
+        await pool.start()
+
+        await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        await pool.close()
+        with pytest.raises(RuntimeError):
+            await waiter
+        assert pages.closed == ["page-1"]
+
+    run(scenario())
+
+
+def test_rejects_requests_beyond_max_waiters():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages, max_waiters=1)
+        await pool.start()
+
+        await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError) as error:
+            await pool.acquire()
+        assert error.value.reason == OverloadedError.QUEUE_FULL
+        assert error.value.retry_after >= 1
+        assert pool.stats()["rejected"] == {OverloadedError.QUEUE_FULL: 1, OverloadedError.TIMEOUT: 0}
+        waiter.cancel()
+
+    run(scenario())
+
+
+def test_rejects_requests_after_wait_timeout():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages, wait_timeout=0.05)
+        await pool.start()
+
+        await pool.acquire()
+        with pytest.raises(OverloadedError) as error:
+            await pool.acquire()
+        assert error.value.reason == OverloadedError.TIMEOUT
+        assert pool.waiting == 0
+        assert pool.stats()["rejected"][OverloadedError.TIMEOUT] == 1
+
+    run(scenario())
+
+
+def test_retry_after_follows_measured_service_time():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages)
+        await pool.start()
+        assert pool.retry_after(10) == 1
+
+        page = await pool.acquire()
+        await asyncio.sleep(0.2)
+        pool.release(page)
+        assert pool.stats()["service_time_s"] >= 0.2
+        # Ten requests ahead on one page, each holding it for about 0.2s
+        assert pool.retry_after(10) in (3, 4)
+
+    run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages, max_waiters=1)
+        await pool.start()
+
+        page = await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert pool.waiting == 0
+
+        pool.release(page)
+        assert await pool.acquire() == page
+
+    run(scenario())
+
+
+async def _queue(pool, priorities):
+    """Queue one request per priority and return the tasks in that order."""
+    tasks = []
+    for priority, key in priorities:
+        tasks.append(asyncio.ensure_future(pool.acquire(priority, key)))
+        await asyncio.sleep(0)
+    return tasks
+
+
+async def _serve_order(pool, page, tasks):
+    """Hand one page to the queued requests in turn and return the order they got it in."""
+    order = []
+
+    def served(index, task):
+        order.append(index)
+        pool.release(task.result())
+
+    for index, task in enumerate(tasks):
+        task.add_done_callback(functools.partial(served, index))
+    pool.release(page)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_serves_higher_priority_classes_first():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages)
+        await pool.start()
+
+        page = await pool.acquire()
+        tasks = await _queue(pool, [
+            (PRIORITY_PREFETCH, None),
+            (PRIORITY_BACKGROUND, None),
+            (PRIORITY_INTERACTIVE, None),
+            (PRIORITY_BACKGROUND, None),
+        ])
+        assert await _serve_order(pool, page, tasks) == [2, 1, 3, 0]
+        assert pool.stats()["classes"][PRIORITY_BACKGROUND]["served"] == 2
+
+    run(scenario())
+
+
+def test_starved_requests_are_served_first():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages, starvation_after=0.05)
+        await pool.start()
+
+        page = await pool.acquire()
+        tasks = await _queue(pool, [(PRIORITY_PREFETCH, None)])
+        await asyncio.sleep(0.1)
+        tasks += await _queue(pool, [(PRIORITY_INTERACTIVE, None)])
+        assert await _serve_order(pool, page, tasks) == [0, 1]
+        assert pool.stats()["classes"][PRIORITY_PREFETCH]["starved"] == 1
+
+    run(scenario())
+
+
+def test_promote_moves_a_waiting_request_up():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages)
+        await pool.start()
+
+        page = await pool.acquire()
+        tasks = await _queue(pool, [
+            (PRIORITY_BACKGROUND, "a"),
+            (PRIORITY_PREFETCH, "b"),
+            (PRIORITY_BACKGROUND, "c"),
+        ])
+        pool.promote("b", PRIORITY_BACKGROUND)
+        # Promoted within its new class by arrival time
+        assert await _serve_order(pool, page, tasks) == [0, 1, 2]
+
+    run(scenario())
+
+
+def test_unknown_priority_is_rejected():
+    async def scenario():
+        pool = make_pool(FakePages())
+        await pool.start()
+        with pytest.raises(ValueError):
+            await pool.acquire("urgent")
+
+    run(scenario())
+
+
+def test_retired_pages_are_closed_once_released():
+    async def scenario():
+        pages = FakePages()
+        pool = make_pool(pages, min_size=2, max_size=2)
+        await pool.start()
+
+        busy = await pool.acquire()
+        idle = pool.pages()[0]
+        pool.retire(idle)
+        pool.retire(busy)
+        await asyncio.sleep(0)
+        assert pages.closed == [idle]
+        assert pool.is_retiring(busy)
+
+        pool.release(busy)
+        await asyncio.sleep(0)
+        assert pages.closed == [idle, busy]
+        assert pool.size == 0
+
+    run(scenario())
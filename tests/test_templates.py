@@ -0,0 +1,178 @@
+import copy
+import sys
+import types
+
+import pytest
+
+from cpe.templates import ConversionTemplates, topology_key
+
+
+class KSampler:
+    RELATIVE_PYTHON_MODULE = "nodes"
+
+
+class CustomSampler:
+    RELATIVE_PYTHON_MODULE = "custom_nodes.fancy_nodes"
+
+
+@pytest.fixture(autouse=True)
+def comfy_nodes(monkeypatch):
+    module = types.ModuleType("nodes")
+    module.NODE_CLASS_MAPPINGS = {"KSampler": KSampler, "CustomSampler": CustomSampler}
+    module.EXTENSION_WEB_DIRS = {"fancy_nodes": "/custom_nodes/fancy_nodes/js"}
+    monkeypatch.setitem(sys.modules, "nodes", module)
+
+
+def ui_workflow(seed=156680208700286, width=512, height=512, text="a cat"):
+    return {
+        "nodes": [
+            {"id": 3, "type": "KSampler", "pos": [0, 0], "mode": 0,
+             "inputs": [{"name": "latent_image", "type": "LATENT", "link": 1}],
+             "widgets_values": [seed, "randomize", 20, 8, "euler", "normal", 1]},
+            {"id": 5, "type": "EmptyLatentImage", "pos": [0, 300], "mode": 0,
+             "widgets_values": [width, height, 1]},
+            {"id": 6, "type": "CLIPTextEncode", "pos": [0, 600], "mode": 0,
+             "widgets_values": [text]},
+        ],
+        "links": [[1, 5, 0, 3, 3, "LATENT"]],
+    }
+
+
+def api_output(seed=156680208700286, width=512, height=512, text="a cat"):
+    """What graphToPrompt returns for ui_workflow()."""
+    return {
+        "3": {"class_type": "KSampler", "inputs": {
+            "seed": seed, "steps": 20, "cfg": 8, "sampler_name": "euler",
+            "scheduler": "normal", "denoise": 1, "latent_image": ["5", 0]}},
+        "5": {"class_type": "EmptyLatentImage", "inputs": {"width": width, "height": height, "batch_size": 1}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": text}},
+    }
+
+
+def learned(*conversions):
+    templates = ConversionTemplates(max_entries=8)
+    for kwargs in conversions:
+        templates.learn(ui_workflow(**kwargs), api_output(**kwargs), "fp")
+    return templates
+
+
+def test_patches_changed_widget_values():
+    templates = learned({})
+    assert templates.patch(ui_workflow(seed=42, text="a dog"), "fp") == api_output(seed=42, text="a dog")
+    assert templates.stats()["hits"] == 1
+
+
+def test_unchanged_workflow_returns_template_output():
+    templates = learned({})
+    assert templates.patch(ui_workflow(), "fp") == api_output()
+
+
+def test_layout_changes_keep_the_topology():
+    moved = ui_workflow()
+    moved["nodes"][0]["pos"] = [100, 100]
+    moved["groups"] = [{"title": "group"}]
+    assert topology_key(moved, "fp") == topology_key(ui_workflow(), "fp")
+
+
+def test_misses_on_other_topology_or_fingerprint():
+    templates = learned({})
+    extra = ui_workflow()
+    extra["nodes"].append({"id": 7, "type": "KSampler", "mode": 0, "widgets_values": []})
+    assert templates.patch(extra, "fp") is None
+    assert templates.patch(ui_workflow(), "other") is None
+    assert templates.stats()["misses"] == 2
+
+
+def test_ambiguous_widget_needs_a_conversion_that_tells_inputs_apart():
+    # width and height are both 512: either widget could feed either input
+    templates = learned({})
+    assert templates.patch(ui_workflow(width=768), "fp") is None
+    assert templates.stats()["fallbacks"] == 1
+
+    templates.learn(ui_workflow(width=640), api_output(width=640), "fp")
+    assert templates.patch(ui_workflow(width=768, height=1024), "fp") == api_output(width=768, height=1024)
+
+
+def test_widget_values_shared_by_two_inputs_stay_unmapped():
+    # cfg and denoise would both hold 8 in every conversion
+    conversion = api_output()
+    conversion["3"]["inputs"]["denoise"] = 8
+    workflow = ui_workflow()
+    workflow["nodes"][0]["widgets_values"][6] = 8
+    templates = ConversionTemplates(max_entries=8)
+    templates.learn(workflow, conversion, "fp")
+
+    changed = copy.deepcopy(workflow)
+    changed["nodes"][0]["widgets_values"][3] = 7
+    assert templates.patch(changed, "fp") is None
+
+
+@pytest.mark.parametrize("text", ["a {cat|dog}", "a cat /* comment */", "a cat // comment"])
+def test_dynamic_prompt_values_go_to_the_browser(text):
+    templates = learned({})
+    assert templates.patch(ui_workflow(text=text), "fp") is None
+    assert templates.stats()["fallbacks"] == 1
+
+
+def test_linked_widget_inputs_are_not_mapped():
+    workflow = ui_workflow()
+    workflow["nodes"][0]["inputs"].append({"name": "seed", "type": "INT", "widget": {"name": "seed"}, "link": 2})
+    workflow["links"].append([2, 8, 0, 3, 0, "INT"])
+    output = api_output()
+    output["3"]["inputs"]["seed"] = ["8", 0]
+    templates = ConversionTemplates(max_entries=8)
+    templates.learn(workflow, output, "fp")
+
+    changed = copy.deepcopy(workflow)
+    changed["nodes"][0]["widgets_values"][0] = 2
+    assert templates.patch(changed, "fp") is None
+
+
+def test_nodes_with_frontend_extensions_go_to_the_browser():
+    workflow = ui_workflow()
+    workflow["nodes"][0]["type"] = "CustomSampler"
+    output = api_output()
+    output["3"]["class_type"] = "CustomSampler"
+    templates = ConversionTemplates(max_entries=8)
+    templates.learn(workflow, output, "fp")
+
+    changed = copy.deepcopy(workflow)
+    changed["nodes"][0]["widgets_values"][0] = 2
+    assert templates.patch(changed, "fp") is None
+
+
+def test_list_values_are_wrapped():
+    workflow = ui_workflow()
+    workflow["nodes"][2]["widgets_values"] = [["a", "b"]]
+    output = api_output()
+    output["6"]["inputs"]["text"] = {"__value__": ["a", "b"]}
+    templates = ConversionTemplates(max_entries=8)
+    templates.learn(workflow, output, "fp")
+
+    changed = copy.deepcopy(workflow)
+    changed["nodes"][2]["widgets_values"] = [["c"]]
+    assert templates.patch(changed, "fp")["6"]["inputs"]["text"] == {"__value__": ["c"]}
+
+
+@pytest.mark.parametrize("workflow", [None, [], "nodes", {"nodes": "x"}, {"nodes": [1, 2]}, {"nodes": [{"type": "A"}]}])
+def test_malformed_workflows_are_ignored(workflow):
+    templates = ConversionTemplates(max_entries=8)
+    templates.learn(workflow, {}, "fp")
+    assert templates.patch(workflow, "fp") is None
+    assert templates.stats()["entries"] == 0
+
+
+def test_keeps_at_most_max_entries_topologies():
+    templates = ConversionTemplates(max_entries=1)
+    other = ui_workflow()
+    other["nodes"].pop()
+    templates.learn(ui_workflow(), api_output(), "fp")
+    templates.learn(other, api_output(), "fp")
+    assert templates.stats()["entries"] == 1
+    assert templates.patch(ui_workflow(), "fp") is None
+
+
+def test_disabled_templates_patch_nothing():
+    templates = ConversionTemplates(max_entries=0)
+    templates.learn(ui_workflow(), api_output(), "fp")
+    assert templates.patch(ui_workflow(), "fp") is None
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from cpe import jsonutil
+from cpe.worker import _HEADER, MAX_FRAME_BYTES, OFFLOAD_FRAME_BYTES, _Connection
+
+
+async def _connected_pair():
+    """Two _Connections joined over a loopback socket."""
+    accepted = asyncio.get_running_loop().create_future()
+    server = await asyncio.start_server(
+        lambda reader, writer: accepted.set_result(_Connection(reader, writer)), "127.0.0.1", 0
+    )
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    return server, _Connection(reader, writer), await accepted
+
+
+def test_frames_round_trip_small_and_large_messages():
+    async def scenario():
+        server, client, peer = await _connected_pair()
+        small = {"op": "stats", "id": 1}
+        large = {"op": "convert", "id": 2, "workflow": {"nodes": [{"id": i, "text": "x" * 100} for i in range(1000)]}}
+        # Encoded and decoded on the I/O executor
+        assert len(jsonutil.dumps(large)) >= OFFLOAD_FRAME_BYTES
+        await client.send(small)
+        await client.send(large)
+        assert await peer.receive() == small
+        assert await peer.receive() == large
+
+        client.close()
+        assert await peer.receive() is None
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_rejects_oversized_frames():
+    async def scenario():
+        server, client, peer = await _connected_pair()
+        client._writer.write(_HEADER.pack(MAX_FRAME_BYTES + 1))
+        with pytest.raises(ConnectionError):
+            await peer.receive()
+        client.close()
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_requests_are_resolved_by_replies():
+    async def scenario():
+        server, client, peer = await _connected_pair()
+        replies = asyncio.ensure_future(client.read_replies())
+        request = asyncio.ensure_future(client.request("convert", workflow={"nodes": []}))
+
+        message = await peer.receive()
+        assert message["op"] == "convert"
+        await peer.send({"id": message["id"], "result": {"1": {}}})
+        assert await request == {"1": {}}
+
+        pending = asyncio.ensure_future(client.request("stats"))
+        await peer.receive()
+        peer.close()
+        with pytest.raises(RuntimeError):
+            await pending
+        await replies
+        server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,115 @@
+import asyncio
+import contextlib
+import contextvars
+import re
+import time
+import uuid
+from typing import Any, Coroutine, Iterator, List, Optional, Tuple
+
+from .logger import current_request_id, get_logger
+
+logger = get_logger()
+
+# Client-supplied request IDs are echoed back and logged, so restrict them
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("cpe_trace", default=None)
+
+
+class Trace:
+    """Timed spans of one request.
+
+    Spans are recorded through span() from anywhere the request's context
+    reaches, including HeadlessBrowserManager. Concurrent tasks started
+    by the request (e.g. batch chunks) add to the same trace.
+    """
+
+    def __init__(self, request_id: str, name: str):
+        self.request_id = request_id
+        self.name = name
+        self.started = time.perf_counter()
+        # (span name, start offset, duration), in seconds
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def add(self, name: str, start: float, duration: float) -> None:
+        self.spans.append((name, start - self.started, duration))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: total duration per span name plus the whole request."""
+        totals = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        parts = [f"{name};dur={duration * 1000:.1f}" for name, duration in totals.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def dump(self) -> str:
+        """Multi-line description of every span, in start order."""
+        lines = [f"{self.name} took {self.elapsed() * 1000:.1f}ms"]
+        for name, offset, duration in sorted(self.spans, key=lambda span: span[1]):
+            lines.append(f"  +{offset * 1000:8.1f}ms  {name:<16} {duration * 1000:8.1f}ms")
+        return "\n".join(lines)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def new_request_id(supplied: Optional[str] = None) -> str:
+    """Use a well-formed client-supplied request ID, or generate one."""
+    if supplied and _REQUEST_ID_PATTERN.match(supplied):
+        return supplied
+    return uuid.uuid4().hex[:12]
+
+
+@contextlib.contextmanager
+def trace_request(name: str, request_id: str) -> Iterator[Trace]:
+    """Make a new trace (and its request ID) current for the enclosed code."""
+    trace = Trace(request_id, name)
+    trace_token = _current_trace.set(trace)
+    id_token = current_request_id.set(request_id)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(trace_token)
+        current_request_id.reset(id_token)
+
+
+def start_background(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """Run a coroutine as a task outside the current request's trace and request ID.
+
+    Tasks normally copy the context they are created in, so work a
+    request merely triggers (a pool scale-up, a page recycle) would
+    otherwise add spans and log lines to that request.
+    """
+    return contextvars.Context().run(asyncio.ensure_future, coro)
+
+
+@contextlib.contextmanager
+def span(name: str, histogram=None, label: Optional[str] = None) -> Iterator[None]:
+    """Time the enclosed code as a span of the current trace, if any.
+
+    Args:
+        name: Span name, also the Server-Timing metric name.
+        histogram: Optional metrics.Histogram that also gets the duration.
+        label: Histogram label, if different from the span name.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        if histogram is not None:
+            histogram.observe(label or name, duration)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, started, duration)
+
+
+def log_if_slow(trace: Trace, threshold_ms: float) -> None:
+    """Log the full trace when a request took at least threshold_ms (0 disables)."""
+    if threshold_ms > 0 and trace.elapsed() * 1000 >= threshold_ms:
+        logger.warning("Slow request: %s", trace.dump())
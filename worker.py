@@ -0,0 +1,581 @@
+"""Out-of-process conversion workers.
+
+With CPE_WORKERS set, browser conversions run in separate worker
+processes instead of ComfyUI's event loop. Each worker runs its own
+HeadlessBrowserManager (with its own browser shards and page pools) and
+serves requests from the extension over a loopback TCP connection, one
+JSON message per length-prefixed frame.
+
+WorkerPool is the extension's side: it starts the workers, sends each
+conversion to the least loaded one, polls their stats, and restarts a
+worker whose process exits or stops answering. main() is the worker's
+side.
+
+Only the browser work moves out of ComfyUI's process. Cache lookups
+(hashing the workflow), native conversion and template patching stay in
+it: native conversion needs ComfyUI's node registry, and answering
+cache hits without a round trip to a worker is what keeps them cheap.
+Frames that carry workflows, and large frames in general, are encoded
+and decoded on the I/O executor rather than on the event loop.
+"""
+import asyncio
+import os
+import secrets
+import struct
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import fileio, jsonutil
+from .logger import current_request_id, get_logger
+from .pool import OverloadedError
+from .tracing import start_background
+
+logger = get_logger()
+
+# Frames are a 4-byte big-endian body length followed by a JSON body
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+# Frames at least this large are decoded on the I/O executor, as are
+# messages with these keys encoded, to keep large workflows off the loop
+OFFLOAD_FRAME_BYTES = 64 * 1024
+_WORKFLOW_KEYS = frozenset({"workflow", "workflows"})
+
+WORKER_READY = "ready"
+WORKER_STARTING = "starting"
+WORKER_ERROR = "error"
+WORKER_STOPPED = "stopped"
+
+# How long a new worker process may take to connect back (seconds)
+WORKER_CONNECT_TIMEOUT = 30.0
+# Stats are polled this often, and a worker that does not answer a poll
+# within the timeout is considered hung and restarted (seconds)
+WORKER_STATS_INTERVAL = 2.0
+WORKER_STATS_TIMEOUT = 30.0
+# How long a stopping worker may take to shut its browser down (seconds)
+WORKER_STOP_TIMEOUT = 10.0
+# Delay before restarting a failed worker, doubled after each failed attempt (seconds)
+WORKER_RESTART_DELAY = 1.0
+WORKER_RESTART_MAX_DELAY = 60.0
+
+# Environment variable through which a worker gets its connection token;
+# unlike the command line, a process's environment is private to its user
+_TOKEN_ENV = "CPE_WORKER_TOKEN"
+
+# Package name the extension is imported under in worker processes
+_WORKER_PACKAGE = "cpe_worker"
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Run by the worker process: makes the extension's directory importable as
+# a package without executing its __init__.py, which expects ComfyUI
+_BOOTSTRAP = (
+    "import importlib, sys, types\n"
+    "package = types.ModuleType(sys.argv[1])\n"
+    "package.__path__ = [sys.argv[2]]\n"
+    "sys.modules[sys.argv[1]] = package\n"
+    "importlib.import_module(sys.argv[1] + '.worker').main(sys.argv[3:])\n"
+)
+
+
+def _encode_error(error: Exception) -> Dict[str, Any]:
+    if isinstance(error, OverloadedError):
+        return {
+            "type": "overloaded",
+            "reason": error.reason,
+            "retry_after": error.retry_after,
+            "message": str(error),
+        }
+    return {"type": "runtime", "message": str(error)}
+
+
+def _decode_error(error: Dict[str, Any]) -> Exception:
+    if error.get("type") == "overloaded":
+        return OverloadedError(error["reason"], error["retry_after"], error["message"])
+    return RuntimeError(error.get("message") or "Conversion worker error")
+
+
+class _Connection:
+    """One end of a worker connection.
+
+    Frames are written whole, so concurrent senders never interleave.
+    Requests get increasing ids, and replies carry the id of their request.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._send_lock = asyncio.Lock()
+        self._replies: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        if _WORKFLOW_KEYS.isdisjoint(message):
+            body = jsonutil.dumps(message)
+        else:
+            body = await fileio.run_io(jsonutil.dumps, message)
+        async with self._send_lock:
+            self._writer.write(_HEADER.pack(len(body)))
+            self._writer.write(body)
+            await self._writer.drain()
+
+    async def receive(self) -> Optional[Dict[str, Any]]:
+        """Read one message, or None once the peer closed the connection.
+
+        Raises:
+            ConnectionError: If the connection broke or a frame is invalid.
+        """
+        try:
+            header = await self._reader.readexactly(_HEADER.size)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise ConnectionError("Connection closed within a frame header")
+            return None
+        (length,) = _HEADER.unpack(header)
+        if length > MAX_FRAME_BYTES:
+            raise ConnectionError(f"Frame of {length} bytes exceeds the limit")
+        try:
+            body = await self._reader.readexactly(length)
+            if length >= OFFLOAD_FRAME_BYTES:
+                return await fileio.run_io(jsonutil.loads, body)
+            return jsonutil.loads(body)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("Connection closed within a frame")
+        except ValueError as e:
+            raise ConnectionError(f"Invalid frame: {str(e)}")
+
+    async def request(self, op: str, **args) -> Any:
+        """Send a request and wait for its result.
+
+        Raises:
+            OverloadedError: If the worker's page pool rejected it.
+            RuntimeError: If the worker failed it or the connection was lost.
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._replies[request_id] = future
+        try:
+            try:
+                await self.send({"id": request_id, "op": op, **args})
+            except ConnectionError as e:
+                raise RuntimeError(f"Conversion worker connection lost: {str(e)}") from e
+            return await future
+        finally:
+            self._replies.pop(request_id, None)
+
+    async def read_replies(self) -> None:
+        """Resolve pending requests with replies until the connection closes.
+
+        Requests still pending then fail with RuntimeError.
+        """
+        try:
+            while True:
+                message = await self.receive()
+                if message is None:
+                    return
+                future = self._replies.get(message.get("id"))
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(_decode_error(message["error"]))
+                else:
+                    future.set_result(message.get("result"))
+        except ConnectionError as e:
+            logger.error("Conversion worker connection failed: %s", str(e))
+        finally:
+            for future in self._replies.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Conversion worker exited"))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class ConversionWorker:
+    """A worker process and the connection to it, as seen from the extension."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.status = WORKER_STOPPED
+        self.error_message: Optional[str] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.connection: Optional[_Connection] = None
+        self.starts = 0
+        self.failures = 0
+        self.in_flight = 0
+        # Latest stats reported by the worker's browser manager
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.restart_task: Optional[asyncio.Task] = None
+
+    @property
+    def restarting(self) -> bool:
+        return self.restart_task is not None and not self.restart_task.done()
+
+    def load(self) -> float:
+        """Requests in flight per page the worker's pools may grow to."""
+        pool = (self.snapshot or {}).get("pool") or {}
+        return self.in_flight / max(1, pool.get("max", 1))
+
+    async def request(self, op: str, **args) -> Any:
+        """Send a request to the worker and wait for its result (see _Connection.request)."""
+        if self.connection is None:
+            raise RuntimeError(f"Conversion worker {self.index} is not connected")
+        return await self.connection.request(op, **args)
+
+    async def notify(self, op: str, **args) -> None:
+        """Send a message that gets no reply."""
+        if self.connection is None:
+            return
+        try:
+            await self.connection.send({"op": op, **args})
+        except ConnectionError:
+            pass
+
+    def close(self) -> None:
+        """Drop the connection; the worker process exits once it notices."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def kill(self) -> None:
+        """Drop the connection and terminate the process if it is still running."""
+        self.close()
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "status": self.status,
+            "error": self.error_message,
+            "pid": self.process.pid if self.process is not None else None,
+            "starts": self.starts,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "restarting": self.restarting,
+        }
+
+
+class WorkerPool:
+    """Starts, supervises and dispatches requests to conversion worker processes.
+
+    Workers connect back to a listening socket on the loopback interface
+    and identify themselves with a token passed in their environment, so
+    processes of other local users cannot pose as a worker.
+    """
+
+    def __init__(self, size: int):
+        self._workers = [ConversionWorker(index) for index in range(max(1, size))]
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._port: Optional[int] = None
+        # Workers being started, by token, until they connect
+        self._connecting: Dict[str, asyncio.Future] = {}
+        self._frontend: Dict[str, Any] = {}
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return len(self._workers)
+
+    def ready_workers(self) -> List[ConversionWorker]:
+        return [worker for worker in self._workers if worker.status == WORKER_READY]
+
+    def snapshots(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """Index and latest browser manager stats of every ready worker."""
+        return [(worker.index, worker.snapshot) for worker in self.ready_workers() if worker.snapshot is not None]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [worker.stats() for worker in self._workers]
+
+    async def start(self, comfyui_url: str, web_root: Optional[str], extension_dirs: Dict[str, str]) -> None:
+        """Start every worker and have it initialize its browser for the given frontend.
+
+        Returns once every worker started or failed. Workers that failed
+        are restarted in the background.
+
+        Raises:
+            RuntimeError: If no worker could be started.
+        """
+        self._closed = False
+        self._frontend = {"url": comfyui_url, "web_root": web_root, "extension_dirs": extension_dirs}
+        if self._server is None:
+            self._server = await asyncio.start_server(self._on_connection, "127.0.0.1", 0)
+            self._port = self._server.sockets[0].getsockname()[1]
+
+        outcomes = await asyncio.gather(
+            *[self._start_worker(worker) for worker in self._workers],
+            return_exceptions=True,
+        )
+        if not self.ready_workers():
+            raise next(
+                (outcome for outcome in outcomes if isinstance(outcome, BaseException)),
+                RuntimeError("No conversion worker is ready"),
+            )
+        for worker in self._workers:
+            if worker.status != WORKER_READY:
+                self._schedule_restart(worker)
+        if self._monitor_task is None:
+            self._monitor_task = start_background(self._monitor())
+
+    async def _start_worker(self, worker: ConversionWorker) -> None:
+        """Spawn a worker process, wait for it to connect and initialize its browser.
+
+        On failure the process is killed, the worker marked as failed and
+        RuntimeError raised.
+        """
+        worker.status = WORKER_STARTING
+        worker.error_message = None
+        token = secrets.token_hex(16)
+        connected = asyncio.get_running_loop().create_future()
+        self._connecting[token] = connected
+        try:
+            # Spawning forks ComfyUI's process, which takes a while with a large heap
+            worker.process = await fileio.run_io(
+                subprocess.Popen,
+                [sys.executable, "-c", _BOOTSTRAP, _WORKER_PACKAGE, _PACKAGE_DIR, "127.0.0.1", str(self._port)],
+                env={**os.environ, _TOKEN_ENV: token},
+            )
+            worker.connection = await asyncio.wait_for(connected, WORKER_CONNECT_TIMEOUT)
+            start_background(self._read_replies(worker, worker.connection))
+            worker.snapshot = await worker.request("start", **self._frontend)
+        except Exception as e:
+            worker.kill()
+            worker.status = WORKER_ERROR
+            worker.error_message = f"Failed to start conversion worker: {str(e) or type(e).__name__}"
+            logger.error("Conversion worker %d: %s", worker.index, worker.error_message)
+            raise RuntimeError(worker.error_message) from e
+        finally:
+            self._connecting.pop(token, None)
+
+        worker.status = WORKER_READY
+        worker.starts += 1
+        logger.info("Conversion worker %d started (PID %d)", worker.index, worker.process.pid)
+
+    async def _on_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = _Connection(reader, writer)
+        try:
+            hello = await asyncio.wait_for(connection.receive(), WORKER_CONNECT_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            hello = None
+        connected = self._connecting.get((hello or {}).get("token"))
+        if connected is None or connected.done():
+            connection.close()
+            return
+        connected.set_result(connection)
+
+    async def _read_replies(self, worker: ConversionWorker, connection: _Connection) -> None:
+        await connection.read_replies()
+        # A restarted worker has a new connection by the time the old one ends
+        if worker.connection is connection:
+            code = worker.process.poll() if worker.process is not None else None
+            self._fail(worker, "Connection closed" if code is None else f"Process exited with code {code}")
+
+    def _fail(self, worker: ConversionWorker, reason: str) -> None:
+        """Take a failed worker out of service and restart it in the background."""
+        if worker.status != WORKER_READY:
+            return
+        worker.status = WORKER_ERROR
+        worker.error_message = reason
+        worker.failures += 1
+        worker.kill()
+        if not self._closed:
+            logger.warning("Conversion worker %d failed (%s), restarting it", worker.index, reason)
+            self._schedule_restart(worker)
+
+    def _schedule_restart(self, worker: ConversionWorker) -> None:
+        if not worker.restarting:
+            worker.restart_task = start_background(self._restart_worker(worker))
+
+    async def _restart_worker(self, worker: ConversionWorker) -> None:
+        """Restart a failed worker, backing off between attempts."""
+        delay = WORKER_RESTART_DELAY
+        while True:
+            try:
+                await self._start_worker(worker)
+            except RuntimeError:
+                logger.info("Retrying conversion worker %d in %.0fs", worker.index, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WORKER_RESTART_MAX_DELAY)
+                continue
+            logger.info("Conversion worker %d restarted", worker.index)
+            return
+
+    async def _monitor(self) -> None:
+        """Refresh the ready workers' stats, restarting workers that stop answering."""
+        while True:
+            await asyncio.sleep(WORKER_STATS_INTERVAL)
+            await asyncio.gather(*[self._poll(worker) for worker in self.ready_workers()])
+
+    async def _poll(self, worker: ConversionWorker) -> None:
+        try:
+            worker.snapshot = await asyncio.wait_for(worker.request("stats"), WORKER_STATS_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._fail(worker, f"No answer within {WORKER_STATS_TIMEOUT:.0f}s")
+        except RuntimeError:
+            # The connection is gone; _read_replies takes care of the worker
+            pass
+
+    async def call(self, op: str, **args) -> Any:
+        """Run a request on the least loaded ready worker.
+
+        The ID of the HTTP request being handled is passed along, so the
+        worker's log lines carry it too.
+
+        Raises:
+            OverloadedError: If the worker's page pool rejected the request.
+            RuntimeError: If no worker is ready or the worker failed the request.
+        """
+        ready = self.ready_workers()
+        if not ready:
+            raise RuntimeError("No conversion worker is available")
+        worker = min(ready, key=lambda candidate: candidate.load())
+        worker.in_flight += 1
+        try:
+            return await worker.request(op, request_id=current_request_id.get(), **args)
+        finally:
+            worker.in_flight -= 1
+
+    def promote(self, key: str, priority: str) -> None:
+        """Raise the priority of a queued conversion in whichever worker holds it."""
+        for worker in self.ready_workers():
+            asyncio.ensure_future(worker.notify("promote", key=key, priority=priority))
+
+    async def warm(self) -> None:
+        """Run the warm-up conversion on every page of every ready worker."""
+        await asyncio.gather(*[worker.request("warm") for worker in self.ready_workers()])
+
+    async def refresh(self, reason: str) -> None:
+        """Have every ready worker replace its pages with freshly loaded ones."""
+        await asyncio.gather(
+            *[worker.request("refresh", reason=reason) for worker in self.ready_workers()],
+            return_exceptions=True,
+        )
+
+    async def stop(self) -> None:
+        """Stop every worker, giving each time to shut its browser down."""
+        self._closed = True
+        tasks = [worker.restart_task for worker in self._workers if worker.restarting]
+        if self._monitor_task is not None:
+            tasks.append(self._monitor_task)
+            self._monitor_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*[self._stop_worker(worker) for worker in self._workers])
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _stop_worker(self, worker: ConversionWorker) -> None:
+        worker.status = WORKER_STOPPED
+        worker.snapshot = None
+        process = worker.process
+        worker.close()
+        if process is not None:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + WORKER_STOP_TIMEOUT
+            while process.poll() is None and loop.time() < deadline:
+                await asyncio.sleep(0.1)
+        worker.kill()
+
+    def kill(self) -> None:
+        """Terminate every worker process right away (for atexit)."""
+        for worker in self._workers:
+            if worker.process is not None and worker.process.poll() is None:
+                try:
+                    worker.process.terminate()
+                except Exception as e:
+                    logger.error("Error terminating conversion worker (PID %d): %s", worker.process.pid, str(e))
+
+
+def _snapshot(manager) -> Dict[str, Any]:
+    return {
+        "status": manager.status.value,
+        "error": manager.error_message,
+        "init": manager.init_progress(),
+        "pool": manager.pool_stats(),
+        "shards": manager.shard_stats(),
+        "recycling": manager.recycling_stats(),
+        "conversion": manager.conversion_stats(),
+    }
+
+
+async def _handle(manager, connection: _Connection, message: Dict[str, Any]) -> None:
+    """Run one request in the worker process and send back its reply."""
+    request_id = message.get("id")
+    token = current_request_id.set(message.get("request_id"))
+    try:
+        op = message.get("op")
+        result = None
+        if op == "start":
+            manager.use_frontend(message["url"], message["web_root"], message["extension_dirs"])
+            await manager.initialize()
+            result = _snapshot(manager)
+        elif op == "convert":
+            result = await manager.browser_convert(message["workflow"], message["priority"], message.get("key"))
+        elif op == "convert_batch":
+            result = await manager.browser_convert_batch(message["workflows"], message["priority"])
+        elif op == "promote":
+            manager.promote(message["key"], message["priority"])
+        elif op == "warm":
+            await manager.warm_pages()
+        elif op == "refresh":
+            await manager.refresh_pages(message["reason"])
+        elif op == "stats":
+            result = _snapshot(manager)
+        else:
+            raise RuntimeError(f"Unknown worker request: {op}")
+        reply = {"id": request_id, "result": result}
+    except Exception as e:
+        reply = {"id": request_id, "error": _encode_error(e)}
+    finally:
+        current_request_id.reset(token)
+
+    if request_id is not None:
+        try:
+            await connection.send(reply)
+        except ConnectionError:
+            pass
+
+
+async def _serve(host: str, port: int, token: str) -> None:
+    from .browser import HeadlessBrowserManager
+
+    reader, writer = await asyncio.open_connection(host, port)
+    connection = _Connection(reader, writer)
+    await connection.send({"op": "hello", "token": token, "pid": os.getpid()})
+
+    manager = HeadlessBrowserManager(workers=0)
+    handlers = set()
+    try:
+        while True:
+            try:
+                message = await connection.receive()
+            except ConnectionError as e:
+                logger.error("Lost the connection to the extension: %s", str(e))
+                break
+            if message is None:
+                break
+            task = asyncio.ensure_future(_handle(manager, connection, message))
+            handlers.add(task)
+            task.add_done_callback(handlers.discard)
+    finally:
+        for task in handlers:
+            task.cancel()
+        await manager.shutdown()
+        connection.close()
+
+
+def main(argv: List[str]) -> None:
+    """Entry point of a worker process: connect to the extension and serve its requests.
+
+    Exits when the extension closes the connection.
+    """
+    host, port = argv
+    # Not inherited by the browser processes started from here
+    token = os.environ.pop(_TOKEN_ENV)
+    asyncio.run(_serve(host, int(port), token))